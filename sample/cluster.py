@@ -0,0 +1,159 @@
+import submarine_py
+from submarine_py.cluster import Coordinator, game_result, league, worker_main
+from submarine_py.results import ResultStore
+from submarine_py.server import Adjudication
+import collections
+import logging
+import multiprocessing
+import os
+import sys
+import time
+
+
+def coordinator(args):
+    rocks = []
+    if args.rounded_field:
+        rocks = submarine_py.Field.corner_rocks(
+            args.field_height, args.field_width
+        )
+    field = submarine_py.Field(args.field_height, args.field_width, rocks)
+    adjudication = Adjudication(args.draw_repetition, args.draw_no_progress)
+    jobs = league(args.players, field, args.games, seed=args.seed,
+                  adjudication=adjudication)
+    store = ResultStore(args.db) if args.db else None
+    wins = collections.Counter()
+
+    def on_result(job, result):
+        if result['winner'] >= 0:
+            wins[job.players[result['winner']]] += 1
+        if store:
+            store.record(job.players, game_result(result), job.field)
+
+    host, port = (args.unix, None) if args.unix else (args.host, args.port)
+    # start local workers before any thread of the coordinator
+    workers = [multiprocessing.Process(target=worker_main,
+                                       args=(host or 'localhost', port))
+               for _ in range(args.local_workers)]
+    for worker in workers:
+        worker.start()
+    start = time.perf_counter()
+    c = Coordinator(jobs, lease=args.lease, retries=args.retries,
+                    on_result=on_result)
+    try:
+        results = c.run(host, port)
+    finally:
+        if store:
+            store.close()
+        for worker in workers:
+            worker.join(1)
+            worker.terminate()
+    elapsed = time.perf_counter() - start
+    for player in args.players:
+        print(f'{player} win {wins[player]} time(s)')
+    print(f'{len(results)} games in {elapsed:.1f} s'
+          f' ({len(results) / elapsed:.1f} games/s), {len(c.failed)} failed')
+    if c.failed:
+        sys.exit(1)
+
+
+def worker(args):
+    played = worker_main(args.host, args.port, wait=args.wait)
+    logging.info(f'{played} games played')
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="play a league on workers of many hosts",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+    p = commands.add_parser(
+        'coordinator', help="hand out games to workers and collect results",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    p.add_argument(
+        "players", nargs='+',
+        help="import paths of Player subclasses, e.g., mybot:MyPlayer;"
+        " workers must be able to import them",
+    )
+    p.add_argument(
+        "--games", type=int, default=10,
+        help="number of games of each pair of players",
+    )
+    p.add_argument(
+        "--host", default='',
+        help="hostname or ip address to bind, or '' for all interfaces",
+    )
+    p.add_argument(
+        "--port", type=int, default=2100,
+        help="port number to listen",
+    )
+    p.add_argument(
+        "--unix", metavar='PATH',
+        help="listen on a Unix-domain socket at PATH instead of TCP",
+    )
+    p.add_argument(
+        "--local-workers", type=int, default=0,
+        help="number of workers to start on this host",
+    )
+    p.add_argument(
+        "--lease", type=float, default=600,
+        help="seconds to wait for the result of a game before retrying it",
+    )
+    p.add_argument(
+        "--retries", type=int, default=3,
+        help="number of times a game is retried before giving up",
+    )
+    p.add_argument(
+        "--seed", type=int, default=1,
+        help="seed of the first pair of games",
+    )
+    p.add_argument(
+        "--db", metavar='PATH',
+        help="record results in an SQLite database",
+    )
+    p.add_argument(
+        "--draw-repetition", type=int, default=0, metavar='N',
+        help="declare a draw when the same position occurs N times",
+    )
+    p.add_argument(
+        "--draw-no-progress", type=int, default=0, metavar='K',
+        help="declare a draw when no ship loses HP in K turns",
+    )
+    p.add_argument(
+        "--field-width", type=int, default=5,
+        help="width of field",
+    )
+    p.add_argument(
+        "--field-height", type=int, default=5,
+        help="height of field",
+    )
+    p.add_argument(
+        "--rounded-field", action='store_true',
+        help="configure corners impassable",
+    )
+    p.set_defaults(main=coordinator)
+    p = commands.add_parser(
+        'worker', help="play games of a coordinator",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    p.add_argument(
+        "host",
+        help="hostname of the coordinator, or its socket path",
+    )
+    p.add_argument(
+        "port", type=int, nargs='?',
+        help="port of the coordinator (omit for a Unix-domain socket)",
+    )
+    p.add_argument(
+        "--wait", type=float, default=30,
+        help="seconds to keep trying to connect to the coordinator",
+    )
+    p.set_defaults(main=worker)
+    args = parser.parse_args()
+    FORMAT = '%(asctime)s %(levelname)s %(message)s'
+    logging.basicConfig(format=FORMAT, level=logging.INFO, force=True)
+    sys.path.insert(0, os.getcwd())
+    args.main(args)
@@ -0,0 +1,61 @@
+from submarine_py.conformance import Case, check, compare
+from submarine_py.local import load_class
+import os
+import sys
+import time
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="check that a game engine behaves as GameControl",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "candidate",
+        help="import path of the engine class, e.g., fastgame:FastControl",
+    )
+    parser.add_argument(
+        "--cases", type=int, default=10000,
+        help="number of random games",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0,
+        help="seed of the first game",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(),
+        help="number of worker processes (0 to run in this process)",
+    )
+    parser.add_argument(
+        "--max-turns", type=int, default=200,
+        help="maximum number of turns of a game",
+    )
+    parser.add_argument(
+        "--save", metavar='PATH',
+        help="write the minimized failing case to PATH as JSON",
+    )
+    parser.add_argument(
+        "--replay", metavar='PATH',
+        help="only run the case saved at PATH",
+    )
+    args = parser.parse_args()
+    sys.path.insert(0, os.getcwd())
+    candidate = load_class(args.candidate)
+    start = time.perf_counter()
+    if args.replay:
+        with open(args.replay) as f:
+            d = compare(candidate, Case.from_json(f.read()))
+    else:
+        d = check(candidate, cases=args.cases, seed=args.seed,
+                  workers=args.workers, max_turns=args.max_turns)
+    elapsed = time.perf_counter() - start
+    if d is None:
+        print(f'conforms ({elapsed:.1f} sec)')
+        sys.exit(0)
+    print(d)
+    if args.save:
+        with open(args.save, 'w') as f:
+            f.write(d.case.to_json())
+    sys.exit(1)
@@ -0,0 +1,83 @@
+import submarine_py
+from submarine_py.sprt import SPRT, evaluate
+import logging
+import os
+import sys
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="test whether a new player is stronger than an old one",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "new",
+        help="import path of the new Player subclass, e.g., mybot:MyPlayer",
+    )
+    parser.add_argument(
+        "old",
+        help="import path of the old Player subclass",
+    )
+    parser.add_argument(
+        "--elo0", type=float, default=0,
+        help="elo difference under the null hypothesis",
+    )
+    parser.add_argument(
+        "--elo1", type=float, default=10,
+        help="elo difference under the alternative hypothesis",
+    )
+    parser.add_argument(
+        "--alpha", type=float, default=0.05,
+        help="probability to accept H1 wrongly",
+    )
+    parser.add_argument(
+        "--beta", type=float, default=0.05,
+        help="probability to accept H0 wrongly",
+    )
+    parser.add_argument(
+        "--max-games", type=int, default=10000,
+        help="give up after this number of games",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(),
+        help="number of worker processes (0 to play in this process)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=1,
+        help="seed of the first pair of games",
+    )
+    parser.add_argument(
+        "--field-width", type=int, default=5,
+        help="width of field",
+    )
+    parser.add_argument(
+        "--field-height", type=int, default=5,
+        help="height of field",
+    )
+    parser.add_argument(
+        "--rounded-field", action='store_true',
+        help="configure corners impassable",
+    )
+    args = parser.parse_args()
+    FORMAT = '%(asctime)s %(levelname)s %(message)s'
+    logging.basicConfig(format=FORMAT, level=logging.WARNING, force=True)
+    sys.path.insert(0, os.getcwd())
+    rocks = []
+    if args.rounded_field:
+        rocks = submarine_py.Field.corner_rocks(
+            args.field_height, args.field_width
+        )
+    field = submarine_py.Field(args.field_height, args.field_width, rocks)
+    test = SPRT(args.elo0, args.elo1, args.alpha, args.beta)
+    status = evaluate(args.new, args.old, field, test=test,
+                      max_games=args.max_games, workers=args.workers,
+                      seed=args.seed)
+    elo, margin = test.elo()
+    print(f'{test.games} games (W {test.results[1]} D {test.results[0.5]}'
+          f' L {test.results[0]}), llr {test.llr():.2f}'
+          f' [{test.lower:.2f}, {test.upper:.2f}]')
+    print(f'elo {elo:+.1f} +- {margin:.1f}')
+    print({'H1': 'new is stronger', 'H0': 'new is not stronger',
+           None: 'undecided'}[status])
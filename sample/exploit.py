@@ -0,0 +1,73 @@
+import submarine_py
+from submarine_py.exploit import exploitability
+import logging
+import os
+import sys
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="estimate how much a best response gains against a"
+        " fixed player",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "player",
+        help="import path of the Player subclass, e.g., mybot:MyPlayer",
+    )
+    parser.add_argument(
+        "--games", type=int, default=100,
+        help="number of games, in pairs with seats swapped",
+    )
+    parser.add_argument(
+        "--particles", type=int, default=16,
+        help="number of placements of the policy drawn to value actions",
+    )
+    parser.add_argument(
+        "--samples", type=int, default=16,
+        help="number of calls of action() to estimate its distribution",
+    )
+    parser.add_argument(
+        "--limit", type=int, default=1000,
+        help="number of turns after which a game is drawn",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(),
+        help="number of worker processes (0 to play in this process)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=1,
+        help="seed of the first pair of games",
+    )
+    parser.add_argument(
+        "--field-width", type=int, default=4,
+        help="width of field",
+    )
+    parser.add_argument(
+        "--field-height", type=int, default=4,
+        help="height of field",
+    )
+    parser.add_argument(
+        "--rounded-field", action='store_true',
+        help="configure corners impassable",
+    )
+    args = parser.parse_args()
+    FORMAT = '%(asctime)s %(levelname)s %(message)s'
+    logging.basicConfig(format=FORMAT, level=logging.WARNING, force=True)
+    sys.path.insert(0, os.getcwd())
+    rocks = []
+    if args.rounded_field:
+        rocks = submarine_py.Field.corner_rocks(
+            args.field_height, args.field_width
+        )
+    field = submarine_py.Field(args.field_height, args.field_width, rocks)
+    result = exploitability(args.player, field, games=args.games,
+                            workers=args.workers, seed=args.seed,
+                            particles=args.particles, samples=args.samples,
+                            limit=args.limit)
+    print(f'{result.games} games: best response scores {result.score:.3f},'
+          f' exploitability {result.exploitability:.3f}'
+          f' [{result.low:.3f}, {result.high:.3f}]')
+    print(f'{result.queries} views sampled, {result.cached} found in cache')
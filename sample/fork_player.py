@@ -0,0 +1,94 @@
+import submarine_py
+from submarine_py.forkserver import ForkServer
+import collections
+import logging
+import os
+import sys
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="play games with a player forked from a warm process,"
+        " each game in its own limited child",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "player",
+        help="import path of the Player subclass, e.g., mybot:MyPlayer",
+    )
+    parser.add_argument(
+        "host",
+        help="Hostname of the server, e.g., localhost, or socket path",
+    )
+    parser.add_argument(
+        "port",
+        type=int, nargs='?',
+        help="Port of the server, e.g., 2000 (omit for a Unix-domain socket)",
+    )
+    parser.add_argument(
+        "--games", type=int, default=1,
+        help="number of games to play (should be consistent with server)",
+    )
+    parser.add_argument(
+        "--parallel", type=int, default=1,
+        help="number of games played at a time",
+    )
+    parser.add_argument(
+        "--memory-mb", type=int, default=0,
+        help="address space of each child in MiB (0 for no limit)",
+    )
+    parser.add_argument(
+        "--cpu-seconds", type=int, default=0,
+        help="CPU time of each child in seconds (0 for no limit)",
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=0,
+        help="seconds after which a child is killed (0 for no limit)",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=1,
+        help="seed of the first game, incremented for each game",
+    )
+    parser.add_argument(
+        "--framed", action='store_true',
+        help="use length-prefixed messages (should be consistent with server)",
+    )
+    parser.add_argument(
+        "--field-width", type=int, default=5,
+        help="width of field to warm up the player",
+    )
+    parser.add_argument(
+        "--field-height", type=int, default=5,
+        help="height of field to warm up the player",
+    )
+    parser.add_argument(
+        "--rounded-field", action='store_true',
+        help="configure corners impassable",
+    )
+    args = parser.parse_args()
+    FORMAT = '%(asctime)s %(levelname)s %(message)s'
+    logging.basicConfig(format=FORMAT, level=logging.INFO, force=True)
+    sys.path.insert(0, os.getcwd())
+    rocks = []
+    if args.rounded_field:
+        rocks = submarine_py.Field.corner_rocks(
+            args.field_height, args.field_width
+        )
+    field = submarine_py.Field(args.field_height, args.field_width, rocks)
+    forks = ForkServer(args.player, args.host, args.port, framed=args.framed,
+                       fields=[field], memory=args.memory_mb << 20,
+                       cpu=args.cpu_seconds, timeout=args.timeout,
+                       seed=args.seed)
+    children = forks.run(args.games, parallel=args.parallel)
+    statuses = collections.Counter(c.status for c in children)
+    outcomes = [c.outcome for c in children if c.status == 'ok']
+    print(f'warm-up {forks.warmup * 1000:.1f} ms, fork'
+          f' {sum(c.fork for c in children) / len(children) * 1000:.2f} ms'
+          f' per game on average')
+    print(f'win {outcomes.count(True)}, lose {outcomes.count(False)},'
+          f' draw {outcomes.count(None)}')
+    print(', '.join(f'{n} {status}' for status, n in statuses.items()))
+    if statuses['ok'] < len(children):
+        sys.exit(1)
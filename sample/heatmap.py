@@ -0,0 +1,37 @@
+from submarine_py.analytics import scan, summary
+import os
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="heatmaps of placements and attacks in recorded games",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "logs", nargs='+',
+        help="files written by server.py --record (.gz for gzip)",
+    )
+    parser.add_argument(
+        "--player",
+        help="show only the player of this name",
+    )
+    parser.add_argument(
+        "--bucket", type=int, default=10,
+        help="number of turns in a bucket of hit rates by turn",
+    )
+    parser.add_argument(
+        "--buckets", type=int, default=10,
+        help="number of buckets, the last one takes the rest of turns",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(),
+        help="number of worker processes (0 to read in this process)",
+    )
+    args = parser.parse_args()
+    workers = min(args.workers, len(args.logs)) if args.workers else 0
+    corpus = scan(args.logs, workers=workers, bucket=args.bucket,
+                  buckets=args.buckets)
+    print(f'{corpus.games} games')
+    print(summary(corpus, name=args.player))
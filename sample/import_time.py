@@ -0,0 +1,44 @@
+import statistics
+import subprocess
+import sys
+
+
+def import_time(module: str) -> int:
+    """return cumulative import time of module in microseconds"""
+    out = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, check=True,
+    ).stderr
+    for line in out.splitlines():
+        _, cumulative, name = line.split('|')
+        if name.strip() == module:
+            return int(cumulative)
+    raise RuntimeError(f'{module} not found in -X importtime output')
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="measure startup cost of importing submarine_py",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--module", default='submarine_py',
+        help="module to import",
+    )
+    parser.add_argument(
+        "--runs", type=int, default=10,
+        help="number of fresh interpreters to measure",
+    )
+    parser.add_argument(
+        "--max-ms", type=float, default=0,
+        help="fail if the median exceeds this many milliseconds (0: no limit)",
+    )
+    args = parser.parse_args()
+    times = [import_time(args.module) / 1000 for _ in range(args.runs)]
+    median = statistics.median(times)
+    print(f'import {args.module}: median {median:.1f} ms'
+          f' min {min(times):.1f} ms max {max(times):.1f} ms')
+    if args.max_ms and median > args.max_ms:
+        sys.exit(f'import time regression: {median:.1f} > {args.max_ms} ms')
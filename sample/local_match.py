@@ -0,0 +1,30 @@
+import submarine_py
+from submarine_py.local import local_match
+from submarine_py.random_player import RandomPlayer
+import collections
+import logging
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="play random players against each other in one process",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--games", type=int, default=100,
+        help="number of games",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0,
+        help="Random seed of the players (0 for urandom)",
+    )
+    args = parser.parse_args()
+    FORMAT = '%(asctime)s %(levelname)s %(message)s'
+    logging.basicConfig(format=FORMAT, level=logging.WARNING, force=True)
+    players = [RandomPlayer(args.seed), RandomPlayer(args.seed * 2)]
+    winners = local_match(submarine_py.Field(), players, games=args.games)
+    count = collections.Counter(winners)
+    print(f'player 1 win {count[0]}, player 2 win {count[1]},'
+          f' draw {count[-1]}')
@@ -0,0 +1,97 @@
+import submarine_py
+from submarine_py.local import load_player, make_player
+from submarine_py.profiling import Profiler, play, replay
+import logging
+import os
+import sys
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="measure latency of action() of a player without server",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "player",
+        help="import path of the Player subclass, e.g., mybot:MyPlayer",
+    )
+    parser.add_argument(
+        "--opponent",
+        help="import path of the opponent (default: the player itself)",
+    )
+    parser.add_argument(
+        "--games", type=int, default=20,
+        help="number of games against the opponent",
+    )
+    parser.add_argument(
+        "--replay", nargs='+', metavar='LOG',
+        help="replay games written by server.py --record instead"
+        " (.gz for gzip)",
+    )
+    parser.add_argument(
+        "--name", action='append',
+        help="with --replay, take only the seats of players of this name",
+    )
+    parser.add_argument(
+        "--seed", type=int, default=1,
+        help="seed of the player, and seed + 1 of the opponent",
+    )
+    parser.add_argument(
+        "--opening", type=int, default=10,
+        help="number of actions of a player counted as the opening",
+    )
+    parser.add_argument(
+        "--slowest", type=int, default=3,
+        help="number of the slowest calls to show",
+    )
+    parser.add_argument(
+        "--cprofile", action='store_true',
+        help="show profiles of the slowest calls by cProfile",
+    )
+    parser.add_argument(
+        "--tracemalloc", action='store_true',
+        help="show memory allocated in the slowest calls",
+    )
+    parser.add_argument(
+        "--budget-ms", type=float, default=0,
+        help="fail if any action takes longer (0: no limit)",
+    )
+    parser.add_argument(
+        "--field-width", type=int, default=5,
+        help="width of field",
+    )
+    parser.add_argument(
+        "--field-height", type=int, default=5,
+        help="height of field",
+    )
+    parser.add_argument(
+        "--rounded-field", action='store_true',
+        help="configure corners impassable",
+    )
+    args = parser.parse_args()
+    FORMAT = '%(asctime)s %(levelname)s %(message)s'
+    logging.basicConfig(format=FORMAT, level=logging.WARNING, force=True)
+    sys.path.insert(0, os.getcwd())
+    player = make_player(load_player(args.player), args.seed)
+    profiler = Profiler(opening=args.opening, keep=args.slowest,
+                        cprofile=args.cprofile, memory=args.tracemalloc)
+    if args.replay:
+        replay(profiler, player, args.replay, names=args.name)
+    else:
+        rocks = []
+        if args.rounded_field:
+            rocks = submarine_py.Field.corner_rocks(
+                args.field_height, args.field_width
+            )
+        field = submarine_py.Field(args.field_height, args.field_width,
+                                   rocks)
+        opponent = make_player(load_player(args.opponent or args.player),
+                               args.seed + 1)
+        play(profiler, player, opponent, field, args.games)
+    print(profiler.report())
+    if args.budget_ms:
+        over = profiler.over(args.budget_ms / 1000)
+        if over:
+            sys.exit(f'{over} action(s) over {args.budget_ms} ms')
@@ -1,46 +1,13 @@
-from submarine_py import Player, play_game
-import json
-import random
+from submarine_py import play_session
+from submarine_py.random_player import RandomPlayer
 import logging
 
 
-class RandomPlayer(Player):
-    def __init__(self, seed=0):
-        super().__init__()
-        self.rng = random.Random(seed or None)
-
-    def name(self):
-        return 'random-player'
-
-    def place_ship(self):
-        '''初期配置を非復元抽出でランダムに決める．'''
-        ps = self.rng.sample(self.field.squares, 3)
-        return {'w': ps[0], 'c': ps[1], 's': ps[2]}
-
-    def action(self):
-        """移動か攻撃かランダムに決める．
-        どれがどこへ移動するか，あるいはどこに攻撃するかもランダム．
-        """
-        act = self.rng.choice(["move", "attack"])
-
-        if act == "move":
-            ship = self.rng.choice(list(self.ships.values()))
-            to = self.rng.choice(self.field.squares)
-            while not ship.is_reachable(to) or not self.overlap(to) is None:
-                to = self.rng.choice(self.field.squares)
-
-            return json.dumps(self.move(ship.type, to))
-        elif act == "attack":
-            to = self.rng.choice(self.field.squares)
-            while not self.in_attack_range(to):
-                to = self.rng.choice(self.field.squares)
-
-            return json.dumps(self.attack(to))
-
-
-def main(host, port, seed=0):
+def main(host, port, seed=0, framed=False, games=1):
     player = RandomPlayer(seed)
-    play_game(host, port, player)
+    outcomes = play_session(host, port, player, games, framed=framed)
+    logging.info(f'win {outcomes.count(True)}, lose {outcomes.count(False)},'
+                 f' draw {outcomes.count(None)}')
 
 
 if __name__ == '__main__':
@@ -52,12 +19,12 @@ if __name__ == '__main__':
     )
     parser.add_argument(
         "host",
-        help="Hostname of the server, e.g., localhost",
+        help="Hostname of the server, e.g., localhost, or socket path",
     )
     parser.add_argument(
         "port",
-        type=int,
-        help="Port of the server, e.g., 2000",
+        type=int, nargs='?',
+        help="Port of the server, e.g., 2000 (omit for a Unix-domain socket)",
     )
     parser.add_argument(
         "--seed", type=int, default=0,
@@ -71,10 +38,14 @@ if __name__ == '__main__':
         "--games", type=int, default=1,
         help="number of games to play (should be consistent with server)",
     )
+    parser.add_argument(
+        "--framed", action='store_true',
+        help="use length-prefixed messages (should be consistent with server)",
+    )
     args = parser.parse_args()
     FORMAT = '%(asctime)s %(levelname)s %(message)s'
     level = logging.DEBUG if args.verbose else logging.INFO
     logging.basicConfig(format=FORMAT, level=level, force=True)
 
-    for _ in range(args.games):
-        main(args.host, args.port, seed=args.seed)
+    main(args.host, args.port, seed=args.seed, framed=args.framed,
+         games=args.games)
@@ -1,4 +1,10 @@
 import submarine_py
+from submarine_py.tracing import Tracer, Recorder
+from submarine_py.results import ResultStore
+from submarine_py.analytics import GameLog
+from submarine_py.checkpoint import Checkpointer
+from submarine_py.local import load_player, make_player
+from submarine_py.server import Adjudication
 import logging
 
 
@@ -17,10 +23,18 @@ if __name__ == '__main__':
         "--port", type=int, default=2000,
         help="port number to listen, e.g., 2000",
     )
+    parser.add_argument(
+        "--unix", metavar='PATH',
+        help="listen on a Unix-domain socket at PATH instead of TCP",
+    )
     parser.add_argument(
         "--games", type=int, default=1,
         help="number of games",
     )
+    parser.add_argument(
+        "--workers", type=int, default=0,
+        help="number of worker processes running games (0 to play in turn)",
+    )
     parser.add_argument(
         "--quiet", action='store_true',
         help="run quietly",
@@ -29,6 +43,64 @@ if __name__ == '__main__':
         "--verbose", action='store_true',
         help="show messages received from or sent to clients",
     )
+    parser.add_argument(
+        "--framed", action='store_true',
+        help="use length-prefixed messages (clients must agree)",
+    )
+    parser.add_argument(
+        "--snapshot", type=int, default=0, metavar='N',
+        help="send changes of ships only, with a full observation every"
+        " N turns (0 to always send full observations)",
+    )
+    parser.add_argument(
+        "--draw-repetition", type=int, default=0, metavar='N',
+        help="declare a draw when the same position occurs N times"
+        " (0 to disable)",
+    )
+    parser.add_argument(
+        "--draw-no-progress", type=int, default=0, metavar='K',
+        help="declare a draw when no ship loses HP in K turns"
+        " (0 to disable)",
+    )
+    parser.add_argument(
+        "--turn-limit", type=int, default=10000, metavar='N',
+        help="declare a draw after N turns",
+    )
+    parser.add_argument(
+        "--trace-last", type=int, default=0, metavar='N',
+        help="dump events of the last N turns if a game fails"
+        " (only with --workers 0)",
+    )
+    parser.add_argument(
+        "--db", metavar='PATH',
+        help="record results in an SQLite database at PATH",
+    )
+    parser.add_argument(
+        "--record", metavar='PATH',
+        help="append games to PATH as JSON lines, for heatmap.py",
+    )
+    parser.add_argument(
+        "--checkpoint", metavar='PATH',
+        help="save progress of the run to PATH (the game in play is saved"
+        " only with --workers 0)",
+    )
+    parser.add_argument(
+        "--checkpoint-interval", type=float, default=1.0, metavar='SEC',
+        help="minimum seconds between writes of the checkpoint",
+    )
+    parser.add_argument(
+        "--resume", action='store_true',
+        help="continue the run saved by --checkpoint, if any",
+    )
+    parser.add_argument(
+        "--house", metavar='MODULE:CLASS',
+        help="play one seat of each game by a Player subclass in the server"
+        " (only with --workers 0)",
+    )
+    parser.add_argument(
+        "--house-seed", type=int, default=0,
+        help="seed given to the house player if it takes one",
+    )
     parser.add_argument(
         "--field-width", type=int, default=5,
         help="width of field",
@@ -42,21 +114,66 @@ if __name__ == '__main__':
         help="configure corners impassablea",
     )
     args = parser.parse_args()
+    if args.trace_last > 0 and args.workers > 0:
+        # games in workers send events to copies of the recorder
+        parser.error('--trace-last cannot be used with --workers')
+    if args.house and args.workers > 0:
+        # each game in a worker would get a fresh copy of the house player
+        parser.error('--house cannot be used with --workers')
     FORMAT = '%(asctime)s %(levelname)s %(message)s'
     log_level = logging.DEBUG if args.verbose else logging.INFO
     logging.basicConfig(format=FORMAT, level=log_level, force=True)
     rocks = []
     if args.rounded_field:
-        rocks = [
-            [x, y]
-            for x in [0, args.field_width - 1]
-            for y in [0, args.field_height - 1]
-        ]
+        rocks = submarine_py.Field.corner_rocks(
+            args.field_height, args.field_width
+        )
         logging.debug(f'{rocks}')
     field = submarine_py.Field(args.field_height, args.field_width, rocks)
     logging.debug(f'field is\n{field.to_ascii()}')
-    submarine_py.server_main(
-        args.host, args.port, args.games,
-        field,
-        quiet=args.quiet
-    )
+    host, port = (args.unix, None) if args.unix else (args.host, args.port)
+    tracer, recorder = Tracer(), None
+    if args.trace_last > 0:
+        recorder = Recorder(args.trace_last)
+        tracer.subscribe(recorder)
+    if args.record:
+        tracer.subscribe(GameLog(args.record))
+    store = ResultStore(args.db) if args.db else None
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = Checkpointer(args.checkpoint, resume=args.resume,
+                                  interval=args.checkpoint_interval,
+                                  store=store)
+        if checkpoint.interrupted:
+            logging.info('game interrupted at time'
+                         f' {checkpoint.interrupted["time"]} is played again')
+        if args.workers == 0:
+            tracer.subscribe(checkpoint)
+    house = None
+    if args.house:
+        house = make_player(load_player(args.house), args.house_seed)
+    try:
+        submarine_py.server_main(
+            host, port, args.games,
+            field,
+            quiet=args.quiet,
+            framed=args.framed,
+            workers=args.workers,
+            tracer=tracer,
+            store=store,
+            house=house,
+            snapshot=args.snapshot,
+            checkpoint=checkpoint,
+            adjudication=Adjudication(args.draw_repetition,
+                                      args.draw_no_progress,
+                                      args.turn_limit),
+        )
+    except (Exception, SystemExit):
+        if recorder:
+            recorder.dump()
+        raise
+    finally:
+        if store:
+            store.close()
+        if checkpoint:
+            checkpoint.close()
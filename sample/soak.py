@@ -0,0 +1,102 @@
+import submarine_py
+from submarine_py.server import Adjudication
+from submarine_py.soak import Monitor, Thresholds, soak
+import logging
+import sys
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="run the server against synthetic clients for long,"
+        " and fail if its memory, open files or latency grow",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--games", type=int, default=1000,
+        help="number of games to play",
+    )
+    parser.add_argument(
+        "--hours", type=float, default=0,
+        help="hours to play, in rounds, instead of --games if > 0",
+    )
+    parser.add_argument(
+        "--round", type=int, default=100,
+        help="number of games of each run of the server",
+    )
+    parser.add_argument(
+        "--every", type=int, default=50,
+        help="number of games between samples",
+    )
+    parser.add_argument(
+        "--warmup", type=int, default=20,
+        help="number of games before the first sample, compared with later",
+    )
+    parser.add_argument(
+        "--top", type=int, default=10,
+        help="number of allocations grown most to show",
+    )
+    parser.add_argument(
+        "--max-rss-mb", type=float, default=64,
+        help="growth of resident memory allowed in MiB",
+    )
+    parser.add_argument(
+        "--max-fds", type=int, default=0,
+        help="growth of open file descriptors allowed",
+    )
+    parser.add_argument(
+        "--max-traced-mb", type=float, default=16,
+        help="growth of memory traced by tracemalloc allowed in MiB",
+    )
+    parser.add_argument(
+        "--max-drift", type=float, default=0.5,
+        help="relative growth of time per turn allowed",
+    )
+    parser.add_argument(
+        "--turn-limit", type=int, default=10000, metavar='N',
+        help="declare a draw after N turns",
+    )
+    parser.add_argument(
+        "--framed", action='store_true',
+        help="use length-prefixed messages",
+    )
+    parser.add_argument(
+        "--snapshot", type=int, default=0, metavar='N',
+        help="send deltas with a full observation every N turns (0: off)",
+    )
+    parser.add_argument(
+        "--field-width", type=int, default=5,
+        help="width of field",
+    )
+    parser.add_argument(
+        "--field-height", type=int, default=5,
+        help="height of field",
+    )
+    parser.add_argument(
+        "--rounded-field", action='store_true',
+        help="configure corners impassable",
+    )
+    args = parser.parse_args()
+    FORMAT = '%(asctime)s %(levelname)s %(message)s'
+    logging.basicConfig(format=FORMAT, level=logging.WARNING, force=True)
+    rocks = []
+    if args.rounded_field:
+        rocks = submarine_py.Field.corner_rocks(
+            args.field_height, args.field_width
+        )
+    field = submarine_py.Field(args.field_height, args.field_width, rocks)
+    monitor = Monitor(every=args.every, warmup=args.warmup, top=args.top)
+    played = soak(field, monitor, games=args.games, hours=args.hours,
+                  round=args.round, framed=args.framed,
+                  snapshot=args.snapshot,
+                  adjudication=Adjudication(limit=args.turn_limit))
+    print(f'{played} games')
+    print(monitor.report())
+    failures = monitor.check(Thresholds(
+        int(args.max_rss_mb * 2**20), args.max_fds,
+        int(args.max_traced_mb * 2**20), args.max_drift))
+    for failure in failures:
+        print(f'FAILED: {failure}')
+    if failures:
+        sys.exit(1)
@@ -1,6 +1,6 @@
 from .ship import Ship
-from .player_base import Player, play_game
-from .server import server_main, Client
+from .player_base import Player, play_game, play_session
+from .game import Client, GameControl
 from .field import Field, Reporter
 from .protocol import Protocol
 
@@ -8,9 +8,19 @@ __all__ = [
     'Field', 'Ship',
     'Player',
     'Reporter',
-    'Protocol', 'play_game',
+    'Protocol', 'play_game', 'play_session',
     # for sample/server.py
     'server_main',
     # for internal tests
-    'Client'
+    'Client',
+    # for search
+    'GameControl',
 ]
+
+
+def __getattr__(name):
+    # networking is loaded on first use to keep the game core light
+    if name == 'server_main':
+        from .server import server_main
+        return server_main
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
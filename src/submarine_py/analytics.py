@@ -0,0 +1,279 @@
+"""Heatmaps of placements and attacks over recorded games.
+
+GameLog is a tracing subscriber that appends each game as one JSON line::
+
+    {"field": {"height": 5, "width": 5, "rock": []},
+     "names": ["alice", "bob"],
+     "placements": [{"w": [0, 0], ...}, {...}],
+     "turns": [[0, {"attack": {"to": [1, 1]}},
+                {"attacked": {"position": [1, 1], "near": ["c"]}}], ...],
+     "winner": 0}
+
+where each turn is [player, action, "result" sent to the opponent].
+scan() reads such files, in parallel across files, and counts per square,
+for each field layout and player name, where ships are placed and where
+attacks, hits and near reports happen.  Attack counts are also split by
+turn into a fixed number of buckets, so memory does not grow with the
+number of games.
+"""
+from .ship import Ship
+import array
+import collections
+import concurrent.futures
+import gzip
+import json
+
+KINDS = ('attack', 'hit', 'near')
+SHADES = ' .:-=+*#%@'
+
+
+class GameLog:
+    """Append each game to path as a JSON line
+
+    A line is written at once in append mode, so that workers of
+    server_main() can share one file.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.record = None
+
+    def on_game_start(self, event):
+        self.record = {
+            'field': json.loads(event.game.field.to_json()),
+            'names': event.names,
+            'placements': event.placements,
+            'turns': [],
+        }
+
+    def on_action(self, event):
+        if self.record is not None:
+            self.record['turns'].append(
+                [event.player, json.loads(event.action)]
+            )
+
+    def on_result(self, event):
+        if self.record is not None and self.record['turns']:
+            msg = json.loads(event.results[1])
+            self.record['turns'][-1].append(msg.get('result'))
+
+    def on_game_end(self, event):
+        if self.record is None:
+            return
+        self.record['winner'] = event.winner
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(self.record) + '\n')
+        self.record = None
+
+
+def zeros(n):
+    return array.array('q', [0]) * n
+
+
+class Heatmaps:
+    """Counts per square of one player on one field layout
+
+    Squares are numbered y * width + x.  placement[type] counts initial
+    positions of each ship type, and turns[kind][b] counts attacks
+    (kind 'attack'), attacks that hit ('hit') and that were reported near
+    a ship ('near') in turns of bucket b, where a bucket is bucket turns
+    of the game and the last one takes the rest.
+    """
+    def __init__(self, width, height, *, bucket=10, buckets=10):
+        self.width, self.height = width, height
+        self.bucket, self.buckets = bucket, buckets
+        self.games = 0
+        self.wins = 0
+        n = width * height
+        self.placement = {type: zeros(n) for type in Ship.MAX_HPS}
+        self.turns = {kind: [zeros(n) for _ in range(buckets)]
+                      for kind in KINDS}
+
+    def square(self, position):
+        x, y = position
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return y * self.width + x
+        return None
+
+    def add_placement(self, placement: dict):
+        for type, position in placement.items():
+            i = self.square(position)
+            if i is not None and type in self.placement:
+                self.placement[type][i] += 1
+
+    def add_attack(self, time, result):
+        """count an attack at time (1 for the first action of the game)"""
+        if not result:
+            return
+        i = self.square(result['position'])
+        if i is None:
+            return
+        b = min((time - 1) // self.bucket, self.buckets - 1)
+        self.turns['attack'][b][i] += 1
+        if 'hit' in result:
+            self.turns['hit'][b][i] += 1
+        if result.get('near'):
+            self.turns['near'][b][i] += 1
+
+    def total(self, kind):
+        """counts of kind summed over all turns"""
+        grid = zeros(self.width * self.height)
+        for counts in self.turns[kind]:
+            for i, v in enumerate(counts):
+                grid[i] += v
+        return grid
+
+    def placements(self):
+        """counts of all ship types"""
+        grid = zeros(self.width * self.height)
+        for counts in self.placement.values():
+            for i, v in enumerate(counts):
+                grid[i] += v
+        return grid
+
+    def merge(self, other: 'Heatmaps'):
+        self.games += other.games
+        self.wins += other.wins
+        for type, counts in other.placement.items():
+            add_to(self.placement[type], counts)
+        for kind in KINDS:
+            for mine, theirs in zip(self.turns[kind], other.turns[kind]):
+                add_to(mine, theirs)
+
+
+def add_to(a, b):
+    for i, v in enumerate(b):
+        a[i] += v
+
+
+def field_key(field: dict):
+    """same as Field.key, without making a Field"""
+    return (field['height'], field['width'],
+            tuple(sorted(tuple(p) for p in field['rock'])))
+
+
+class Corpus:
+    """Heatmaps for each (field key, player name)"""
+    def __init__(self, *, bucket=10, buckets=10):
+        self.bucket, self.buckets = bucket, buckets
+        self.maps = {}
+        self.games = 0
+
+    def heatmaps(self, key, name) -> Heatmaps:
+        maps = self.maps.get((key, name))
+        if maps is None:
+            height, width, _ = key
+            maps = Heatmaps(width, height, bucket=self.bucket,
+                            buckets=self.buckets)
+            self.maps[key, name] = maps
+        return maps
+
+    def add(self, record: dict):
+        """count a game in the format written by GameLog"""
+        key = field_key(record['field'])
+        players = [self.heatmaps(key, name) for name in record['names']]
+        for c, maps in enumerate(players):
+            maps.games += 1
+            maps.wins += record.get('winner') == c
+            maps.add_placement(record['placements'][c])
+        for time, (c, action, *result) in enumerate(record['turns'], 1):
+            if 'attack' in action and result and result[0]:
+                players[c].add_attack(time, result[0].get('attacked'))
+        self.games += 1
+
+    def merge(self, other: 'Corpus'):
+        self.games += other.games
+        for (key, name), maps in other.maps.items():
+            self.heatmaps(key, name).merge(maps)
+
+
+def open_log(path):
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt')
+    return open(path)
+
+
+def scan_file(path, bucket=10, buckets=10) -> Corpus:
+    corpus = Corpus(bucket=bucket, buckets=buckets)
+    with open_log(path) as f:
+        for line in f:
+            if line.strip():
+                corpus.add(json.loads(line))
+    return corpus
+
+
+def scan(paths, *, workers=0, bucket=10, buckets=10) -> Corpus:
+    """read game logs (.gz for gzip) and return the merged Corpus
+
+    Files are read in a pool of workers processes, or in this process
+    if 0.
+    """
+    corpus = Corpus(bucket=bucket, buckets=buckets)
+    if workers == 0:
+        for path in paths:
+            corpus.merge(scan_file(path, bucket, buckets))
+        return corpus
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        futures = [pool.submit(scan_file, path, bucket, buckets)
+                   for path in paths]
+        for future in concurrent.futures.as_completed(futures):
+            corpus.merge(future.result())
+    return corpus
+
+
+def render(grid, width, height) -> list:
+    """return lines drawing grid with SHADES scaled to its maximum
+
+    >>> render([0, 1, 2, 9], 2, 2)
+    ['| .|', '|:@|']
+    """
+    top = max(grid) or 1
+    scale = len(SHADES) - 1
+    return [
+        '|' + ''.join(SHADES[max(1, v * scale // top)] if v else ' '
+                      for v in grid[y * width:(y + 1) * width]) + '|'
+        for y in range(height)
+    ]
+
+
+def summary(corpus: Corpus, *, name=None) -> str:
+    """text report of each (layout, player), or of player name only"""
+    out = []
+    for (key, player), maps in sorted(corpus.maps.items(),
+                                      key=lambda item: -item[1].games):
+        if name is not None and player != name:
+            continue
+        height, width, rock = key
+        attack, hit, near = (maps.total(kind) for kind in KINDS)
+        attacks, hits = sum(attack), sum(hit)
+        rate = hits / attacks if attacks else 0.0
+        out.append(f'{player} on {width}x{height}'
+                   f'{" with %d rocks" % len(rock) if rock else ""}:'
+                   f' {maps.games} games, {maps.wins} wins,'
+                   f' {attacks} attacks, hit rate {rate:.3f}')
+        grids = [('placement', maps.placements()), ('attack', attack),
+                 ('hit', hit), ('near', near)]
+        columns = [render(grid, width, height) for _, grid in grids]
+        out.append('  '.join(label.ljust(width + 2) for label, _ in grids))
+        for row in zip(*columns):
+            out.append('  '.join(row))
+        by_turn = [sum(counts) for counts in maps.turns['attack']]
+        hit_by_turn = [sum(counts) for counts in maps.turns['hit']]
+        out.append('most hit: ' + ', '.join(
+            f'{p} {v}' for v, p in top_squares(hit, width) if v
+        ))
+        out.append('hit rate by turn: ' + ' '.join(
+            f'{h / a:.2f}' if a else '-'
+            for a, h in zip(by_turn, hit_by_turn)
+        ))
+        out.append('')
+    return '\n'.join(out)
+
+
+def top_squares(grid, width, n=5):
+    """return [(count, [x, y])] of the n largest counts
+
+    >>> top_squares([0, 3, 1, 2], 2, n=2)
+    [(3, [1, 0]), (2, [1, 1])]
+    """
+    best = collections.Counter(dict(enumerate(grid))).most_common(n)
+    return [(v, [i % width, i // width]) for i, v in best]
@@ -0,0 +1,152 @@
+"""Batch evaluations requested by players of many concurrent games.
+
+A neural network player typically turns its state into an observation and
+evaluates a model on it in action().  When many games run at once (e.g.,
+several local_match() calls in threads, or async clients), a shared
+BatchScheduler collects these observations and evaluates them together::
+
+    scheduler = BatchScheduler(model.predict_batch, max_batch=64)
+
+    class NetPlayer(Player):
+        def action(self):
+            policy = scheduler(encode(self))   # blocks until evaluated
+            ...
+
+Async code can ``await scheduler.evaluate_async(x)`` instead.
+"""
+import asyncio
+import collections
+import concurrent.futures
+import dataclasses
+import threading
+import time
+
+
+@dataclasses.dataclass
+class BatchStats:
+    batches: int = 0
+    requests: int = 0
+    max_batch: int = 1
+    total_delay: float = 0.0    #: sum of seconds spent waiting in queue
+    max_delay: float = 0.0
+
+    @property
+    def fill_rate(self) -> float:
+        """average batch size relative to the maximum"""
+        if self.batches == 0:
+            return 0.0
+        return self.requests / (self.batches * self.max_batch)
+
+    @property
+    def mean_delay(self) -> float:
+        return self.total_delay / self.requests if self.requests else 0.0
+
+
+class BatchScheduler:
+    """Evaluate submitted inputs in batches on a background thread
+
+    evaluate(inputs) must return a list of outputs of the same length.
+    A batch starts when max_batch inputs are waiting or when the oldest one
+    has waited max_latency seconds.
+
+    >>> with BatchScheduler(lambda xs: [x * 2 for x in xs]) as scheduler:
+    ...     scheduler(21)
+    42
+    """
+    def __init__(self, evaluate, *, max_batch=32, max_latency=0.002):
+        self.evaluate = evaluate
+        self.max_batch = max_batch
+        self.max_latency = max_latency
+        self.stats = BatchStats(max_batch=max_batch)
+        self.queue = collections.deque()
+        self.cond = threading.Condition()
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def submit(self, x) -> concurrent.futures.Future:
+        """queue an input and return a future of its output"""
+        future = concurrent.futures.Future()
+        with self.cond:
+            if self.closed:
+                raise RuntimeError('scheduler is closed')
+            self.queue.append((time.perf_counter(), x, future))
+            if len(self.queue) == 1 or len(self.queue) >= self.max_batch:
+                self.cond.notify()
+        return future
+
+    def __call__(self, x):
+        return self.submit(x).result()
+
+    async def evaluate_async(self, x):
+        return await asyncio.wrap_future(self.submit(x))
+
+    def next_batch(self):
+        with self.cond:
+            while not self.queue and not self.closed:
+                self.cond.wait()
+            if self.closed and not self.queue:
+                return None
+            deadline = self.queue[0][0] + self.max_latency
+            while len(self.queue) < self.max_batch and not self.closed:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                self.cond.wait(timeout)
+            n = min(len(self.queue), self.max_batch)
+            batch = [self.queue.popleft() for _ in range(n)]
+        # drop futures cancelled by their callers, e.g., by asyncio.wait_for()
+        return [item for item in batch
+                if item[2].set_running_or_notify_cancel()]
+
+    def run(self):
+        while True:
+            batch = self.next_batch()
+            if batch is None:
+                return
+            if not batch:
+                continue
+            now = time.perf_counter()
+            delays = [now - queued for queued, _, _ in batch]
+            self.stats.batches += 1
+            self.stats.requests += len(batch)
+            self.stats.total_delay += sum(delays)
+            self.stats.max_delay = max(self.stats.max_delay, max(delays))
+            try:
+                outputs = self.evaluate([x for _, x, _ in batch])
+                if len(outputs) != len(batch):
+                    raise ValueError(f'{len(outputs)} outputs'
+                                     f' for {len(batch)} inputs')
+            except BaseException as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                if isinstance(e, Exception):
+                    continue
+                # e.g., KeyboardInterrupt: stop without leaving anyone waiting
+                self.abort(e)
+                return
+            for (_, _, future), output in zip(batch, outputs):
+                future.set_result(output)
+
+    def abort(self, e):
+        """fail queued inputs with e and refuse new ones"""
+        with self.cond:
+            self.closed = True
+            queued = list(self.queue)
+            self.queue.clear()
+        for _, _, future in queued:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(e)
+
+    def close(self):
+        """evaluate what is queued and stop the background thread"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
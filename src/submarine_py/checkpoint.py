@@ -0,0 +1,213 @@
+"""Checkpoints of a long server run, to resume after a crash or restart.
+
+A checkpoint is one small JSON file::
+
+    {"version": 1, "saved": 1700000000.0, "done": 120,
+     "win_count": {"alice@127.0.0.1": 70, ...},
+     "in_flight": {"names": [...], "field": {...}, "time": 31, "turn": 1,
+                   "reason": null,
+                   "fleets": [{"types": ["w", "c", "s"],
+                               "ships": [["w", 0, 0, 3], ...]}, ...]}}
+
+done and win_count cover finished games.  in_flight is the state of the
+game being played, if any, taken from the tracer events of server_main()
+when it plays games itself (workers == 0).  An interrupted game cannot be
+continued, as its clients are gone, so a resumed run plays it again from
+the start; restore_game() rebuilds its GameControl for inspection.
+"""
+from .field import Field
+from .game import Client, GameControl
+import json
+import os
+import threading
+import time
+
+VERSION = 1
+
+
+def snapshot_game(game: GameControl) -> dict:
+    """compact state of a game: ships as [type, x, y, hp] of each fleet"""
+    return {
+        'field': json.loads(game.field.to_json()),
+        'time': game.time,
+        'turn': game.turn,
+        'reason': game.reason,
+        'fleets': [
+            {'types': client.types,
+             'ships': [[ship.type, *ship.position, ship.hp]
+                       for ship in client.ships.values()]}
+            for client in game.clients
+        ],
+    }
+
+
+def restore_game(data: dict, tracer=None) -> GameControl:
+    """return a GameControl in the state given by snapshot_game()"""
+    field = Field.from_json(json.dumps(data['field']))
+    game = GameControl(field, tracer)
+    game.clients = []
+    for side, fleet in enumerate(data['fleets']):
+        positions = {type: [x, y] for type, x, y, _ in fleet['ships']}
+        client = Client(field, positions, side=side)
+        for type, _, _, hp in fleet['ships']:
+            client.ships[type].hp = hp
+        client.types = fleet['types']
+        client.rank = {type: i for i, type in enumerate(client.types)}
+        client.hash = client.keys.fleet(side, client.ships.values())
+        game.clients.append(client)
+    game.time = data['time']
+    game.turn = data['turn']
+    game.reason = data['reason']
+    return game
+
+
+def write_atomic(path, data: dict):
+    """replace path with data, so that a crash leaves the old or new file"""
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load(path) -> dict:
+    with open(path) as f:
+        data = json.load(f)
+    if data.get('version') != VERSION:
+        raise ValueError(f'unknown checkpoint version {data.get("version")}')
+    return data
+
+
+class Checkpointer:
+    """Save the progress of server_main() to path in a background thread
+
+    finished() is called by server_main() after each game.  As a tracing
+    subscriber, it also takes the state of the game in play.  Saving
+    only hands a small dict to the writer thread, which writes the latest
+    one at most once per interval seconds, so turns are not delayed by
+    disk writes.  close() writes what is pending.
+
+    If store (results.ResultStore) is given, finished() games are only
+    counted when the store writes them: the state with them is written
+    just before each transaction of the store.  A crash thus loses no
+    recorded game, as games the store has not received are played again,
+    and a resumed run does not record games twice, unless it stops
+    within a transaction.  The store must be flushed in the thread
+    calling finished().
+
+    If resume and path exists, done and win_count start from the saved
+    values, and interrupted holds the in-flight game at that time.
+    """
+    def __init__(self, path, *, resume=False, interval=1.0, store=None):
+        self.path = path
+        self.interval = interval
+        self.done = 0
+        self.win_count = {}
+        self.interrupted = None
+        self.store = store
+        if resume and os.path.exists(path):
+            data = load(path)
+            self.done = data['done']
+            self.win_count = data['win_count']
+            self.interrupted = data['in_flight']
+        self.game = None
+        self.names = None
+        self.last = 0.0
+        self.writes = 0
+        self.pending = None
+        self.latest = None
+        self.seq = 0
+        self.written = 0
+        self.closed = False
+        self.cond = threading.Condition()
+        self.lock = threading.Lock()    # for writes and written
+        self.staged = None      # (done, win_count) not yet in the store
+        if store is not None:
+            store.before_flush = self.commit
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def state(self, in_flight=None) -> dict:
+        return {'version': VERSION, 'saved': time.time(), 'done': self.done,
+                'win_count': dict(self.win_count), 'in_flight': in_flight}
+
+    def submit(self, state):
+        with self.cond:
+            self.seq += 1
+            self.pending = self.latest = (self.seq, state)
+            self.cond.notify()
+
+    def write(self, item):
+        """write (seq, state) unless a later one has been written"""
+        seq, state = item
+        with self.lock:
+            if seq <= self.written:
+                return
+            write_atomic(self.path, state)
+            self.written = seq
+            self.writes += 1
+
+    def write_latest(self):
+        """write the latest state now, in the calling thread"""
+        with self.cond:
+            item = self.latest
+        if item is not None:
+            self.write(item)
+
+    def finished(self, win_count):
+        """count a finished game and save win_count (a Counter)
+
+        With a store, they are saved by commit() when the store writes
+        the game.
+        """
+        done = (self.staged or (self.done,))[0] + 1
+        if self.store is not None:
+            self.staged = done, dict(win_count)
+            return
+        self.done = done
+        self.win_count = dict(win_count)
+        self.submit(self.state())
+
+    def commit(self):
+        """write the games staged by finished() now, as the store is
+        about to write them"""
+        if self.staged is not None:
+            (self.done, self.win_count), self.staged = self.staged, None
+            self.submit(self.state())
+        self.write_latest()
+
+    def on_game_start(self, event):
+        self.game = event.game
+        self.names = event.names
+
+    def on_result(self, event):
+        now = time.monotonic()
+        if self.game is None or now - self.last < self.interval:
+            return
+        self.last = now
+        in_flight = snapshot_game(self.game)
+        in_flight['names'] = self.names
+        self.submit(self.state(in_flight))
+
+    def on_game_end(self, event):
+        self.game = None
+
+    def run(self):
+        while True:
+            with self.cond:
+                while self.pending is None and not self.closed:
+                    self.cond.wait()
+                if self.pending is None:
+                    return
+                item, self.pending = self.pending, None
+            self.write(item)
+            with self.cond:
+                # let later states replace each other during the interval
+                self.cond.wait_for(lambda: self.closed, self.interval)
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify()
+        self.thread.join()
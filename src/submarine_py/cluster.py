@@ -0,0 +1,274 @@
+"""Matches played by workers on many hosts, pulling jobs from a coordinator.
+
+The coordinator holds a queue of jobs, each one game between two Player
+subclasses given by import path, on a field, with a seed.  Workers
+connect over TCP (or a Unix-domain socket), and repeat: take a job,
+play it in their own process as house_match() would, and send the result
+back.  Messages are JSON lines over transport.Transport::
+
+    worker      {"hello": name}
+    coordinator {"job": {...}}, {"wait": seconds} or {"done": true}
+    worker      {"result": {...}}, {"failed": {...}} or {"ready": true}
+    ...
+
+A job is leased to one worker at a time.  If the connection of the
+worker is lost, the job fails in the worker, or no result comes within
+lease seconds, the job is queued again, up to retries times.  The first
+result of a job is taken and later ones are ignored.
+
+A worker plays one game at a time and the coordinator only moves small
+messages, so throughput grows with the number of workers, one per core
+of each host.
+"""
+from .field import Field
+from .house import HouseSeat
+from .local import load_player, make_player
+from .server import Adjudication, GameResult, greet, play_game
+from .transport import Transport, connect, listen
+import collections
+import itertools
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import typing
+
+
+class Job(typing.NamedTuple):
+    """a game to play: players are import paths in seat order"""
+    id: int
+    players: list
+    field: str                  #: Field.to_json()
+    seed: int
+    adjudication: tuple = tuple(Adjudication())
+
+
+def league(players, field: Field, games: int, *, seed=1,
+           adjudication=Adjudication()) -> list:
+    """jobs of games games for each pair of players, swapping seats
+
+    >>> jobs = league(['a:A', 'b:B', 'c:C'], Field(), 2)
+    >>> len(jobs), jobs[1].players, jobs[1].seed
+    (6, ['b:B', 'a:A'], 1)
+    """
+    jobs = []
+    for a, b in itertools.combinations(players, 2):
+        for g in range(games):
+            pair = [a, b] if g % 2 == 0 else [b, a]
+            jobs.append(Job(len(jobs), pair, field.to_json(), seed + g // 2,
+                            tuple(adjudication)))
+    return jobs
+
+
+def run_job(job: Job) -> dict:
+    """play job in this process and return GameResult as a dict"""
+    field = Field.from_json(job.field)
+    players = [make_player(load_player(spec), job.seed)
+               for spec in job.players]
+    clients = [greet(HouseSeat(player)) for player in players]
+    result = play_game(field, clients, quiet=True,
+                       adjudication=Adjudication(*job.adjudication))
+    return {'id': job.id, **result._asdict()}
+
+
+def game_result(result: dict) -> GameResult:
+    return GameResult(**{key: result[key] for key in GameResult._fields})
+
+
+class Coordinator:
+    """Lease jobs to workers and collect their results
+
+    on_result(job, result) is called for each job finished, with result
+    a dict of the fields of GameResult, one call at a time.
+    """
+    def __init__(self, jobs, *, lease=600.0, retries=3, poll=0.5,
+                 on_result=None):
+        self.jobs = {job.id: job for job in jobs}
+        self.queue = collections.deque(self.jobs.values())
+        self.lease_time = lease
+        self.retries = retries
+        self.poll = poll
+        self.on_result = on_result
+        self.leases = {}        # job id -> (worker, deadline)
+        self.attempts = collections.Counter()
+        self.results = {}       # job id -> result
+        self.failed = {}        # job id -> Job given up
+        self.workers = itertools.count()
+        self.cond = threading.Condition()
+
+    def finished(self) -> bool:
+        return len(self.results) + len(self.failed) == len(self.jobs)
+
+    def lease(self, worker):
+        """return the next job for worker, or None if none is queued"""
+        with self.cond:
+            self.expire()
+            if not self.queue:
+                return None
+            job = self.queue.popleft()
+            self.attempts[job.id] += 1
+            self.leases[job.id] = worker, time.monotonic() + self.lease_time
+            return job
+
+    def expire(self):
+        now = time.monotonic()
+        for id, (worker, deadline) in list(self.leases.items()):
+            if deadline < now:
+                self.retry(id, f'no result from {worker} in time')
+
+    def retry(self, id, why):
+        """queue job id again, or give up after retries attempts"""
+        del self.leases[id]
+        job = self.jobs[id]
+        if self.attempts[id] > self.retries:
+            logging.error(f'job {id} given up: {why}')
+            self.failed[id] = job
+        else:
+            logging.warning(f'job {id} queued again: {why}')
+            self.queue.appendleft(job)
+
+    def complete(self, worker, result: dict):
+        with self.cond:
+            id = result['id']
+            if id in self.results or id not in self.jobs:
+                return
+            self.results[id] = result
+            if id in self.leases:
+                del self.leases[id]
+            elif id in self.failed:
+                del self.failed[id]
+            elif self.jobs[id] in self.queue:
+                # a late result of a job queued again
+                self.queue.remove(self.jobs[id])
+            if self.on_result:
+                self.on_result(self.jobs[id], result)
+
+    def fail(self, worker, id, error):
+        with self.cond:
+            if self.leases.get(id, (None,))[0] == worker:
+                self.retry(id, f'{error} in {worker}')
+
+    def lost(self, worker):
+        with self.cond:
+            for id, (holder, _) in list(self.leases.items()):
+                if holder == worker:
+                    self.retry(id, f'{worker} lost')
+
+    def reply(self, worker) -> dict:
+        job = self.lease(worker)
+        if job is not None:
+            return {'job': job._asdict()}
+        with self.cond:
+            if self.finished():
+                return {'done': True}
+        return {'wait': self.poll}
+
+    def serve(self, sock, addr):
+        """talk with a worker connected on sock until it leaves"""
+        transport = Transport(sock)
+        worker = f'worker {next(self.workers)} from {addr or "local"}'
+        try:
+            hello = json.loads(transport.readline() or '{}')
+            worker = f'{hello.get("hello")} ({worker})'
+            logging.info(f'{worker} joined')
+            while True:
+                reply = self.reply(worker)
+                transport.send(json.dumps(reply))
+                if 'done' in reply:
+                    break
+                msg = transport.readline()
+                if not msg:
+                    break
+                data = json.loads(msg)
+                if 'result' in data:
+                    self.complete(worker, data['result'])
+                elif 'failed' in data:
+                    self.fail(worker, data['failed']['id'],
+                              data['failed']['error'])
+        except (OSError, ValueError) as e:
+            logging.warning(f'{worker}: {e!r}')
+        finally:
+            self.lost(worker)
+            transport.close()
+
+    def run(self, host: str, port) -> dict:
+        """serve workers at (host, port) until all jobs end, and return
+        the results by job id
+
+        If port is None, host is the path of a Unix-domain socket.
+        """
+        threads = []
+        with listen(host, port) as s:
+            try:
+                s.settimeout(self.poll)
+                while True:
+                    with self.cond:
+                        self.expire()
+                        if self.finished():
+                            break
+                    try:
+                        sock, addr = s.accept()
+                    except socket.timeout:
+                        continue
+                    sock.settimeout(None)
+                    thread = threading.Thread(target=self.serve,
+                                              args=(sock, addr), daemon=True)
+                    thread.start()
+                    threads.append(thread)
+            finally:
+                if port is None:
+                    os.unlink(host)
+        for thread in threads:
+            # each worker is told it is done at its next request
+            thread.join(2 * self.poll + 1)
+        return self.results
+
+
+def worker_main(host: str, port, *, name=None, wait=30.0) -> int:
+    """play jobs of the coordinator at (host, port) until it is done, and
+    return the number of jobs played
+
+    Connecting is retried for wait seconds, so that workers may start
+    before the coordinator.
+    """
+    name = name or f'{socket.gethostname()}:{os.getpid()}'
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            sock = connect(host, port)
+            break
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+    played = 0
+    transport = Transport(sock)
+    try:
+        transport.send(json.dumps({'hello': name}))
+        while True:
+            msg = transport.readline()
+            if not msg:
+                logging.warning('coordinator lost')
+                break
+            data = json.loads(msg)
+            if 'job' in data:
+                job = Job(**data['job'])
+                try:
+                    result = run_job(job)
+                except Exception as e:
+                    logging.exception(f'job {job.id} failed')
+                    transport.send(json.dumps(
+                        {'failed': {'id': job.id, 'error': repr(e)}}))
+                    continue
+                transport.send(json.dumps({'result': result}))
+                played += 1
+            elif 'wait' in data:
+                time.sleep(data['wait'])
+                transport.send(json.dumps({'ready': True}))
+            else:
+                break
+    finally:
+        transport.close()
+    return played
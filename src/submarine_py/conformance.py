@@ -0,0 +1,305 @@
+"""Differential testing of game engines against GameControl.
+
+A candidate engine is a class constructed with a Field and having the
+methods of GameControl used by the server: initialize(json1, json2),
+initial_condition(c) and action(c, json_msg), and the attribute reason.
+Random games, with placements and actions chosen to hit the corners of
+the rules (near lists, sinking, rocks, illegal actions), are run through
+GameControl and the candidate in lockstep.  Their messages are compared
+as JSON after each step, as well as reason and the type of any
+exception raised.
+
+>>> check(GameControl, cases=20) is None
+True
+"""
+from .field import Field
+from .game import GameControl, NEIGHBORHOOD
+from .ship import Ship
+import concurrent.futures
+import json
+import random
+import typing
+
+
+class Case(typing.NamedTuple):
+    """a reproducible game: field, placements of both players and actions
+
+    actions[i] is made by player i % 2, as in the server.
+    """
+    field: Field
+    placements: list
+    actions: list
+
+    def to_json(self) -> str:
+        return json.dumps({'field': json.loads(self.field.to_json()),
+                           'placements': self.placements,
+                           'actions': self.actions})
+
+    @staticmethod
+    def from_json(msg):
+        data = json.loads(msg)
+        return Case(Field.from_json(json.dumps(data['field'])),
+                    data['placements'], data['actions'])
+
+
+class Divergence(typing.NamedTuple):
+    """first step where the candidate differs; turn 0 is initialize()"""
+    turn: int
+    case: Case
+    expected: typing.Any
+    actual: typing.Any
+
+    def __str__(self):
+        what = ('initialize' if self.turn == 0
+                else self.case.actions[self.turn - 1])
+        return (f'diverged at turn {self.turn} ({what})\n'
+                f'  expected: {self.expected}\n'
+                f'  actual:   {self.actual}\n'
+                f'  case: {self.case.to_json()}')
+
+
+def outcome(f, *args):
+    """return what f(*args) returns, or the name of the exception raised"""
+    try:
+        return f(*args)
+    except Exception as e:
+        return ('error', type(e).__name__)
+
+
+def start(engine, placements):
+    def run():
+        engine.initialize(*placements)
+        return engine.initial_condition(0)
+    return outcome(run)
+
+
+def act(engine, c, msg):
+    def run():
+        return engine.action(c, msg), engine.reason
+    return outcome(run)
+
+
+def parsed(value):
+    """value with JSON strings in it decoded"""
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    if isinstance(value, (list, tuple)):
+        return [parsed(v) for v in value]
+    return value
+
+
+def same(expected, actual) -> bool:
+    # most steps produce identical strings; parse only when they do not
+    return expected == actual or parsed(expected) == parsed(actual)
+
+
+def finished(result) -> bool:
+    """whether the game ends (or fails) after a step of the reference"""
+    return result[0] == 'error' or 'outcome' in json.loads(result[0][0])
+
+
+class Lockstep:
+    """the reference and a candidate engine playing the same case"""
+    def __init__(self, candidate, field: Field, placements):
+        self.reference = GameControl(field)
+        self.candidate = candidate(field)
+        self.case = Case(field, placements, [])
+        self.expected = start(self.reference, placements)
+        self.actual = start(self.candidate, placements)
+        self.over = self.expected[0] == 'error'
+
+    def divergence(self):
+        if not same(self.expected, self.actual):
+            return Divergence(len(self.case.actions), self.case,
+                              self.expected, self.actual)
+        return None
+
+    def step(self, msg):
+        c = len(self.case.actions) % 2
+        self.case.actions.append(msg)
+        self.expected = act(self.reference, c, msg)
+        self.actual = act(self.candidate, c, msg)
+        self.over = finished(self.expected)
+        return self.divergence()
+
+
+def compare(candidate, case: Case):
+    """replay case and return the first Divergence, or None"""
+    run = Lockstep(candidate, case.field, case.placements)
+    d = run.divergence()
+    if d:
+        return d
+    for msg in case.actions:
+        if run.over:
+            break
+        d = run.step(msg)
+        if d:
+            return d
+    return None
+
+
+def random_field(rng) -> Field:
+    while True:
+        h, w = rng.randint(1, 7), rng.randint(1, 7)
+        r = rng.random()
+        if r < 0.5:
+            rock = []
+        elif r < 0.7:
+            rock = Field.corner_rocks(h, w)
+        else:
+            rock = [[x, y] for x in range(w) for y in range(h)
+                    if rng.random() < 0.2]
+        field = Field(h, w, rock)
+        if len(field.squares) >= 3:
+            return field
+
+
+def random_placement(rng, field: Field) -> dict:
+    types = list(Ship.MAX_HPS)
+    rng.shuffle(types)      # order of near lists follows placement
+    cells = rng.sample(field.squares, len(types))
+    placement = dict(zip(types, cells))
+    r = rng.random()
+    if r < 0.01:
+        placement[types[0]] = list(cells[1])            # overlap
+    elif r < 0.02:
+        placement[types[0]] = [rng.randint(-1, field.width),
+                               rng.randint(-1, field.height)]
+    elif r < 0.03:
+        del placement[types[0]]
+    return placement
+
+
+def random_action(rng, game: GameControl) -> dict:
+    """an action of the player to move: mostly legal, sometimes not"""
+    field = game.field
+    me = game.clients[game.turn]
+    you = game.clients[1 - game.turn]
+    ships = list(me.ships.values())
+    r = rng.random()
+    if r < 0.97:
+        targets = [s.position for s in you.ships.values()
+                   if me.in_attack_range(s.position)]
+        if targets and rng.random() < 0.3:
+            return {"attack": {"to": list(rng.choice(targets))}}
+        if rng.random() < 0.5:
+            x, y = rng.choice(ships).position
+            around = [[x + dx, y + dy] for dx, dy in NEIGHBORHOOD
+                      if field.passable([x + dx, y + dy])]
+            return {"attack": {"to": rng.choice(around)}}
+        ship = rng.choice(ships)
+        x, y = ship.position
+        moves = [p for p in field.squares
+                 if (p[0] == x) != (p[1] == y) and not me.overlap(p)]
+        if moves:
+            return {"move": {"ship": ship.type, "to": rng.choice(moves)}}
+    r = rng.random()
+    if r < 0.5:
+        # anywhere, including rocks, off the field, diagonal moves
+        to = [rng.randint(-1, field.width), rng.randint(-1, field.height)]
+        if rng.random() < 0.5:
+            return {"attack": {"to": to}}
+        return {"move": {"ship": rng.choice(ships).type, "to": to}}
+    if r < 0.8 and len(ships) > 1:
+        # onto another ship
+        a, b = rng.sample(ships, 2)
+        return {"move": {"ship": a.type, "to": list(b.position)}}
+    # a ship already sunk, or not placed
+    lost = [t for t in Ship.MAX_HPS if t not in me.ships] or ['s']
+    return {"move": {"ship": rng.choice(lost), "to": [0, 0]}}
+
+
+def explore(candidate, seed: int, max_turns=200):
+    """play a random case and return its first Divergence, or None"""
+    rng = random.Random(seed)
+    field = random_field(rng)
+    placements = [json.dumps(random_placement(rng, field)) for _ in range(2)]
+    run = Lockstep(candidate, field, placements)
+    d = run.divergence()
+    if d:
+        return d
+    for _ in range(max_turns):
+        if run.over:
+            break
+        d = run.step(json.dumps(random_action(rng, run.reference)))
+        if d:
+            return d
+    return None
+
+
+def minimize(candidate, d: Divergence) -> Divergence:
+    """shorten the case of d while the candidate still diverges
+
+    Chunks of actions are removed as in delta debugging, then ships of
+    each placement one by one.  If the candidate does not diverge again
+    on the same case (it is not deterministic), d is returned as it is.
+    """
+    case = d.case._replace(actions=d.case.actions[:d.turn])
+    best = compare(candidate, case)
+    if best is None:
+        return d
+    n = 2
+    while len(best.case.actions) >= 2:
+        actions = best.case.actions
+        size = max(len(actions) // n, 1)
+        for i in range(0, len(actions), size):
+            smaller = compare(candidate, best.case._replace(
+                actions=actions[:i] + actions[i + size:]))
+            if smaller:
+                best = smaller
+                n = max(n - 1, 2)
+                break
+        else:
+            if size == 1:
+                break
+            n = min(n * 2, len(actions))
+    for p in range(2):
+        for type in list(json.loads(best.case.placements[p])):
+            placements = list(best.case.placements)
+            placement = json.loads(placements[p])
+            del placement[type]
+            if not placement:
+                continue
+            placements[p] = json.dumps(placement)
+            smaller = compare(candidate,
+                              best.case._replace(placements=placements))
+            if smaller:
+                best = smaller
+    return best
+
+
+def explore_range(candidate, seeds, max_turns):
+    for seed in seeds:
+        d = explore(candidate, seed, max_turns)
+        if d:
+            return seed, d
+    return None
+
+
+def check(candidate, *, cases=10000, seed=0, workers=0, max_turns=200,
+          chunk=500):
+    """explore cases with seeds from seed, and return the minimized
+    Divergence of the first failing one, or None if all conform
+
+    With workers > 0, chunks of seeds are explored in a process pool;
+    candidate must then be importable by the workers.
+    """
+    seeds = range(seed, seed + cases)
+    if workers == 0:
+        found = explore_range(candidate, seeds, max_turns)
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            futures = [
+                pool.submit(explore_range, candidate,
+                            seeds[i:i + chunk], max_turns)
+                for i in range(0, len(seeds), chunk)
+            ]
+            # keep the smallest failing seed, so results are reproducible
+            found = next(filter(None, (f.result() for f in futures)), None)
+            pool.shutdown(cancel_futures=True)
+    if found is None:
+        return None
+    return minimize(candidate, found[1])
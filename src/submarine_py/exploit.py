@@ -0,0 +1,326 @@
+"""How exploitable a fixed Player policy is, by an approximate best response.
+
+The policy is a Player subclass taken to decide from its current view:
+the field, its ships, the HP of the opponent and the last message
+(self.last_msg), as the sample players do.  Policy estimates the
+distribution of action() in a view by calling it samples times, with
+self.rng (if it is a random.Random) reseeded each time, and caches it by
+the view.
+
+BestResponse plays against the policy knowing it, but not where its ships
+are.  Its belief is the set of placements of the fleet of the policy that
+agree with every result observed so far, each kept in step with the game
+by the rules: a placement is dropped if an attack of BestResponse would
+give another result, if the policy could not attack the square it
+attacked, or if it could not make the move reported.  Each placement is
+weighted by how often place_ship() of the policy draws it, and all of
+them start in the belief if there are at most configs of them, or else
+only those drawn.  How likely the policy was to take its actions is not
+used, so the belief is exact for the rules but not the posterior.
+
+For each action, BestResponse values it in particles placements drawn
+from the belief, averaged over the replies of the policy, where a value is
+the outcome or the balance of HP, and takes the best.  This is one ply of
+lookahead, so it is weaker than the true best response and
+exploitability is underestimated.
+
+exploitability() plays pairs of games with seats swapped, in a process
+pool, and reports the mean score of BestResponse less 0.5 with a 95%
+confidence interval.  Sampling replaces vectorised dynamic programming,
+as the package does not depend on numpy.
+"""
+from .field import Field
+from .game import Client, GameControl
+from .local import house_match, load_player, make_player
+from .player_base import Player
+from .server import Adjudication
+from .ship import Ship
+import collections
+import concurrent.futures
+import itertools
+import json
+import math
+import random
+import typing
+
+MAX_HP = sum(Ship.MAX_HPS.values())
+
+
+class Policy:
+    """action() distribution of a Player subclass, cached by view"""
+    def __init__(self, cls, field: Field, *, samples=16, draws=256, seed=0):
+        self.cls = cls
+        self.field = field
+        self.samples = samples
+        self.draws = draws
+        self.rng = random.Random(seed)
+        self.player = make_player(cls, seed)
+        self.player.initialize(field)
+        self.drawn = None
+        self.priors = {}
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def placement(self) -> tuple:
+        """a placement drawn from place_ship(), as positions by type"""
+        player = make_player(self.cls, self.rng.randrange(2 ** 32))
+        player.initialize(self.field)
+        return tuple(tuple(player.ships[type].position)
+                     for type in Ship.MAX_HPS)
+
+    def prior(self, side, configs=20000) -> list:
+        """[(weight, Client)] of the placements of the policy in side
+
+        All placements are taken if there are at most configs of them,
+        weighted by 1 + the times each is drawn in draws placement(), or
+        else only those drawn.
+        """
+        if side not in self.priors:
+            if self.drawn is None:
+                self.drawn = collections.Counter(
+                    self.placement() for _ in range(self.draws))
+            n = len(Ship.MAX_HPS)
+            squares = [tuple(p) for p in self.field.squares]
+            if math.perm(len(squares), n) <= configs:
+                keys = itertools.permutations(squares, n)
+            else:
+                keys = list(self.drawn)
+            self.priors[side] = [
+                (1 + self.drawn[key],
+                 Client(self.field, dict(zip(Ship.MAX_HPS, map(list, key))),
+                        side=side))
+                for key in keys]
+        return [(weight, fleet.clone()) for weight, fleet in self.priors[side]]
+
+    def distribution(self, game: GameControl, c, last) -> list:
+        """[(probability, action)] of the policy in seat c of game, with
+        last (str or None) the last message it received
+        """
+        me, you = game.clients[c], game.clients[1 - c]
+        key = (tuple((s.type, tuple(s.position), s.hp)
+                     for s in me.ships.values()),
+               tuple((s.type, s.hp) for s in you.ships.values()), last)
+        dist = self.cache.get(key)
+        if dist is not None:
+            self.hits += 1
+            return dist
+        self.misses += 1
+        player = self.player
+        counts = collections.Counter()
+        for k in range(self.samples):
+            player.ships = {}
+            for s in me.ships.values():
+                player.ships[s.type] = Ship(s.type, list(s.position))
+                player.ships[s.type].hp = s.hp
+            player.opponent = {s.type: s.hp for s in you.ships.values()}
+            player.last_msg = json.loads(last) if last else None
+            if isinstance(getattr(player, 'rng', None), random.Random):
+                player.rng.seed(k)
+            counts[player.action()] += 1
+        dist = [(n / self.samples, json.loads(act))
+                for act, n in counts.items()]
+        self.cache[key] = dist
+        return dist
+
+
+def score(game: GameControl, seat) -> float:
+    """1 if seat has won, 0 if lost, or by the balance of HP"""
+    mine, theirs = (sum(s.hp for s in client.ships.values())
+                    for client in (game.clients[seat], game.clients[1 - seat]))
+    if not mine:
+        return 0.0
+    if not theirs:
+        return 1.0
+    return 0.5 + 0.5 * (mine - theirs) / MAX_HP
+
+
+def agrees(fleet: Client, result: dict, mine: bool) -> bool:
+    """whether fleet, the hidden fleet of the policy, gives result of an
+    action of this player (mine) or of the policy, updating fleet
+    """
+    if 'attacked' in result:
+        info = result['attacked']
+        if not info:
+            return True
+        if not mine:
+            return fleet.in_attack_range(info['position'])
+        got = fleet.attacked(info['position'])
+        return (got.get('hit') == info.get('hit')
+                and sorted(got['near']) == sorted(info['near']))
+    moved = result.get('moved')
+    if moved:
+        ship = fleet.ships.get(moved['ship'])
+        if ship is None:
+            return False
+        (x, y), (dx, dy) = ship.position, moved['distance']
+        return bool(fleet.move(ship.type, [x + dx, y + dy]))
+    return True
+
+
+class BestResponse(Player):
+    """Play against policy, keeping the placements of its fleet that agree
+    with the game so far
+    """
+    def __init__(self, policy: Policy, *, particles=16, configs=20000,
+                 seed=0):
+        super().__init__()
+        self.policy = policy
+        self.particles = particles
+        self.configs = configs
+        self.rng = random.Random(seed)
+        self.belief = None      # [(weight, Client)]
+        self.seat = None
+
+    def name(self):
+        return 'best-response'
+
+    def place_ship(self):
+        ps = self.rng.sample(self.field.squares, len(Ship.MAX_HPS))
+        return dict(zip(Ship.MAX_HPS, ps))
+
+    def on_game_start(self, field):
+        self.belief = None
+
+    def start(self, seat):
+        self.seat = seat
+        self.belief = self.policy.prior(1 - seat, self.configs)
+
+    def update(self, json_, info):
+        super().update(json_, info)
+        mine = info == 'your turn'
+        if self.belief is None:
+            self.start(1)
+        result = self.last_msg.get('result', {})
+        self.belief = [(weight, fleet) for weight, fleet in self.belief
+                       if agrees(fleet, result, mine)]
+
+    def games(self) -> list:
+        """[(weight, GameControl)] of at most particles placements drawn
+        from the belief, with this player to move
+        """
+        belief = self.belief
+        if len(belief) > self.particles:
+            chosen = self.rng.choices(belief, [w for w, _ in belief],
+                                      k=self.particles)
+            belief = [(1, fleet) for _, fleet in chosen]
+        mine = Client(self.field, {type: ship.position
+                                   for type, ship in self.ships.items()},
+                      side=self.seat)
+        for type, ship in self.ships.items():
+            mine.ships[type].hp = ship.hp
+        games = []
+        for weight, fleet in belief:
+            game = GameControl(self.field)
+            game.clients = [mine.clone(), fleet.clone()]
+            if self.seat == 1:
+                game.clients.reverse()
+            game.turn = self.seat
+            games.append((weight, game))
+        return games
+
+    def value(self, act, games) -> float:
+        """act valued over games and the replies of the policy"""
+        msg = json.dumps(act)
+        total = 0.0
+        for weight, game in games:
+            game = game.clone()
+            results = game.action(self.seat, msg)
+            outcome = json.loads(results[0]).get('outcome')
+            if outcome is not None:
+                total += weight * float(outcome)
+                continue
+            value = 0.0
+            for prob, reply in self.policy.distribution(
+                    game, 1 - self.seat, results[1]):
+                record = game.apply(reply)
+                value += prob * (score(game, self.seat) if record[1] else 1.0)
+                game.undo(record)
+            total += weight * value
+        return total / sum(weight for weight, _ in games)
+
+    def action(self):
+        if self.belief is None:
+            self.start(0)
+        games = self.games()
+        if games:
+            acts = games[0][1].legal_actions()
+            self.rng.shuffle(acts)
+            best = max(acts, key=lambda act: self.value(act, games))
+        else:
+            # a placement out of the belief, if only drawn ones are kept
+            x, y = self.rng.choice([s.position for s in self.ships.values()])
+            best = self.attack([x, y])
+        return json.dumps(best)
+
+
+class Estimate(typing.NamedTuple):
+    """exploitability with its 95% confidence interval"""
+    games: int
+    score: float                #: mean score of BestResponse
+    exploitability: float       #: score - 0.5
+    low: float
+    high: float
+    queries: int                #: views whose distribution was sampled
+    cached: int                 #: views found in the cache
+
+
+POLICIES = {}                   # policies of each worker process
+
+
+def play_pair(spec, field, seed, particles, samples, limit):
+    """play BestResponse against spec in both seats; return the scores and
+    the numbers of queries and cache hits of Policy
+    """
+    key = spec, field.key, samples
+    if key not in POLICIES:
+        POLICIES[key] = Policy(load_player(spec), field, samples=samples,
+                               seed=seed)
+    policy = POLICIES[key]
+    queries, cached = policy.misses, policy.hits
+    scores = []
+    for seat in (0, 1):
+        players = [BestResponse(policy, particles=particles, seed=seed),
+                   make_player(policy.cls, seed)]
+        if seat == 1:
+            players.reverse()
+        winner, = house_match(field, players,
+                              adjudication=Adjudication(limit=limit))
+        scores.append(0.5 if winner == -1 else float(winner == seat))
+    return scores, policy.misses - queries, policy.hits - cached
+
+
+def estimate(scores, queries=0, cached=0) -> Estimate:
+    """
+    >>> estimate([1, 1, 0.5, 1]).exploitability
+    0.375
+    """
+    n = len(scores)
+    mean = sum(scores) / n
+    var = sum((s - mean) ** 2 for s in scores) / (n - 1) if n > 1 else 0.25
+    margin = 1.96 * math.sqrt(var / n)
+    return Estimate(n, mean, mean - 0.5, max(mean - 0.5 - margin, -0.5),
+                    min(mean - 0.5 + margin, 0.5), queries, cached)
+
+
+def exploitability(spec: str, field: Field, *, games=100, workers=0,
+                   seed=1, particles=16, samples=16, limit=1000) -> Estimate:
+    """estimate how much BestResponse gains against the Player subclass
+    named by spec (module:Class) in games games, limit turns each
+
+    Pairs of games run in a pool of workers processes, or in this
+    process if 0; each process keeps its own cache of the policy.
+    """
+    args = (particles, samples, limit)
+    seeds = range(seed, seed + max(games // 2, 1))
+    if workers == 0:
+        results = [play_pair(spec, field, s, *args) for s in seeds]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(play_pair, spec, field, s, *args)
+                       for s in seeds]
+            results = [future.result() for future in
+                       concurrent.futures.as_completed(futures)]
+    scores = [score for pair, _, _ in results for score in pair]
+    return estimate(scores, sum(q for _, q, _ in results),
+                    sum(c for _, _, c in results))
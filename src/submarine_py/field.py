@@ -1,5 +1,4 @@
 import json
-import tabulate
 
 
 class Field:
@@ -15,6 +14,7 @@ class Field:
             [i, j] for i in range(self.w_size) for j in range(self.h_size)
             if [i, j] not in rock
         ]
+        self.cells = {tuple(p) for p in self.positions}
 
     @property
     def width(self):
@@ -46,6 +46,16 @@ class Field:
         """
         return self.positions
 
+    @property
+    def key(self):
+        """return hashable value identifying the layout of the field
+
+        >>> Field(2, 3, [[2, 1], [0, 0]]).key
+        (2, 3, ((0, 0), (2, 1)))
+        """
+        return (self.h_size, self.w_size,
+                tuple(sorted(tuple(p) for p in self.rock)))
+
     def passable(self, position):
         """与えられた座標に船を移動/配置可能である．
 
@@ -58,7 +68,10 @@ class Field:
         >>> field_with_rock_at_zerozero.passable([0, 0])
         False
         """
-        return position in self.positions
+        try:
+            return tuple(position) in self.cells
+        except TypeError:
+            return False
 
     def to_ascii(self):
         '''return ascii representation for handy printing
@@ -82,6 +95,15 @@ class Field:
             rep.append(line)
         return '\n'.join(rep)
 
+    @staticmethod
+    def corner_rocks(height, width):
+        """return rocks at the four corners, for a rounded field
+
+        >>> Field.corner_rocks(3, 2)
+        [[0, 0], [0, 2], [1, 0], [1, 2]]
+        """
+        return [[x, y] for x in [0, width - 1] for y in [0, height - 1]]
+
     def to_json(self):
         return json.dumps({
             'height': self.height,
@@ -134,6 +156,7 @@ class Reporter:
 
     def make_view(field, fleets, attacked) -> str:
         """convert field to string"""
+        import tabulate
         ascii = field.to_ascii().replace('_', ' ')
         table = [list(line) for line in ascii.split('\n')]
         if attacked:
@@ -0,0 +1,177 @@
+"""Players forked from a warm parent process, one child per game.
+
+Starting a new Python process for each game imports submarine_py, the
+player module and whatever it loads (models, tables) again.  ForkServer
+does that once: it imports a Player subclass, makes a player and warms it
+up by on_session_start() and initialize() on the given fields, so that
+caches kept by Field.key are ready.  Each game is then played by a child
+made by os.fork(), which shares the warm memory copy-on-write, connects
+to the server and plays one game as play_game() does, then exits.
+
+Children run with resource limits, so that a misbehaving player only
+ends its own game:
+
+- memory: bytes of address space (RLIMIT_AS); allocations beyond it fail
+  with MemoryError
+- cpu: seconds of CPU time (RLIMIT_CPU); the child is killed by SIGXCPU
+- timeout: seconds of wall-clock time; the parent kills the child
+
+The outcome of a child is passed back as its exit status.  Fork is only
+safe from a process without other threads, and only on Unix.
+"""
+from .field import Field
+from .local import load_player, make_player
+from .player_base import Player, play_on
+from .transport import Transport, connect
+import logging
+import os
+import random
+import resource
+import signal
+import sys
+import time
+import typing
+
+EXIT_CODES = {True: 0, False: 1, None: 2}
+OUTCOME_OF = {code: outcome for outcome, code in EXIT_CODES.items()}
+FAILED = 3
+
+
+class Child(typing.NamedTuple):
+    """a game played by a forked child"""
+    pid: int
+    seed: int
+    status: str                 #: 'ok', 'failed', 'timeout' or 'killed by ..'
+    outcome: typing.Optional[bool]
+    fork: float                 #: seconds taken by os.fork() in the parent
+    seconds: float              #: wall-clock seconds until the child ended
+    cpu: float                  #: CPU seconds of the child
+    maxrss: int                 #: peak resident memory of the child in KiB
+
+
+def set_limits(memory=None, cpu=None):
+    """limit the address space to memory bytes and CPU time to cpu
+    seconds of this process"""
+    if memory:
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    if cpu:
+        # the soft limit sends SIGXCPU, the hard one a second later SIGKILL
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+
+
+def reseed(player: Player, seed: int):
+    """give a forked player its own random numbers"""
+    random.seed(seed)
+    if isinstance(getattr(player, 'rng', None), random.Random):
+        player.rng.seed(seed)
+
+
+class ForkServer:
+    """Fork a child per game from a warm player
+
+    player is a Player, or a Player subclass or its import path
+    'module:Class', made by make_player(cls, seed).  Children play at
+    (host, port) of the server, a Unix-domain socket if port is None.
+    """
+    def __init__(self, player, host: str, port=None, *, framed=False,
+                 fields=(Field(),), memory=None, cpu=None, timeout=None,
+                 seed=1):
+        if isinstance(player, str):
+            player = load_player(player)
+        if isinstance(player, type):
+            player = make_player(player, seed)
+        self.player = player
+        self.host = host
+        self.port = port
+        self.framed = framed
+        self.memory = memory
+        self.cpu = cpu
+        self.timeout = timeout
+        self.seed = seed
+        self.running = {}       # pid -> (seed, fork seconds, start)
+        self.children = []
+        start = time.perf_counter()
+        player.on_session_start()
+        for field in fields:
+            player.initialize(field)
+        self.warmup = time.perf_counter() - start
+
+    def child(self, seed):
+        """play one game in a forked child, and never return"""
+        code = FAILED
+        try:
+            set_limits(self.memory, self.cpu)
+            reseed(self.player, seed)
+            with connect(self.host, self.port) as sock:
+                transport = Transport(sock, framed=self.framed)
+                code = EXIT_CODES[play_on(transport, self.player,
+                                          quiet=True)]
+        except BaseException:
+            logging.exception(f'player {os.getpid()} failed')
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def spawn(self, seed) -> int:
+        """fork a child to play a game with seed, and return its pid"""
+        start = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            self.child(seed)
+        self.running[pid] = seed, time.perf_counter() - start, start
+        return pid
+
+    def reap(self, block=True) -> list:
+        """collect children that have ended, killing those past timeout;
+        return the Child records collected
+        """
+        done = []
+        while self.running:
+            now = time.perf_counter()
+            for pid, (_, _, start) in self.running.items():
+                if self.timeout and now - start > self.timeout:
+                    os.kill(pid, signal.SIGKILL)
+            for pid in list(self.running):
+                waited, status, usage = os.wait4(pid, os.WNOHANG)
+                if waited:
+                    done.append(self.ended(pid, status, usage))
+            if done or not block:
+                break
+            time.sleep(0.001)
+        self.children += done
+        return done
+
+    def ended(self, pid, status, usage) -> Child:
+        seed, fork, start = self.running.pop(pid)
+        seconds = time.perf_counter() - start
+        outcome = None
+        if os.WIFSIGNALED(status):
+            sig = os.WTERMSIG(status)
+            if sig == signal.SIGKILL and self.timeout \
+               and seconds > self.timeout:
+                result = 'timeout'
+            else:
+                result = f'killed by {signal.Signals(sig).name}'
+        elif os.WEXITSTATUS(status) in OUTCOME_OF:
+            result = 'ok'
+            outcome = OUTCOME_OF[os.WEXITSTATUS(status)]
+        else:
+            result = 'failed'
+        if result != 'ok':
+            logging.warning(f'player {pid} (seed {seed}): {result}')
+        return Child(pid, seed, result, outcome, fork, seconds,
+                     usage.ru_utime + usage.ru_stime, usage.ru_maxrss)
+
+    def run(self, games: int, *, parallel=1) -> list:
+        """play games games, at most parallel at a time, and return the
+        Child records in the order they ended
+        """
+        start = len(self.children)
+        for g in range(games):
+            while len(self.running) >= parallel:
+                self.reap()
+            self.spawn(self.seed + g)
+        while self.running:
+            self.reap()
+        return self.children[start:]
@@ -0,0 +1,343 @@
+from .ship import Ship
+from .field import Field
+from .zobrist import keys_of
+import json
+
+NEIGHBORHOOD = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+
+class Client:
+    """プレイヤーを表すクラスである．艦を複数保持している．"""
+
+    def __init__(self, field: Field, positions, side=0):
+        """艦種ごとに座標を与えられるので，Shipオブジェクトを作成し，連想配列に加える．
+        艦のtypeがkeyになる．
+
+        座標から艦を引く索引 self.index も併せて作る．
+        self.hash は艦隊の Zobrist hash で，side (先手 0，後手 1) ごとに異なる鍵を使う．
+        """
+        self.ships = {}
+        self.index = {}
+        self.field = field
+        self.side = side
+        self.keys = keys_of(field)
+        self.types = list(positions)
+        self.rank = {type: i for i, type in enumerate(self.types)}
+        for type, position in positions.items():
+            if not self.field.passable(position):
+                raise ValueError(f"position {position} out of field")
+            if self.overlap(position):
+                raise ValueError("overlapping positions")
+            self.ships[type] = Ship(type, position)
+            self.index[tuple(position)] = self.ships[type]
+        self.hash = self.keys.fleet(side, self.ships.values())
+
+    def move(self, type, to):
+        """艦が座標に移動可能か確かめてから移動させる．相手プレイヤーに渡す情報を連想配列で返す．
+
+        反則の場合は False を返す
+        """
+        ship = self.ships[type]
+
+        if not ship or not self.field.passable(to) \
+           or not ship.is_reachable(to) or self.overlap(to):
+            return False
+
+        offset = [to[0] - ship.position[0], to[1] - ship.position[1]]
+        self.move_ship(ship, to)
+        return {"ship": type, "distance": offset}
+
+    def move_ship(self, ship, to):
+        """索引を更新しつつ艦の座標を変更する．移動の可否は確かめない．"""
+        del self.index[tuple(ship.position)]
+        self.hash ^= self.keys.ship(self.side, ship)
+        ship.move_to(to)
+        self.hash ^= self.keys.ship(self.side, ship)
+        self.index[tuple(to)] = ship
+
+    def attacked(self, to):
+        """攻撃された時の処理．攻撃を受けた艦，あるいは周囲1マスにいる艦を調べ，状態を更新する．
+        相手プレイヤーに渡す情報を連想配列で返す．
+        """
+        if not self.field.passable(to):
+            return False
+
+        info = {"position": to}
+        near = self.near(to)
+        ship = self.hit(to)
+
+        if ship:
+            info["hit"] = ship.type
+
+        info["near"] = [s.type for s in near]
+        return info
+
+    def hit(self, to):
+        """与えられた座標にいる艦にダメージを与え，その艦を返す．いなければ None を返す．
+        HPが0になった艦は取り除く．
+        """
+        ship = self.overlap(to)
+        if ship:
+            self.hash ^= self.keys.ship(self.side, ship)
+            ship.deal_damage(1)
+            if ship.hp == 0:
+                del self.ships[ship.type]
+                del self.index[tuple(ship.position)]
+            else:
+                self.hash ^= self.keys.ship(self.side, ship)
+        return ship
+
+    def revive(self, ship):
+        """hit() を取り消す．沈没していた艦は元の順序で艦隊に戻す．"""
+        if ship.hp > 0:
+            self.hash ^= self.keys.ship(self.side, ship)
+        ship.hp += 1
+        self.hash ^= self.keys.ship(self.side, ship)
+        if ship.type not in self.ships:
+            self.ships[ship.type] = ship
+            self.index[tuple(ship.position)] = ship
+            later = self.types[self.types.index(ship.type)+1:]
+            for type in later:
+                if type in self.ships:
+                    self.ships[type] = self.ships.pop(type)
+
+    def clone(self):
+        """探索用に艦の状態だけを複製した Client を返す．"""
+        other = Client.__new__(Client)
+        other.field = self.field
+        other.side = self.side
+        other.keys = self.keys
+        other.hash = self.hash
+        other.types = self.types
+        other.rank = self.rank
+        other.ships = {type: ship.copy() for type, ship in self.ships.items()}
+        other.index = {tuple(ship.position): ship
+                       for ship in other.ships.values()}
+        return other
+
+    def observation(self, me):
+        """艦の座標とHPを返す．meで自分かどうかを判定し，違うならpositionは教えない．"""
+        cond = {}
+        for ship in self.ships.values():
+            cond[ship.type] = {"hp": ship.hp}
+            if me:
+                cond[ship.type]["position"] = ship.position
+        return cond
+
+    def in_attack_range(self, to):
+        """艦隊の攻撃可能な範囲かどうかを返す．"""
+        if not self.field.passable(to):
+            return False
+        x, y = to
+        index = self.index
+        return any((x + dx, y + dy) in index for dx, dy in NEIGHBORHOOD)
+
+    def overlap(self, position):
+        """与えられた座標にいる艦を返す．"""
+        return self.index.get(tuple(position))
+
+    def near(self, to):
+        """与えられた座標の周り1マスにいる艦を配列で返す．順序は初期配置の艦種の順である．"""
+        x, y = to
+        index = self.index
+        near = [index[x + dx, y + dy] for dx, dy in NEIGHBORHOOD
+                if (dx or dy) and (x + dx, y + dy) in index]
+        if len(near) > 1:
+            near.sort(key=lambda ship: self.rank[ship.type])
+        return near
+
+
+class GameControl:
+    """Gameの処理を行うクラスである．プレイヤー2人を保持している．
+
+    self.cliernts はプレイヤーの配列で
+    行動プレイヤーのインデックスをc in {0, 1} とすると
+    プレイヤーが2人であるという前提なので， 待機プレイヤーのインデックスは1-cである．
+
+    tracer (tracing.Tracer) を与えると action() の処理をイベントとして通知する．
+
+    snapshot > 0 の場合，action() は observation の代わりに直前の通知から変化した艦だけを
+    "delta" として送り，snapshot ターンごと (time が 1, 1+snapshot, ... の時) に
+    observation 全体を送る．
+    """
+    def __init__(self, field, tracer=None, snapshot=0):
+        self.field = field
+        self.clients = None
+        self.turn = 0
+        self.time = 0
+        self.reason = None
+        self.tracer = tracer
+        self.snapshot = snapshot
+
+    def initialize(self, json1, json2):
+        self.clients = [
+            Client(self.field, json.loads(json1), side=0),
+            Client(self.field, json.loads(json2), side=1)
+        ]
+        self.turn = 0
+        self.time = 0
+        self.reason = None
+
+    @property
+    def hash(self):
+        """両艦隊と手番から成る局面の Zobrist hash"""
+        value = self.clients[0].hash ^ self.clients[1].hash
+        if self.turn:
+            value ^= self.clients[0].keys.side
+        return value
+
+    def clone(self):
+        """探索用に局面を複製する．Field は共有する．"""
+        other = GameControl.__new__(GameControl)
+        other.field = self.field
+        other.clients = [client.clone() for client in self.clients]
+        other.turn = self.turn
+        other.time = self.time
+        other.reason = self.reason
+        other.tracer = None
+        other.snapshot = self.snapshot
+        return other
+
+    def apply(self, act):
+        """手番のプレイヤーの行動 act (dict) を JSON を介さずに適用し，undo() 用の記録を返す．
+
+        記録は (手番, 合法か, 艦, 移動前の座標) のタプルである．
+        攻撃の場合は命中した艦 (外れなら None) と None，反則の場合は (c, False, None, None) となる．
+        反則でも手番は交代する．
+        """
+        c = self.turn
+        self.turn = 1 - c
+        active = self.clients[c]
+        if "attack" in act:
+            to = act["attack"]["to"]
+            if active.in_attack_range(to):
+                return (c, True, self.clients[1-c].hit(to), None)
+        elif "move" in act:
+            ship = active.ships.get(act["move"]["ship"])
+            if ship:
+                position = ship.position
+                if active.move(ship.type, act["move"]["to"]):
+                    return (c, True, ship, position)
+        return (c, False, None, None)
+
+    def legal_actions(self):
+        """手番のプレイヤーの合法な行動を apply() に渡せる dict の配列で返す．
+
+        >>> game = GameControl(Field(2, 2))
+        >>> game.initialize('{"w": [0, 0], "c": [1, 1]}', '{"s": [1, 0]}')
+        >>> len(game.legal_actions())    # 4 attacks, 2 moves of each ship
+        8
+        """
+        me = self.clients[self.turn]
+        acts = [{"attack": {"to": p}} for p in self.field.squares
+                if me.in_attack_range(p)]
+        for ship in me.ships.values():
+            x, y = ship.position
+            acts += [{"move": {"ship": ship.type, "to": p}}
+                     for p in self.field.squares
+                     if (p[0] == x) != (p[1] == y) and not me.overlap(p)]
+        return acts
+
+    def undo(self, record):
+        """apply() の記録を受け取り，適用前の状態に戻す．"""
+        c, legal, ship, position = record
+        self.turn = c
+        if ship is None:
+            return
+        if position is None:
+            self.clients[1-c].revive(ship)
+        else:
+            self.clients[c].move_ship(ship, position)
+
+    def initial_condition(self, c):
+        """初期配置をJSONで返す．"""
+        return [
+            json.dumps(self.observation(c)),
+            json.dumps(self.observation(1-c))
+        ]
+
+    def action(self, c, json_msg):
+        """
+        可能かどうかチェックしてから攻撃，あるいは移動の処理を行い，両プレイヤーに結果を通知するJSONを作る．
+        JSONの配列を返す．0番目の要素が行動プレイヤー宛，1番目の要素が待機プレイヤー宛である．
+        """
+        info = [{}, {}]
+        self.turn = 1 - c
+        self.time += 1
+        if self.tracer:
+            from .tracing import Action
+            self.tracer.on_action(Action(self.time, c, json_msg))
+        active = self.clients[c]
+        passive = self.clients[1-c]
+        act = json.loads(json_msg)
+        changed = []
+
+        if "attack" in act:
+            to = act["attack"]["to"]
+
+            if not active.in_attack_range(to):
+                result = False
+            else:
+                result = passive.attacked(to)
+
+            info[c]["result"] = {"attacked": result}
+            info[1-c]["result"] = {"attacked": result}
+            if result and "hit" in result:
+                changed.append((1-c, result["hit"], True))
+
+            if not passive.ships:
+                info[c]["outcome"] = True
+                info[1-c]["outcome"] = False
+                self.reason = 'all sunk'
+
+        elif "move" in act:
+            result = active.move(act["move"]["ship"], act["move"]["to"])
+            info[1-c]["result"] = {"moved": result}
+            if result:
+                changed.append((c, result["ship"], False))
+
+        if not result:
+            info[c]["outcome"] = False
+            info[1-c]["outcome"] = True
+            self.reason = 'illegal action'
+
+        if self.snapshot and (self.time - 1) % self.snapshot:
+            info[c].update(self.delta(c, changed))
+            info[1-c].update(self.delta(1-c, changed))
+        else:
+            info[c].update(self.observation(c))
+            info[1-c].update(self.observation(1-c))
+
+        results = [json.dumps(info[c]), json.dumps(info[1-c])]
+        if self.tracer:
+            from .tracing import Result
+            self.tracer.on_result(Result(self.time, c, results))
+        return results
+
+    def observation(self, c):
+        """自分と相手の状態を連想配列で返す．"""
+        return {
+            "observation": {
+                "me": self.clients[c].observation(True),
+                "opponent": self.clients[1-c].observation(False)
+            }
+        }
+
+    def delta(self, c, changed):
+        """changed の艦の状態を observation と同じ形で返す．
+
+        changed は (艦隊のインデックス, 艦種, 被弾したか) の配列である．
+        相手の艦は被弾した場合だけ含める．沈没した艦は hp 0 で表す．
+        """
+        delta = {"me": {}, "opponent": {}}
+        for side, type, hit in changed:
+            ship = self.clients[side].ships.get(type)
+            hp = ship.hp if ship else 0
+            if side != c:
+                if hit:
+                    delta["opponent"][type] = {"hp": hp}
+            elif ship:
+                delta["me"][type] = {"hp": hp, "position": ship.position}
+            else:
+                delta["me"][type] = {"hp": 0}
+        return {"delta": delta}
@@ -0,0 +1,64 @@
+"""A seat of the server played by a Player object in the same process."""
+from .field import Field
+from .player_base import OUTCOMES
+from .protocol import Protocol
+from .transport import TransportStats
+import collections
+
+
+class HouseSeat:
+    """Drive a Player directly in place of a client connection
+
+    HouseSeat has the methods of Transport used by the server.  Messages
+    given to send() are handled as play_on() would handle them, by calling
+    player.initialize(), update(), action() and on_game_end() directly,
+    and the replies are returned by readline().  No socket or thread is
+    involved.
+    """
+    def __init__(self, player):
+        self.player = player
+        self.stats = TransportStats()
+        self.replies = collections.deque()
+        self.state = 'greeting'
+        self.status = None
+
+    def send(self, msg: str):
+        player = self.player
+        if msg == Protocol.greeting:
+            # (2b) name
+            self.replies.append(player.name())
+            self.state = 'field'
+        elif self.state == 'field':
+            # (3) -> (4) initial placement
+            player.initialize(Field.from_json(msg))
+            self.replies.append(player.ships_to_json())
+            self.state = 'status'
+        elif self.state == 'status':
+            if msg in OUTCOMES:
+                self.state = 'greeting'
+                player.on_game_end(OUTCOMES[msg])
+                return
+            if msg not in ('your turn', 'waiting'):
+                raise RuntimeError(f'unexpected message {msg}')
+            self.status = msg
+            self.state = 'observation'
+        elif self.state == 'observation':
+            # (5c) result of the last action
+            player.update(msg, self.status)
+            self.state = 'status'
+        else:
+            raise RuntimeError(f'unexpected message {msg} in {self.state}')
+
+    def readline(self) -> str:
+        if self.replies:
+            return self.replies.popleft() + '\n'
+        if self.status == 'your turn' and self.state == 'observation':
+            # (5b) action
+            return self.player.action() + '\n'
+        return ''
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,112 @@
+"""Run matches between Player objects inside one process."""
+from .field import Field
+from .house import HouseSeat
+from .player_base import Player, play_on
+from .server import Adjudication, greet, play_game
+from .transport import Transport
+import importlib
+import inspect
+import logging
+import socket
+import threading
+
+
+def load_class(spec: str, base=None):
+    """return the class named by an import path 'module:Class' or
+    'module.Class', checking that it is a subclass of base if given
+
+    >>> load_class('submarine_py.game.GameControl')
+    <class 'submarine_py.game.GameControl'>
+    """
+    module, _, name = spec.partition(':')
+    if not name:
+        module, _, name = spec.rpartition('.')
+    cls = getattr(importlib.import_module(module), name)
+    if not isinstance(cls, type):
+        raise ValueError(f'{spec} is not a class')
+    if base is not None and not issubclass(cls, base):
+        raise ValueError(f'{spec} is not a {base.__name__} subclass')
+    return cls
+
+
+def load_player(spec: str):
+    """return the Player subclass named by an import path 'module:Class'
+
+    >>> load_player('submarine_py.player_base:Player')
+    <class 'submarine_py.player_base.Player'>
+    """
+    return load_class(spec, Player)
+
+
+def make_player(cls, seed: int):
+    """construct a player, passing seed if its constructor takes one"""
+    if 'seed' in inspect.signature(cls).parameters:
+        return cls(seed=seed)
+    return cls()
+
+
+def run_client(transport, player: Player):
+    try:
+        play_on(transport, player, quiet=True)
+    except Exception:
+        logging.exception(f'player {player.name()} failed')
+    finally:
+        transport.close()
+
+
+def local_match(field: Field, players, *, games=1, quiet=True, framed=False,
+                tracer=None, adjudication=Adjudication()):
+    """play games between two players over socketpair() connections
+
+    The server runs in the calling thread and each player in its own thread,
+    talking the usual protocol without any listening socket.  The same
+    Player objects are reused for all games, as a session started by
+    on_session_start().  Return the list of winners
+    (0 or 1 for players[0] or players[1], -1 for draws).
+    """
+    assert len(players) == 2
+    for player in players:
+        player.on_session_start()
+    winners = []
+    for g in range(games):
+        clients, threads = [], []
+        for player in players:
+            server_end, client_end = socket.socketpair()
+            clients.append(greet(server_end, framed=framed))
+            thread = threading.Thread(
+                target=run_client,
+                args=(Transport(client_end, framed=framed), player),
+                daemon=True,
+            )
+            thread.start()
+            threads.append(thread)
+        try:
+            result = play_game(field, clients, quiet=quiet, tracer=tracer,
+                               adjudication=adjudication)
+        finally:
+            for client in clients:
+                client.close()
+            for thread in threads:
+                thread.join()
+        winners.append(result.winner)
+    return winners
+
+
+def house_match(field: Field, players, *, games=1, quiet=True, tracer=None,
+                snapshot=0, adjudication=Adjudication()):
+    """play games between two players both seated by HouseSeat
+
+    Same as local_match() but without sockets or threads; each message is
+    handled by a direct call to the player.  snapshot and adjudication are
+    passed to play_game().
+    """
+    assert len(players) == 2
+    for player in players:
+        player.on_session_start()
+    winners = []
+    for g in range(games):
+        clients = [greet(HouseSeat(player)) for player in players]
+        result = play_game(field, clients, quiet=quiet, tracer=tracer,
+                           snapshot=snapshot, adjudication=adjudication)
+        winners.append(result.winner)
+    return winners
@@ -0,0 +1,166 @@
+"""Evaluation of candidate actions on many cores, for Player.action().
+
+ParallelSearch keeps a pool of worker processes and a block of shared
+memory for the life of a player.  Each turn, search() publishes the
+game (a GameControl, e.g., one guess of the hidden ships of the
+opponent) and a belief (anything JSON can hold) into the shared memory
+once, instead of pickling them to every task.  Workers decode them once
+per turn and call evaluate(game, seat, act, belief) for chunks of the
+candidate actions, each on a clone of the game, until the deadline.
+The action of the highest value among those evaluated in time is
+returned, with the numbers of each worker.
+
+evaluate must be a module-level function, so that workers can get it.
+The shared block starts with a header of (version, length); version is
+0 while a turn is being written, and tasks of an older turn find a newer
+version there and are skipped.
+"""
+from .checkpoint import restore_game, snapshot_game
+from .game import GameControl
+import concurrent.futures
+import json
+import multiprocessing.shared_memory
+import os
+import struct
+import time
+import typing
+
+HEADER = struct.Struct('<QQ')   # version, length of the JSON payload
+WORKER = {}                     # state of this process as a worker
+
+
+class Stats(typing.NamedTuple):
+    """work of one worker process in a search"""
+    chunks: int
+    evaluated: int
+    seconds: float              #: time spent in evaluate()
+    stale: int                  #: chunks of an older turn, skipped
+
+
+class Result(typing.NamedTuple):
+    action: dict                #: the best action, or the first if none
+    value: typing.Optional[float]
+    values: list                #: value of each candidate, None if not done
+    workers: dict               #: Stats by pid
+
+
+def publish(buf, version: int, payload: bytes):
+    if HEADER.size + len(payload) > len(buf):
+        raise ValueError(f'state of {len(payload)} bytes does not fit in'
+                         f' {len(buf) - HEADER.size} bytes of shared memory')
+    HEADER.pack_into(buf, 0, 0, 0)
+    buf[HEADER.size:HEADER.size + len(payload)] = payload
+    HEADER.pack_into(buf, 0, version, len(payload))
+
+
+def read(buf, version: int):
+    """payload of version, or None if buf holds another version"""
+    current, length = HEADER.unpack_from(buf, 0)
+    if current != version:
+        return None
+    payload = bytes(buf[HEADER.size:HEADER.size + length])
+    if HEADER.unpack_from(buf, 0)[0] != version:
+        return None
+    return payload
+
+
+def attach(name, evaluate):
+    """initializer of workers"""
+    # workers share the resource tracker of the parent, which unlinks
+    # the block in close()
+    shm = multiprocessing.shared_memory.SharedMemory(name)
+    WORKER.update(shm=shm, evaluate=evaluate, version=None)
+
+
+def state(version):
+    """(game, seat, belief) of version, decoded once per version"""
+    if WORKER['version'] != version:
+        payload = read(WORKER['shm'].buf, version)
+        if payload is None:
+            return None
+        data = json.loads(payload)
+        WORKER.update(version=version, seat=data['seat'],
+                      game=restore_game(data['game']),
+                      belief=data['belief'])
+    return WORKER['game'], WORKER['seat'], WORKER['belief']
+
+
+def run_chunk(version, chunk, deadline):
+    """[(index, value)] of (index, action) in chunk evaluated in time"""
+    start = time.monotonic()
+    current = state(version)
+    values = []
+    if current is not None:
+        game, seat, belief = current
+        for index, act in chunk:
+            if time.monotonic() > deadline:
+                break
+            values.append((index, WORKER['evaluate'](game.clone(), seat, act,
+                                                     belief)))
+    return os.getpid(), values, time.monotonic() - start, current is None
+
+
+class ParallelSearch:
+    """Value candidate actions with evaluate in workers processes
+
+    size is the bytes of shared memory for the game and the belief.
+    close() (or leaving a with block) stops the workers.
+    """
+    def __init__(self, evaluate, *, workers=None, size=1 << 20, chunk=0):
+        self.shm = multiprocessing.shared_memory.SharedMemory(
+            create=True, size=size)
+        self.workers = workers or os.cpu_count()
+        self.chunk = chunk
+        self.version = 0
+        self.pool = concurrent.futures.ProcessPoolExecutor(
+            self.workers, initializer=attach,
+            initargs=(self.shm.name, evaluate))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        self.shm.close()
+        self.shm.unlink()
+
+    def search(self, game: GameControl, seat: int, acts=None, *,
+               belief=None, deadline=1.0) -> Result:
+        """the best of acts (dicts as made by Player.move() and
+        Player.attack(), or game.legal_actions() if None) for seat in
+        game, taking at most deadline seconds
+        """
+        end = time.monotonic() + deadline
+        if acts is None:
+            acts = game.legal_actions()
+        self.version += 1
+        payload = json.dumps({'game': snapshot_game(game), 'seat': seat,
+                              'belief': belief}).encode()
+        publish(self.shm.buf, self.version, payload)
+        size = self.chunk or max(1, len(acts) // (4 * self.workers))
+        indexed = list(enumerate(acts))
+        futures = [self.pool.submit(run_chunk, self.version,
+                                    indexed[i:i + size], end)
+                   for i in range(0, len(indexed), size)]
+        done, late = concurrent.futures.wait(
+            futures, max(end - time.monotonic(), 0))
+        for future in late:
+            future.cancel()
+        values = [None] * len(acts)
+        workers = {}
+        for future in done:
+            pid, chunk, seconds, stale = future.result()
+            for index, value in chunk:
+                values[index] = value
+            old = workers.get(pid, Stats(0, 0, 0.0, 0))
+            workers[pid] = Stats(old.chunks + 1, old.evaluated + len(chunk),
+                                 old.seconds + seconds, old.stale + stale)
+        scored = [(value, index) for index, value in enumerate(values)
+                  if value is not None]
+        if not scored:
+            return Result(acts[0] if acts else None, None, values, workers)
+        value, index = max(scored, key=lambda vi: (vi[0], -vi[1]))
+        return Result(acts[index], value, values, workers)
@@ -11,11 +11,17 @@ class Player(abc.ABC):
 
     Typical sequence:
     - make a (subclass of) Player object
-    - call initialize(field).
+    - on_session_start() is called once (e.g., by play_session())
+    - for each game, call initialize(field).
       - self.field is set
+      - self.cache is set to the dict kept for the layout of field
+      - self.on_game_start(field) is internally called
       - self.place_ship() is internally called
       - self.ships is set
-    - play a game
+    - play a game, then on_game_end(outcome) is called
+
+    The same object may play many games, so that state expensive to
+    build (tables, models, statistics of opponents) is kept across them.
     """
 
     def __init__(self):
@@ -25,7 +31,24 @@ class Player(abc.ABC):
         '''
         self.field = None
         self.ships = {}
+        self.opponent = {}
         self.last_msg = None
+        self.caches = {}        # Field.key -> dict
+        self.cache = None
+
+    def on_session_start(self):
+        '''called once before the first game; does nothing by default'''
+
+    def on_game_start(self, field: Field):
+        '''called by initialize() before place_ship(); does nothing by default
+
+        self.field and self.cache are already set for the game.
+        '''
+
+    def on_game_end(self, outcome):
+        '''called when a game ends with outcome True (win), False (lose)
+        or None (draw); does nothing by default
+        '''
 
     def initialize(self, field: Field):
         '''
@@ -33,11 +56,14 @@ class Player(abc.ABC):
         艦のtypeがkeyになる．
         '''
         self.field = field
+        self.cache = self.caches.setdefault(field.key, {})
+        self.on_game_start(field)
         logging.debug(f'field is \n{field.to_ascii()}')
         positions = self.place_ship()
         logging.debug(f'place ships at {positions}')
         self.ships = {ship_type: Ship(ship_type, position)
                       for ship_type, position in positions.items()}
+        self.opponent = {}
 
     def ships_to_json(self):
         '''船の状態をJSONで返す．'''
@@ -71,8 +97,15 @@ class Player(abc.ABC):
         pass
 
     def update(self, json_, info):
-        '''通知された情報で艦の状態を更新する．'''
+        '''通知された情報で艦の状態を更新する．
+
+        相手の艦の耐久値は self.opponent (艦種から hp への dict) に保持する．
+        observation の代わりに delta が届いた場合は，変化した艦だけを更新する．
+        '''
         self.last_msg = json.loads(json_)
+        if 'delta' in self.last_msg:
+            self.apply_delta(self.last_msg['delta'])
+            return
         status = self.last_msg['observation']['me']
         for ship_type in list(self.ships):
             if ship_type not in status:
@@ -80,6 +113,23 @@ class Player(abc.ABC):
             else:
                 self.ships[ship_type].hp = status[ship_type]['hp']
                 self.ships[ship_type].position = status[ship_type]['position']
+        opponent = self.last_msg['observation'].get('opponent', {})
+        self.opponent = {ship_type: state['hp']
+                         for ship_type, state in opponent.items()}
+
+    def apply_delta(self, delta):
+        '''delta の艦だけを更新する．hp が 0 の艦は沈没したので取り除く．'''
+        for ship_type, state in delta['me'].items():
+            if state['hp'] == 0:
+                self.ships.pop(ship_type, None)
+            else:
+                self.ships[ship_type].hp = state['hp']
+                self.ships[ship_type].position = state['position']
+        for ship_type, state in delta['opponent'].items():
+            if state['hp'] == 0:
+                self.opponent.pop(ship_type, None)
+            else:
+                self.opponent[ship_type] = state['hp']
 
     def move(self, ship_type, to):
         '''移動の処理を行い，連想配列で結果を返す．'''
@@ -120,56 +170,84 @@ class Player(abc.ABC):
         return None
 
 
-def play_game(host: str, port: int, player: Player):
-    """仕様に従ってサーバとソケット通信を行う．"""
-    import socket
-    import logging
-    assert isinstance(host, str) and isinstance(port, int)
-
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-        sock.connect((host, port))
-        with sock.makefile(mode='rw', buffering=1) as sockfile:
-            # (2a) receive greeting from the server
-            greeting = sockfile.readline().rstrip()
-            logging.debug(f'< {greeting}')
-            assert greeting == Protocol.greeting
-            logging.info(f'connect to server with name {player.name()}')
-            # (2b) send its name to the server
-            sockfile.write(player.name()+'\n')
-
-            # (3) receive filed information
-            field = sockfile.readline()
-            player.initialize(Field.from_json(field))
-            # (4) send initial placement of ships
-            ships = player.ships_to_json()
-            logging.debug('send initial placement ' + ships)
-            sockfile.write(ships+'\n')
-
-            # (5) main loop in game
-            t = 1
-            while True:
-                # receive (5a) turn to move or (6) game end
-                game_status = sockfile.readline().rstrip()
-                print(f't={t} {game_status}')
-                if game_status == "your turn":
-                    # (5b) send action if my turn
-                    action = player.action()
-                    logging.debug('> ' + action)
-                    sockfile.write(action+'\n')
-                elif game_status == "waiting":
-                    pass
-                elif game_status == Protocol.you_win:
-                    break
-                elif game_status == Protocol.you_lose:
-                    break
-                elif game_status == Protocol.draw:
-                    break
-                else:
-                    raise RuntimeError("unexpected information from server")
-                observation = sockfile.readline()
-                # (5c) receive result of action either by me or by opponent
-                if not observation:
-                    logging.error('disconnected from server')
-                    break
-                player.update(observation, game_status)
-                t += 1
+def play_game(host: str, port, player: Player, *, framed=False):
+    """仕様に従ってサーバとソケット通信を行う．
+
+    port が None の場合 host は Unix ドメインソケットのパスである．
+    framed はサーバと同じ設定にする．
+    play_on() と同じく勝敗 (True, False, 引き分けは None) を返す．
+    """
+    from .transport import Transport, connect
+    assert isinstance(host, str) and (port is None or isinstance(port, int))
+
+    with connect(host, port) as sock:
+        return play_on(Transport(sock, framed=framed), player)
+
+
+def play_session(host: str, port, player: Player, games: int, *,
+                 framed=False):
+    """同じ player で games 回対戦し，各ゲームの勝敗のリストを返す．
+
+    player.on_session_start() を最初に一度だけ呼ぶ．サーバはゲームごとに
+    接続を閉じるので，接続はゲームごとに作り直す．
+    """
+    player.on_session_start()
+    return [play_game(host, port, player, framed=framed)
+            for _ in range(games)]
+
+
+def play_on(server, player: Player, *, quiet=False):
+    """接続済みの Transport を通じてサーバと1ゲーム対戦する．
+
+    送信したメッセージは次の readline() の前にまとめて送られる．
+    quiet の場合は毎ターンの状況を表示しない．
+    終局すると player.on_game_end() を呼び，勝敗 (True, False,
+    引き分けは None) を返す．切断された場合は None を返す．
+    """
+    # (2a) receive greeting from the server
+    greeting = server.readline().rstrip()
+    logging.debug(f'< {greeting}')
+    assert greeting == Protocol.greeting
+    logging.info(f'connect to server with name {player.name()}')
+    # (2b) send its name to the server
+    server.send(player.name())
+
+    # (3) receive filed information
+    field = server.readline()
+    player.initialize(Field.from_json(field))
+    # (4) send initial placement of ships
+    ships = player.ships_to_json()
+    logging.debug('send initial placement ' + ships)
+    server.send(ships)
+
+    # (5) main loop in game
+    t = 1
+    while True:
+        # receive (5a) turn to move or (6) game end
+        game_status = server.readline().rstrip()
+        if not quiet:
+            print(f't={t} {game_status}')
+        if game_status == "your turn":
+            # (5b) send action if my turn
+            action = player.action()
+            logging.debug('> ' + action)
+            server.send(action)
+        elif game_status == "waiting":
+            pass
+        elif game_status in OUTCOMES:
+            outcome = OUTCOMES[game_status]
+            player.on_game_end(outcome)
+            return outcome
+        else:
+            raise RuntimeError("unexpected information from server")
+        observation = server.readline()
+        # (5c) receive result of action either by me or by opponent
+        if not observation:
+            logging.error('disconnected from server')
+            return None
+        player.update(observation, game_status)
+        t += 1
+
+
+OUTCOMES = {Protocol.you_win: True, Protocol.you_lose: False,
+            Protocol.draw: None}
@@ -0,0 +1,222 @@
+"""Latency of Player.action(), measured without a server.
+
+A Player is fed positions through initialize(), update() and action() as
+play_on() would, either from games recorded by analytics.GameLog
+(replay()) or from games against an opponent in this process (play()).
+Each call of action() is timed and counted in a phase of the game:
+
+- opening: the first opening actions of the player
+- endgame: after a ship of either side has been sunk
+- middle: the rest
+
+The slowest calls can also be run under cProfile, or traced by
+tracemalloc, to print where their time and memory went.  Both slow down
+the calls they watch, so latencies then include their overhead.
+"""
+from .analytics import open_log
+from .field import Field
+from .game import GameControl
+from .ship import Ship
+import cProfile
+import heapq
+import io
+import json
+import math
+import pstats
+import time
+import tracemalloc
+import typing
+
+PHASES = ('opening', 'middle', 'endgame')
+
+
+def percentile(values, q):
+    """q-th percentile (0 to 100) of sorted values, by the nearest rank
+
+    >>> percentile([1, 2, 3, 4], 50)
+    2
+    >>> percentile(list(range(1, 101)), 99)
+    99
+    """
+    rank = max(math.ceil(q / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+class Call(typing.NamedTuple):
+    """a call of action() kept among the slowest"""
+    seconds: float
+    phase: str
+    game: int                   #: index of the game from 0
+    time: int                   #: time of the action in the game
+    profile: typing.Any         #: cProfile.Profile, if profiled
+    memory: list                #: tracemalloc.StatisticDiff, if traced
+
+
+class Profiler:
+    """Time action() of players and keep the slowest calls
+
+    With cprofile, each call runs under its own cProfile.Profile.  With
+    memory, tracemalloc is started and snapshots are taken around each
+    call.  Profiles and allocations are kept for the keep slowest calls.
+    """
+    def __init__(self, *, opening=10, keep=5, cprofile=False, memory=False):
+        self.opening = opening
+        self.keep = keep
+        self.cprofile = cprofile
+        self.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.latencies = {phase: [] for phase in PHASES}
+        self.slowest = []       # heap of (seconds, calls, Call)
+        self.calls = 0
+        self.games = 0
+        self.ships = 0          # in the game being played, when it began
+
+    def begin(self, game: GameControl):
+        """count the ships of game as it starts, for phase()"""
+        self.ships = sum(len(client.ships) for client in game.clients)
+
+    def phase(self, game: GameControl, moves: int) -> str:
+        """phase of game, begun by begin(), where a player makes its
+        moves-th action"""
+        ships = sum(len(client.ships) for client in game.clients)
+        if ships < self.ships:
+            return 'endgame'
+        return 'opening' if moves <= self.opening else 'middle'
+
+    def action(self, player, game: GameControl, moves: int) -> str:
+        """call player.action() and count its latency"""
+        phase = self.phase(game, moves)
+        profile = cProfile.Profile() if self.cprofile else None
+        before = tracemalloc.take_snapshot() if self.memory else None
+        if profile:
+            profile.enable()
+        start = time.perf_counter()
+        act = player.action()
+        seconds = time.perf_counter() - start
+        if profile:
+            profile.disable()
+        self.latencies[phase].append(seconds)
+        self.calls += 1
+        if self.keep and (len(self.slowest) < self.keep
+                          or seconds > self.slowest[0][0]):
+            memory = None
+            if before is not None:
+                memory = tracemalloc.take_snapshot().compare_to(
+                    before, 'lineno')[:10]
+            call = Call(seconds, phase, self.games, game.time + 1, profile,
+                        memory)
+            if len(self.slowest) < self.keep:
+                heapq.heappush(self.slowest, (seconds, self.calls, call))
+            else:
+                heapq.heapreplace(self.slowest, (seconds, self.calls, call))
+        return act
+
+    def over(self, budget: float) -> int:
+        """number of calls slower than budget seconds"""
+        return sum(seconds > budget for values in self.latencies.values()
+                   for seconds in values)
+
+    def report(self, *, lines=15) -> str:
+        """text table of latencies in milliseconds, and the slowest calls
+        with at most lines lines of each profile
+        """
+        out = [f'{self.calls} actions in {self.games} games',
+               f'{"phase":<8} {"calls":>6} {"p50":>9} {"p99":>9} {"max":>9}']
+        everything = sorted(seconds for values in self.latencies.values()
+                            for seconds in values)
+        for phase, values in [*self.latencies.items(), ('all', everything)]:
+            if not values:
+                continue
+            values = sorted(values)
+            out.append(f'{phase:<8} {len(values):>6}'
+                       + ''.join(f' {percentile(values, q) * 1000:>9.3f}'
+                                 for q in (50, 99, 100)))
+        for _, _, call in sorted(self.slowest, reverse=True):
+            out.append('')
+            out.append(f'{call.seconds * 1000:.3f} ms in {call.phase}'
+                       f' of game {call.game} at time {call.time}')
+            if call.profile is not None:
+                stream = io.StringIO()
+                stats = pstats.Stats(call.profile, stream=stream)
+                stats.sort_stats('cumulative').print_stats(lines)
+                out.extend(line for line in stream.getvalue().splitlines()
+                           if line.strip())
+            if call.memory is not None:
+                out.extend(f'  {diff}' for diff in call.memory[:lines])
+        return '\n'.join(out)
+
+
+def run(profiler: Profiler, player, seat: int, field: Field, *,
+        opponent=None, record=None, limit=10000):
+    """play a game with player in seat, timing its actions
+
+    The other seat is played by opponent (a Player), or, if record (a
+    game written by analytics.GameLog) is given, both seats follow its
+    actions and player takes its placement.
+    """
+    player.initialize(field)
+    players = [None, None]
+    players[seat] = player
+    if record is not None:
+        placement = record['placements'][seat]
+        player.ships = {type: Ship(type, position)
+                        for type, position in placement.items()}
+        placements = [json.dumps(p) for p in record['placements']]
+        script = [(c, json.dumps(action)) for c, action, *_
+                  in record['turns']]
+    else:
+        opponent.initialize(field)
+        players[1 - seat] = opponent
+        placements = [p.ships_to_json() for p in players]
+        script = [(t % 2, None) for t in range(limit)]
+    game = GameControl(field)
+    game.initialize(*placements)
+    profiler.begin(game)
+    moves = 0
+    outcome = None
+    for c, act in script:
+        if c == seat:
+            moves += 1
+            mine = profiler.action(player, game, moves)
+            act = act or mine
+        elif act is None:
+            act = opponent.action()
+        results = game.action(c, act)
+        for k, status in ((c, 'your turn'), (1 - c, 'waiting')):
+            if players[k] is not None:
+                players[k].update(results[k != c], status)
+        info = json.loads(results[0])
+        if 'outcome' in info:
+            outcome = info['outcome'] == (c == seat)
+            break
+    player.on_game_end(outcome)
+    profiler.games += 1
+
+
+def play(profiler: Profiler, player, opponent, field: Field, games: int, *,
+         limit=10000):
+    """time player in games against opponent, moving first in even games"""
+    player.on_session_start()
+    opponent.on_session_start()
+    for g in range(games):
+        run(profiler, player, g % 2, field, opponent=opponent, limit=limit)
+
+
+def replay(profiler: Profiler, player, paths, *, seats=(0, 1), names=None):
+    """time player in the positions of games recorded in paths
+
+    player takes each seat in seats of each game, or only the seats of
+    players named in names if given.
+    """
+    player.on_session_start()
+    for path in paths:
+        with open_log(path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                field = Field.from_json(json.dumps(record['field']))
+                for seat in seats:
+                    if names is None or record['names'][seat] in names:
+                        run(profiler, player, seat, field, record=record)
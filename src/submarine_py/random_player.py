@@ -0,0 +1,32 @@
+"""A Player of random legal actions, for tests, soak runs and as a sample."""
+from .player_base import Player
+import json
+import random
+
+
+class RandomPlayer(Player):
+    def __init__(self, seed=0):
+        super().__init__()
+        self.rng = random.Random(seed or None)
+
+    def name(self):
+        return 'random-player'
+
+    def place_ship(self):
+        '''初期配置を非復元抽出でランダムに決める．'''
+        ps = self.rng.sample(self.field.squares, 3)
+        return {'w': ps[0], 'c': ps[1], 's': ps[2]}
+
+    def action(self):
+        """移動か攻撃かランダムに決める．
+        どれがどこへ移動するか，あるいはどこに攻撃するかもランダム．
+        選んだ行動が反則になる場合は選び直す．
+        """
+        while True:
+            to = self.rng.choice(self.field.squares)
+            if self.rng.random() < 0.5:
+                ship = self.rng.choice(list(self.ships.values()))
+                if ship.is_reachable(to) and not self.overlap(to):
+                    return json.dumps(self.move(ship.type, to))
+            elif self.in_attack_range(to):
+                return json.dumps(self.attack(to))
@@ -0,0 +1,167 @@
+"""Persistent store of game results in SQLite.
+
+Games are buffered and written in one transaction per batch.  Per-player
+standings and per-pair counts are kept up to date in the same transaction,
+so leaderboard and head-to-head queries do not scan the games table.
+"""
+import collections
+import sqlite3
+import time
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    started REAL,               -- unix time
+    player0 TEXT NOT NULL,      -- moved first
+    player1 TEXT NOT NULL,
+    winner INTEGER NOT NULL,    -- 0, 1, or -1 for draw
+    turns INTEGER,
+    duration REAL,              -- seconds
+    field TEXT,                 -- Field.to_json()
+    reason TEXT
+);
+CREATE INDEX IF NOT EXISTS games_players ON games (player0, player1);
+CREATE TABLE IF NOT EXISTS standings (
+    player TEXT PRIMARY KEY,
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    draws INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS standings_wins ON standings (wins);
+CREATE TABLE IF NOT EXISTS pairs (
+    a TEXT NOT NULL,            -- a < b
+    b TEXT NOT NULL,
+    a_wins INTEGER NOT NULL,
+    b_wins INTEGER NOT NULL,
+    draws INTEGER NOT NULL,
+    PRIMARY KEY (a, b)
+);
+'''
+
+
+class ResultStore:
+    """Record games in an SQLite database
+
+    Buffered games are written when batch_size games are pending, when the
+    oldest pending one is older than interval seconds, or by flush()/close().
+    before_flush, if set, is called before each transaction.
+
+    >>> store = ResultStore(':memory:')
+    >>> store.add(['alice', 'bob'], 0, turns=10, reason='all sunk')
+    >>> store.add(['bob', 'alice'], -1, turns=10000, reason='turn limit')
+    >>> store.leaderboard()
+    [('alice', 2, 1, 0, 1), ('bob', 2, 0, 1, 1)]
+    >>> store.head_to_head('bob', 'alice')
+    (0, 1, 1)
+    >>> store.close()
+    """
+    def __init__(self, path, *, batch_size=64, interval=5.0):
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript(SCHEMA)
+        self.batch_size = batch_size
+        self.interval = interval
+        self.pending = []
+        self.oldest = None
+        self.before_flush = None
+
+    def record(self, players, result, field=None):
+        """add a server.GameResult played by players (ids for each seat)
+
+        The game is taken to have just finished.
+        """
+        self.add(players, result.winner, turns=result.time,
+                 duration=result.duration, field=field, reason=result.reason,
+                 started=time.time() - result.duration)
+
+    def add(self, players, winner, *, turns=None, duration=None, field=None,
+            reason=None, started=None):
+        if started is None:
+            started = time.time()
+        self.pending.append((started, players[0], players[1], winner, turns,
+                             duration, field, reason))
+        if self.oldest is None:
+            self.oldest = time.monotonic()
+        if (len(self.pending) >= self.batch_size
+                or time.monotonic() - self.oldest >= self.interval):
+            self.flush()
+
+    def flush(self):
+        """write pending games in one transaction"""
+        if not self.pending:
+            return
+        if self.before_flush is not None:
+            self.before_flush()
+        standings = collections.defaultdict(lambda: [0, 0, 0, 0])
+        pairs = collections.defaultdict(lambda: [0, 0, 0])
+        for _, p0, p1, winner, *_ in self.pending:
+            for seat, player in enumerate((p0, p1)):
+                row = standings[player]     # games, wins, losses, draws
+                row[0] += 1
+                if winner == -1:
+                    row[3] += 1
+                elif winner == seat:
+                    row[1] += 1
+                else:
+                    row[2] += 1
+            a, b = sorted((p0, p1))
+            if winner == -1:
+                pairs[a, b][2] += 1
+            else:
+                pairs[a, b][(p0, p1)[winner] != a] += 1
+        with self.db:
+            self.db.executemany(
+                'INSERT INTO games (started, player0, player1, winner, turns,'
+                ' duration, field, reason) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                self.pending)
+            self.db.executemany(
+                'INSERT INTO standings VALUES (?, ?, ?, ?, ?)'
+                ' ON CONFLICT (player) DO UPDATE SET'
+                ' games = games + excluded.games,'
+                ' wins = wins + excluded.wins,'
+                ' losses = losses + excluded.losses,'
+                ' draws = draws + excluded.draws',
+                [(player, *row) for player, row in standings.items()])
+            self.db.executemany(
+                'INSERT INTO pairs VALUES (?, ?, ?, ?, ?)'
+                ' ON CONFLICT (a, b) DO UPDATE SET'
+                ' a_wins = a_wins + excluded.a_wins,'
+                ' b_wins = b_wins + excluded.b_wins,'
+                ' draws = draws + excluded.draws',
+                [(a, b, *row) for (a, b), row in pairs.items()])
+        self.pending.clear()
+        self.oldest = None
+
+    def leaderboard(self, limit=20):
+        """return [(player, games, wins, losses, draws)] by number of wins"""
+        self.flush()
+        return self.db.execute(
+            'SELECT player, games, wins, losses, draws FROM standings'
+            ' ORDER BY wins DESC, player LIMIT ?', (limit,)
+        ).fetchall()
+
+    def head_to_head(self, a, b):
+        """return (wins of a, wins of b, draws) in games between a and b"""
+        self.flush()
+        row = self.db.execute(
+            'SELECT a_wins, b_wins, draws FROM pairs WHERE a = ? AND b = ?',
+            tuple(sorted((a, b)))
+        ).fetchone()
+        if row is None:
+            return 0, 0, 0
+        return row if a <= b else (row[1], row[0], row[2])
+
+    def games(self, a, b, limit=100):
+        """return recent games between a and b, in either seat"""
+        self.flush()
+        return self.db.execute(
+            'SELECT * FROM games WHERE (player0 = ? AND player1 = ?)'
+            ' OR (player0 = ? AND player1 = ?)'
+            ' ORDER BY id DESC LIMIT ?', (a, b, b, a, limit)
+        ).fetchall()
+
+    def close(self):
+        self.flush()
+        self.db.close()
@@ -1,167 +1,20 @@
-from .ship import Ship
 from .field import Reporter, Field
+from .game import Client, GameControl  # noqa: F401
+from .house import HouseSeat
 from .protocol import Protocol
-import socket
+from .tracing import GameStart, TurnStart, GameEnd
+from .transport import Transport, listen, peer_name
+import concurrent.futures
+import os
 import json
 import logging
 import collections
+import time
+import typing
 
 
-class Client:
-    """プレイヤーを表すクラスである．艦を複数保持している．"""
-
-    def __init__(self, field: Field, positions):
-        """艦種ごとに座標を与えられるので，Shipオブジェクトを作成し，連想配列に加える．
-        艦のtypeがkeyになる．
-        """
-        self.ships = {}
-        self.field = field
-        for type, position in positions.items():
-            if self.overlap(position):
-                raise ValueError("overlapping positions")
-            if not self.field.passable(position):
-                raise ValueError(f"position {position} out of field")
-            self.ships[type] = Ship(type, position)
-
-    def move(self, type, to):
-        """艦が座標に移動可能か確かめてから移動させる．相手プレイヤーに渡す情報を連想配列で返す．
-
-        反則の場合は False を返す
-        """
-        ship = self.ships[type]
-
-        if not ship or not self.field.passable(to) \
-           or not ship.is_reachable(to) or self.overlap(to):
-            return False
-
-        offset = [to[0] - ship.position[0], to[1] - ship.position[1]]
-        ship.move_to(to)
-        return {"ship": type, "distance": offset}
-
-    def attacked(self, to):
-        """攻撃された時の処理．攻撃を受けた艦，あるいは周囲1マスにいる艦を調べ，状態を更新する．
-        相手プレイヤーに渡す情報を連想配列で返す．
-        """
-        if not self.field.passable(to):
-            return False
-
-        info = {"position": to}
-        ship = self.overlap(to)
-        near = self.near(to)
-
-        if ship:
-            ship.deal_damage(1)
-            info["hit"] = ship.type
-
-            if ship.hp == 0:
-                del self.ships[ship.type]
-
-        info["near"] = [s.type for s in near]
-        return info
-
-    def observation(self, me):
-        """艦の座標とHPを返す．meで自分かどうかを判定し，違うならpositionは教えない．"""
-        cond = {}
-        for ship in self.ships.values():
-            cond[ship.type] = {"hp": ship.hp}
-            if me:
-                cond[ship.type]["position"] = ship.position
-        return cond
-
-    def in_attack_range(self, to):
-        """艦隊の攻撃可能な範囲かどうかを返す．"""
-        return (
-            self.field.passable(to)
-            and any([ship.in_attack_range(to)
-                     for ship in self.ships.values()])
-        )
-
-    def overlap(self, position):
-        """与えられた座標にいる艦を返す．"""
-        for ship in self.ships.values():
-            if ship.position == position:
-                return ship
-        return None
-
-    def near(self, to):
-        """与えられた座標の周り1マスにいる艦を配列で返す．"""
-        near = []
-        for ship in self.ships.values():
-            if ship.position != to and ship.in_attack_range(to):
-                near.append(ship)
-        return near
-
-
-class GameControl:
-    """Gameの処理を行うクラスである．プレイヤー2人を保持している．
-
-    self.cliernts はプレイヤーの配列で
-    行動プレイヤーのインデックスをc in {0, 1} とすると
-    プレイヤーが2人であるという前提なので， 待機プレイヤーのインデックスは1-cである．
-    """
-    def __init__(self, field):
-        self.field = field
-        self.clients = None
-
-    def initialize(self, json1, json2):
-        self.clients = [
-            Client(self.field, json.loads(json1)),
-            Client(self.field, json.loads(json2))
-        ]
-
-    def initial_condition(self, c):
-        """初期配置をJSONで返す．"""
-        return [
-            json.dumps(self.observation(c)),
-            json.dumps(self.observation(1-c))
-        ]
-
-    def action(self, c, json_msg):
-        """
-        可能かどうかチェックしてから攻撃，あるいは移動の処理を行い，両プレイヤーに結果を通知するJSONを作る．
-        JSONの配列を返す．0番目の要素が行動プレイヤー宛，1番目の要素が待機プレイヤー宛である．
-        """
-        info = [{}, {}]
-        active = self.clients[c]
-        passive = self.clients[1-c]
-        act = json.loads(json_msg)
-
-        if "attack" in act:
-            to = act["attack"]["to"]
-
-            if not active.in_attack_range(to):
-                result = False
-            else:
-                result = passive.attacked(to)
-
-            info[c]["result"] = {"attacked": result}
-            info[1-c]["result"] = {"attacked": result}
-
-            if not passive.ships:
-                info[c]["outcome"] = True
-                info[1-c]["outcome"] = False
-
-        elif "move" in act:
-            result = active.move(act["move"]["ship"], act["move"]["to"])
-            info[1-c]["result"] = {"moved": result}
-
-        if not result:
-            info[c]["outcome"] = False
-            info[1-c]["outcome"] = True
-
-        info[c].update(self.observation(c))
-        info[1-c].update(self.observation(1-c))
-
-        return [json.dumps(info[c]), json.dumps(info[1-c])]
-
-    def observation(self, c):
-        """自分と相手の状態を連想配列で返す．"""
-        return {
-            "observation": {
-                "me": self.clients[c].observation(True),
-                "opponent": self.clients[1-c].observation(False)
-            }
-        }
+class GameAborted(RuntimeError):
+    """a game that cannot go on, as a client left or sent a bad placement"""
 
 
 def step(time, active, passive, c, game, *, quiet):
@@ -169,40 +22,136 @@ def step(time, active, passive, c, game, *, quiet):
     プレイヤーの行動をソケットから取得して処理し，結果を通知する．
     勝利したプレイヤーを返す．勝敗が決していない時は-1を返す．
     """
+    if game.tracer:
+        game.tracer.on_turn_start(TurnStart(time, c))
     # (5a) notify player to move
-    print("your turn", file=active)
-    print("waiting", file=passive)
-    # (5b) recieve action
+    active.send("your turn")
+    passive.send("waiting")
+    # (5b) recieve action, which flushes the messages buffered for active
     act = active.readline().rstrip()
     if not act:
         logging.error(f'client disconnected at time {time}')
         logging.error('aborted')
-        exit(1)
-    logging.debug(f"action {time=} player={c+1} {act}")
+        raise GameAborted(f'client {c+1} disconnected at time {time}')
+    logging.debug("action time=%d player=%d %s", time, c+1, act)
     results = game.action(c, act)
-    logging.debug(f"{results[0]=} {results[1]=}")
+    logging.debug("results[0]=%s results[1]=%s", *results)
     if not quiet:
-        Reporter.report_field(game.field, results, c)
+        Reporter.report_field(game.field, observed(game, results, c), c)
     # (5c) notify results
-    print(results[0], file=active)
-    print(results[1], file=passive)
+    # results[0] stays buffered until active is flushed in the next turn
+    active.send(results[0])
+    passive.send(results[1])
+    passive.flush()
 
     if "outcome" in json.loads(results[0]):
         return c if json.loads(results[0])["outcome"] else 1 - c
     return -1
 
 
-def play_game(field, clients, *, quiet):
-    """play one game to return winner (-1 for draw)"""
+def observed(game, results, c):
+    """results with full observations for Reporter, as they may be deltas"""
+    view = []
+    for k, msg in enumerate(results):
+        info = json.loads(msg)
+        info.pop("delta", None)
+        info.update(game.observation(c if k == 0 else 1 - c))
+        view.append(json.dumps(info))
+    return view
+
+
+class GameResult(typing.NamedTuple):
+    """summary of a game returned by play_game()"""
+    winner: int                 #: index of the winner, -1 for draw
+    names: list
+    time: int                   #: number of actions played
+    duration: float             #: seconds
+    reason: str                 #: why the game ended
+    saved: int = 0              #: turns to the limit skipped by adjudication
+
+    @property
+    def name(self):
+        """name of the winner, or None for draw"""
+        return self.names[self.winner] if self.winner >= 0 else None
+
+    @property
+    def saved_seconds(self):
+        """estimate of the time adjudication saved, at the average pace"""
+        return self.duration / self.time * self.saved if self.time else 0.0
+
+
+class Adjudication(typing.NamedTuple):
+    """when play_game() declares a draw; 0 disables each early rule
+
+    The game is drawn after limit turns, or earlier when the same position
+    (GameControl.hash, including the side to move) occurs repetition
+    times, or when no ship loses HP for no_progress turns.
+    """
+    repetition: int = 0
+    no_progress: int = 0
+    limit: int = 10000
+
+    @property
+    def early(self):
+        return bool(self.repetition or self.no_progress)
+
+
+def total_hp(game):
+    return sum(ship.hp for client in game.clients
+               for ship in client.ships.values())
+
+
+class Progress:
+    """positions and HP of a game, watched for the rules of Adjudication"""
+    def __init__(self, rule: Adjudication, game: GameControl):
+        self.rule = rule
+        self.hp = total_hp(game)
+        self.idle = 0           # turns since HP last changed
+        self.seen = collections.Counter([game.hash])
+
+    def draw(self, game: GameControl):
+        """count the position after a turn and return why it is drawn,
+        or None
+        """
+        hp = total_hp(game)
+        if hp != self.hp:
+            self.hp, self.idle = hp, 0
+            # HP never comes back, so earlier positions cannot recur
+            self.seen.clear()
+        else:
+            self.idle += 1
+        if self.rule.repetition:
+            key = game.hash
+            self.seen[key] += 1
+            if self.seen[key] >= self.rule.repetition:
+                return 'repetition'
+        if self.rule.no_progress and self.idle >= self.rule.no_progress:
+            return 'no progress'
+        return None
+
+
+def play_game(field, clients, *, quiet, tracer=None, snapshot=0,
+              adjudication=Adjudication()) -> GameResult:
+    """play one game to return GameResult
+
+    Events are sent to tracer (tracing.Tracer) if given.
+    If snapshot > 0, observations are sent as deltas, with a full one every
+    snapshot turns (see GameControl).
+    adjudication (Adjudication) gives the turn limit and the rules of
+    early draws.
+    GameAborted is raised if a client leaves or places its ships wrongly;
+    the caller closes the clients.
+    """
+    start = time.perf_counter()
     # (2a) receive name from each client
     names = [cl.readline().rstrip() for cl in clients]
     logging.info(f'start game for {names}')
-    game = GameControl(field)
+    game = GameControl(field, tracer, snapshot)
     # (3) send field information to both clients
     field_rep = field.to_json()
     logging.debug(f'>> {field_rep}')
     for cl in clients:
-        print(field_rep, file=cl)
+        cl.send(field_rep)
     # (4) receive initial ship placement
     ships = [cl.readline() for cl in clients]
     logging.debug(f'<< {ships}')
@@ -210,56 +159,229 @@ def play_game(field, clients, *, quiet):
         game.initialize(*ships)
     except ValueError as e:
         logging.error(f'error in initial ship placement {e}')
-        exit(1)
+        raise GameAborted(f'error in initial ship placement {e}') from e
+    if tracer:
+        placements = [json.loads(_) for _ in ships]
+        tracer.on_game_start(GameStart(names, placements, game))
 
     # (5) main loop of game
     t = 0
-    limit = 10000
+    limit = adjudication.limit
     c = 0                       # turn to move
     if not quiet:
         Reporter.report_field(field, game.initial_condition(c), c)
     winner = -1
+    stats = [cl.stats.copy() for cl in clients]
+    progress = Progress(adjudication, game) if adjudication.early else None
+    drawn = None
     while winner == -1 and t < limit:
         winner = step(t+1, clients[c], clients[1-c], c, game, quiet=quiet)
         c = 1 - c
         t += 1
+        if winner == -1 and progress:
+            drawn = progress.draw(game)
+            if drawn:
+                break
+    report_transport(clients, stats, t)
+    if tracer:
+        tracer.on_game_end(GameEnd(winner, t))
 
     # (6) game ends
     if winner == -1:
         for client in clients:
-            print(Protocol.draw, file=client)
+            client.send(Protocol.draw)
         logging.info("draw")
     else:
-        print(Protocol.you_win, file=clients[winner])
-        print(Protocol.you_lose, file=clients[1-winner])
+        clients[winner].send(Protocol.you_win)
+        clients[1-winner].send(Protocol.you_lose)
         logging.info(f"player {1+winner} {names[winner]} win")
-    return winner, names[winner]
-
-
-def server_main(host: str, port: int, games: int, field: Field, *, quiet):
-    listen_addr = (host, port)
+    for client in clients:
+        client.flush()
+    reason = game.reason or drawn or 'turn limit'
+    duration = time.perf_counter() - start
+    result = GameResult(winner, names, t, duration, reason,
+                        limit - t if drawn else 0)
+    if drawn:
+        logging.info(f'draw by {drawn} at time {t}: {result.saved} turns'
+                     f' ({result.saved_seconds:.2f} s) saved')
+    return result
+
+
+def report_transport(clients, stats, turns):
+    """log socket calls and bytes per turn spent in the main loop"""
+    if turns == 0 or not logging.getLogger().isEnabledFor(logging.INFO):
+        return
+    used = [cl.stats - before for cl, before in zip(clients, stats)]
+    total = used[0] + used[1]
+    logging.info(
+        f'{turns} turns: {total.sends / turns:.2f} sends'
+        f' {total.recvs / turns:.2f} recvs'
+        f' {total.bytes_sent / turns:.1f} bytes sent per turn'
+    )
+
+
+def greet(sock, *, framed=False):
+    """wrap a newly connected socket and queue the greeting (2a)"""
+    client = sock if isinstance(sock, HouseSeat) else Transport(
+        sock, framed=framed
+    )
+    logging.debug(f'> {Protocol.greeting}')
+    client.send(Protocol.greeting)
+    return client
+
+
+def play_passed_game(field, socks, quiet, framed, tracer, snapshot=0,
+                     adjudication=Adjudication()):
+    """play one game on sockets passed to a worker process by server_main"""
+    clients = [greet(sock, framed=framed) for sock in socks]
+    try:
+        return play_game(field, clients, quiet=quiet, tracer=tracer,
+                         snapshot=snapshot, adjudication=adjudication)
+    finally:
+        for client in clients:
+            client.close()
+
+
+def player_ids(result, addrs):
+    return [f'{name}@{peer_name(addr)}'
+            for name, addr in zip(result.names, addrs)]
+
+
+def record(win_count, store, field, result, addrs, checkpoint=None,
+           saved=None):
+    ids = player_ids(result, addrs)
+    if result.winner >= 0:
+        win_count[ids[result.winner]] += 1
+    if saved is not None and result.saved:
+        saved['games'] += 1
+        saved['turns'] += result.saved
+        saved['seconds'] += result.saved_seconds
+    if checkpoint is not None:
+        # before the store, which may write the checkpoint when flushed
+        checkpoint.finished(win_count)
+    if store is not None:
+        store.record(ids, result, field.to_json())
+
+
+def server_main(host: str, port, games: int, field: Field, *, quiet,
+                framed=False, workers=0, tracer=None, store=None,
+                house=None, snapshot=0, checkpoint=None,
+                adjudication=Adjudication()):
+    """play games with clients connecting to (host, port)
+
+    If port is None, host is the path of a Unix-domain socket.
+    If workers > 0, each accepted pair of connections is passed to a pool of
+    that many worker processes, so that games run in parallel while this
+    process keeps accepting clients.  A tracer is then copied to each
+    worker, and its subscribers run there.
+    Each game is written to store (results.ResultStore) if given.
+    If house (a Player) is given, it takes one seat of each game in this
+    process, moving first in odd games and second in even ones, and only
+    one client connects per game.  house.on_session_start() is called
+    once.  house cannot be given with workers > 0 (ValueError), as games
+    in workers would each be played by a fresh copy of it.
+    snapshot is passed to play_game(); clients must accept deltas if > 0.
+    If checkpoint (checkpoint.Checkpointer) is given, progress is saved
+    after each game, and the run starts from the games and wins it has
+    loaded.
+    adjudication is passed to play_game(); the turns and time saved by
+    early draws are reported at the end.
+    A game aborted by a client (GameAborted, or OSError of its connection)
+    or failed in a worker is logged and not recorded, and the run goes on
+    with the next game.
+    """
+    if house is not None and workers > 0:
+        raise ValueError('house cannot be used with workers')
     win_count = collections.Counter()
-    with socket.create_server(listen_addr) as s:
-        # (1) server started
-        for g in range(games):
-            logging.info(f'waiting client players at {host}:{port}')
-            clients, addrs = [], []
-            for i in range(2):
-                conn, addr = s.accept()
-                logging.info(f'player {i+1} from {addr}')
-                c = conn.makefile(mode='rw', buffering=1)
+    saved = collections.Counter()
+    first = 0
+    if checkpoint is not None:
+        first = checkpoint.done
+        win_count.update(checkpoint.win_count)
+        if first:
+            logging.info(f'resume after {first} games')
+    where = host if port is None else f'{host}:{port}'
+    if house is not None:
+        house.on_session_start()
+    pool, running = None, {}
+    if workers > 0:
+        pool = concurrent.futures.ProcessPoolExecutor(workers)
+        # start workers now so that they inherit no sockets
+        pool.submit(int).result()
+
+    def collect(future):
+        socks, addrs = running.pop(future)
+        for sock in socks:
+            sock.close()
+        if future.exception() is not None:
+            logging.error(f'game failed in worker: {future.exception()!r}')
+        else:
+            record(win_count, store, field, future.result(), addrs,
+                   checkpoint, saved)
+
+    def accept(s, g):
+        """return sockets (or HouseSeat) and addresses of players of game g"""
+        socks, addrs = [], []
+        for i in range(2):
+            if house is not None and i == g % 2:
+                socks.append(HouseSeat(house))
+                addrs.append('house')
+                continue
+            conn, addr = s.accept()
+            logging.info(f'player {i+1} from {addr}')
+            socks.append(conn)
+            addrs.append(addr)
+        return socks, addrs
+
+    def submit(socks, addrs):
+        future = pool.submit(
+            play_passed_game, field, socks, quiet, framed, tracer, snapshot,
+            adjudication
+        )
+        running[future] = socks, addrs
+        if len(running) >= 2 * workers:
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                collect(future)
+
+    with listen(host, port) as s:
+        try:
+            # (1) server started
+            for g in range(first, games):
+                logging.info(f'waiting client players at {where}')
+                socks, addrs = accept(s, g)
+                if pool:
+                    submit(socks, addrs)
+                    continue
                 # (2a) server -> client: greeting
-                logging.debug(f'> {Protocol.greeting}')
-                print(Protocol.greeting, file=c)
-                clients.append(c)
-                addrs.append(addr)
-            # (2b), (3) - (6)
-            winner, name = play_game(field, clients, quiet=quiet)
-            for client in clients:
-                client.close()
-            if winner >= 0:
-                id = f'{name}@{addrs[winner][0]}'
-                win_count[id] += 1
+                clients = [greet(conn, framed=framed) for conn in socks]
+                # (2b), (3) - (6)
+                try:
+                    result = play_game(field, clients, quiet=quiet,
+                                       tracer=tracer, snapshot=snapshot,
+                                       adjudication=adjudication)
+                except (GameAborted, OSError) as e:
+                    # as a game failed in a worker, it is not recorded
+                    logging.error(f'game {g+1} aborted: {e!r}')
+                    continue
+                finally:
+                    for client in clients:
+                        client.close()
+                record(win_count, store, field, result, addrs, checkpoint,
+                       saved)
+            if pool:
+                for future in concurrent.futures.wait(running).done:
+                    collect(future)
+        finally:
+            if pool:
+                pool.shutdown(cancel_futures=True)
+            if port is None:
+                os.unlink(host)
     if games > 1:
         for name, wins in win_count.items():
             print(f'{name} win {wins} time(s)')
+    if saved:
+        print(f'{saved["games"]} draw(s) adjudicated early, saving'
+              f' {saved["turns"]} turns ({saved["seconds"]:.1f} s)')
@@ -26,6 +26,21 @@ class Ship:
         '''
         return self.__dict__
 
+    def copy(self):
+        """return an independent copy
+
+        >>> ship = Ship('c', (1, 2))
+        >>> other = ship.copy()
+        >>> other.deal_damage(1)
+        >>> ship.hp, other.hp
+        (2, 1)
+        """
+        other = Ship.__new__(Ship)
+        other.type = self.type
+        other.position = self.position
+        other.hp = self.hp
+        return other
+
     def move_to(self, to):
         """座標を変更する"""
         self.position = to
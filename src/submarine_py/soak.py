@@ -0,0 +1,193 @@
+"""Soak test of server_main(): resources of a long run, game by game.
+
+soak() runs server_main() in this process, in rounds of games against
+synthetic clients in child processes, for a number of games or hours.
+A Monitor subscribed to the tracer of the server samples, every few
+games,
+
+- rss: resident memory of this process in bytes
+- fds: open file descriptors of this process
+- traced: bytes allocated by Python and alive, by tracemalloc
+- latency: mean seconds per turn of the games since the last sample
+
+The first samples are taken after warmup games, once imports and caches
+have settled, and later ones are compared with it.  The run fails if a
+growth exceeds Thresholds; the allocations that grew most since the
+warm-up are reported, to find a leak.  Only Linux (/proc) is supported.
+"""
+from .field import Field
+from .player_base import play_on
+from .random_player import RandomPlayer
+from .server import Adjudication, server_main
+from .tracing import Tracer
+from .transport import Transport, connect, wait_for_path
+import contextlib
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+import tracemalloc
+import typing
+
+
+def rss() -> int:
+    """resident memory of this process in bytes"""
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def open_fds() -> int:
+    """number of open file descriptors of this process"""
+    return len(os.listdir('/proc/self/fd'))
+
+
+class Sample(typing.NamedTuple):
+    games: int
+    seconds: float              #: since the start of the monitor
+    rss: int
+    fds: int
+    traced: int
+    latency: float              #: mean seconds per turn since the last one
+
+
+class Thresholds(typing.NamedTuple):
+    """growth allowed from the warm-up sample to the last one"""
+    rss: int = 64 << 20         #: bytes
+    fds: int = 0
+    traced: int = 16 << 20      #: bytes
+    drift: float = 0.5          #: relative increase of latency per turn
+
+
+class Monitor:
+    """Sample resources every every games after warmup games
+
+    As a tracing subscriber, it times each game by on_game_start() and
+    on_game_end().  top is the number of allocations kept in the report.
+    close() stops tracemalloc if the monitor started it.
+    """
+    def __init__(self, *, every=50, warmup=20, top=10):
+        self.every = every
+        self.warmup = warmup
+        self.top = top
+        self.tracing = not tracemalloc.is_tracing()
+        if self.tracing:
+            tracemalloc.start()
+        self.start = time.monotonic()
+        self.games = 0
+        self.turns = 0
+        self.seconds = 0.0      # in games since the last sample
+        self.began = None
+        self.samples = []
+        self.snapshot = None
+
+    def close(self):
+        if self.tracing:
+            tracemalloc.stop()
+            self.tracing = False
+
+    def on_game_start(self, event):
+        self.began = time.perf_counter()
+
+    def on_game_end(self, event):
+        self.seconds += time.perf_counter() - self.began
+        self.turns += event.time
+        self.games += 1
+        if self.games == self.warmup or (
+                self.games > self.warmup
+                and (self.games - self.warmup) % self.every == 0):
+            self.sample()
+
+    def sample(self) -> Sample:
+        latency = self.seconds / self.turns if self.turns else 0.0
+        self.seconds, self.turns = 0.0, 0
+        if self.snapshot is None:
+            self.snapshot = tracemalloc.take_snapshot()
+        sample = Sample(self.games, time.monotonic() - self.start, rss(),
+                        open_fds(), tracemalloc.get_traced_memory()[0],
+                        latency)
+        self.samples.append(sample)
+        return sample
+
+    def growth(self) -> dict:
+        """growth of each measure from the first sample to the last, with
+        drift the relative change of latency"""
+        first, last = self.samples[0], self.samples[-1]
+        return {
+            'rss': last.rss - first.rss,
+            'fds': last.fds - first.fds,
+            'traced': last.traced - first.traced,
+            'drift': (last.latency / first.latency - 1
+                      if first.latency else 0.0),
+        }
+
+    def check(self, thresholds: Thresholds) -> list:
+        """messages of the growths exceeding thresholds"""
+        if len(self.samples) < 2:
+            return []
+        return [f'{name} grew by {value:.3g} (> {limit})'
+                for (name, value), limit
+                in zip(self.growth().items(), thresholds)
+                if value > limit]
+
+    def report(self) -> str:
+        out = [f'{"games":>7} {"seconds":>9} {"rss MiB":>9} {"fds":>5}'
+               f' {"traced MiB":>10} {"ms/turn":>9}']
+        for s in self.samples:
+            out.append(f'{s.games:>7} {s.seconds:>9.1f} {s.rss / 2**20:>9.1f}'
+                       f' {s.fds:>5} {s.traced / 2**20:>10.2f}'
+                       f' {s.latency * 1000:>9.3f}')
+        if self.snapshot is not None and self.top:
+            out.append(f'top allocations grown since game {self.warmup}:')
+            diffs = tracemalloc.take_snapshot().compare_to(self.snapshot,
+                                                           'lineno')
+            out.extend(f'  {diff}' for diff in diffs[:self.top])
+        return '\n'.join(out)
+
+
+def client(path, games, seed, framed, wait=30.0):
+    """play games as a RandomPlayer once the server listens at path"""
+    wait_for_path(path, wait)
+    # forked from the monitored process, which may be tracing
+    tracemalloc.stop()
+    player = RandomPlayer(seed)
+    player.on_session_start()
+    for _ in range(games):
+        with connect(path, None) as sock:
+            play_on(Transport(sock, framed=framed), player, quiet=True)
+
+
+def soak(field: Field, monitor: Monitor, *, games=1000, hours=0.0,
+         round=100, framed=False, snapshot=0, adjudication=Adjudication(),
+         subscribers=()) -> int:
+    """play games games, or rounds of round games for hours hours if
+    hours > 0, with monitor watching, and return the number of games
+
+    Each round is one server_main() on a new Unix-domain socket, with two
+    client processes of RandomPlayer.  subscribers are added to the tracer.
+    """
+    tracer = Tracer(monitor, *subscribers)
+    end = time.monotonic() + hours * 3600
+    played = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'soak.sock')
+        while (time.monotonic() < end) if hours else (played < games):
+            n = round if hours else min(round, games - played)
+            clients = [multiprocessing.Process(
+                target=client, args=(path, n, played * 2 + i, framed),
+                daemon=True) for i in range(2)]
+            for process in clients:
+                process.start()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    server_main(path, None, n, field, quiet=True,
+                                framed=framed, tracer=tracer,
+                                snapshot=snapshot, adjudication=adjudication)
+            finally:
+                for process in clients:
+                    process.join(10)
+                    process.terminate()
+                    process.join()
+                    process.close()
+            played += n
+    return played
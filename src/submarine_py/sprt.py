@@ -0,0 +1,137 @@
+"""Decide whether a new player is stronger than an old one with few games.
+
+Games are played in pairs sharing a seed, with seats swapped, and a
+sequential probability ratio test is updated after each game so that
+evaluation stops as soon as the result is decided.
+"""
+from .field import Field
+from .local import load_player, make_player, local_match
+import concurrent.futures
+import logging
+import math
+
+
+def score_of_elo(elo: float) -> float:
+    """expected score for the elo difference
+
+    >>> score_of_elo(0)
+    0.5
+    >>> round(score_of_elo(400), 3)
+    0.909
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+class SPRT:
+    """Sequential test of H0: elo = elo0 against H1: elo = elo1
+
+    Scores are 1, 0.5 or 0 for a win, draw or loss of the new player, and
+    the log-likelihood ratio uses the normal approximation of the mean score.
+
+    >>> test = SPRT(0, 50)
+    >>> for _ in range(30):
+    ...     test.update(1)
+    ...     test.update(0.5)
+    >>> test.status()
+    'H1'
+    """
+    def __init__(self, elo0=0.0, elo1=10.0, alpha=0.05, beta=0.05):
+        self.s0, self.s1 = score_of_elo(elo0), score_of_elo(elo1)
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.games = 0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.results = {1: 0, 0.5: 0, 0: 0}
+
+    def update(self, score: float):
+        self.games += 1
+        self.total += score
+        self.total_sq += score * score
+        self.results[score] += 1
+
+    def mean_var(self):
+        mean = self.total / self.games
+        return mean, self.total_sq / self.games - mean * mean
+
+    def llr(self) -> float:
+        if self.games == 0:
+            return 0.0
+        mean, var = self.mean_var()
+        if var <= 0:
+            # all results equal so far; assume one game of each other kind
+            var = 0.25 / self.games
+        return (self.games * (self.s1 - self.s0)
+                * (2 * mean - self.s0 - self.s1) / (2 * var))
+
+    def status(self):
+        """return 'H1' (new is stronger), 'H0' or None if undecided"""
+        llr = self.llr()
+        if llr >= self.upper:
+            return 'H1'
+        if llr <= self.lower:
+            return 'H0'
+        return None
+
+    def elo(self):
+        """return estimated elo difference and its 95% error margin"""
+        if self.games == 0:
+            return 0.0, math.inf
+        mean, var = self.mean_var()
+        mean = min(max(mean, 1e-3), 1 - 1e-3)
+        elo = -400 * math.log10(1 / mean - 1)
+        slope = 400 / (math.log(10) * mean * (1 - mean))
+        return elo, 1.96 * slope * math.sqrt(max(var, 0) / self.games)
+
+
+def play_pair(new: str, old: str, field: Field, seed: int):
+    """play two games with swapped seats and return the scores of new"""
+    new_cls, old_cls = load_player(new), load_player(old)
+    scores = []
+    for seat in (0, 1):
+        players = [make_player(new_cls, seed), make_player(old_cls, seed)]
+        if seat == 1:
+            players.reverse()
+        winner, = local_match(field, players)
+        scores.append(0.5 if winner == -1 else float(winner == seat))
+    return scores
+
+
+def evaluate(new: str, old: str, field: Field, *, test: SPRT,
+             max_games=10000, workers=0, seed=1):
+    """play pairs of games until test is decided or max_games are played
+
+    new and old are import paths of Player subclasses (module:Class).
+    Pairs run in a pool of workers processes, or in this process if 0.
+    Return test.status().
+    """
+    todo = iter(range(seed, seed + max_games // 2))
+    if workers == 0:
+        for s in todo:
+            for score in play_pair(new, old, field, s):
+                test.update(score)
+            if test.status():
+                break
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+            running = set()
+            while True:
+                while len(running) < 2 * workers and not test.status():
+                    s = next(todo, None)
+                    if s is None:
+                        break
+                    running.add(pool.submit(play_pair, new, old, field, s))
+                if not running:
+                    break
+                done, running = concurrent.futures.wait(
+                    running, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    for score in future.result():
+                        if not test.status():
+                            test.update(score)
+                if test.status():
+                    pool.shutdown(cancel_futures=True)
+                    break
+    logging.info(f'{test.games} games, llr {test.llr():.2f}')
+    return test.status()
@@ -0,0 +1,150 @@
+"""Symmetries of a Field, to identify equivalent placements and states.
+
+A field has up to 8 symmetries (rotations and reflections) when square,
+and up to 4 otherwise; only those that map rocks onto rocks are kept.
+Cells are numbered by their index in ``field.squares``, and each symmetry
+is stored as a permutation table of these numbers, so that mapping a
+placement or a state is a few list lookups.
+
+>>> sym = Symmetry(Field())
+>>> len(sym)
+8
+>>> len(Symmetry(Field(5, 5, Field.corner_rocks(5, 5))))
+8
+>>> len(Symmetry(Field(3, 4)))
+4
+>>> sym.names[sym.canonical_placement({'w': [4, 4]})[1]]
+'rot180'
+"""
+from .field import Field
+import functools
+
+#: affine maps (x, y) -> (x', y') for a field of width w and height h
+TRANSFORMS = {
+    'identity': lambda x, y, w, h: (x, y),
+    'flip_x': lambda x, y, w, h: (w - 1 - x, y),
+    'flip_y': lambda x, y, w, h: (x, h - 1 - y),
+    'rot180': lambda x, y, w, h: (w - 1 - x, h - 1 - y),
+    # the following need w == h
+    'transpose': lambda x, y, w, h: (y, x),
+    'anti_transpose': lambda x, y, w, h: (w - 1 - y, h - 1 - x),
+    'rot90': lambda x, y, w, h: (w - 1 - y, x),
+    'rot270': lambda x, y, w, h: (y, h - 1 - x),
+}
+
+
+class Symmetry:
+    """Symmetry group of a field
+
+    Symmetries are numbered from 0 (identity).  perms[g][i] is the cell
+    to which symmetry g maps cell i.
+    """
+    def __init__(self, field: Field):
+        self.field = field
+        w, h = field.width, field.height
+        self.cells = [tuple(p) for p in field.squares]
+        self.index = {p: i for i, p in enumerate(self.cells)}
+        self.names, self.maps, self.perms = [], [], []
+        for name, f in TRANSFORMS.items():
+            if name == 'transpose' and w != h:
+                break
+            image = [f(x, y, w, h) for x, y in self.cells]
+            if all(p in self.index for p in image):
+                self.names.append(name)
+                self.maps.append(f)
+                self.perms.append([self.index[p] for p in image])
+        identity = list(range(len(self.cells)))
+        self.inverse = [
+            next(j for j, q in enumerate(self.perms)
+                 if [q[i] for i in p] == identity)
+            for p in self.perms
+        ]
+
+    def __len__(self):
+        return len(self.perms)
+
+    def position(self, g, position):
+        """map a position by symmetry g
+
+        >>> Symmetry(Field()).position(6, [0, 1])
+        [3, 0]
+        """
+        x, y = self.maps[g](*position, self.field.width, self.field.height)
+        return [x, y]
+
+    def vector(self, g, offset):
+        """map a difference of positions, such as distance of a move"""
+        w, h = self.field.width, self.field.height
+        ox, oy = self.maps[g](0, 0, w, h)
+        x, y = self.maps[g](*offset, w, h)
+        return [x - ox, y - oy]
+
+    def placement(self, g, placement: dict) -> dict:
+        """map ship positions {type: position} by symmetry g"""
+        return {type: self.position(g, p) for type, p in placement.items()}
+
+    def canonical_placement(self, placement: dict):
+        """return the canonical form of a placement and the symmetry to it
+
+        Placements equivalent under the symmetries have the same canonical
+        form.
+        """
+        types = sorted(placement)
+        cells = [self.index[tuple(placement[t])] for t in types]
+        _, g = min((tuple(perm[i] for i in cells), g)
+                   for g, perm in enumerate(self.perms))
+        return self.placement(g, placement), g
+
+    def state_key(self, game, g=0):
+        """hashable key of a GameControl state mapped by symmetry g"""
+        perm = self.perms[g]
+        index = self.index
+        return (game.turn,) + tuple(
+            tuple(sorted((ship.type, perm[index[tuple(ship.position)]],
+                          ship.hp)
+                         for ship in client.ships.values()))
+            for client in game.clients
+        )
+
+    def canonical_state(self, game):
+        """return the canonical key of a GameControl state and the symmetry
+        that maps the state to it"""
+        return min((self.state_key(game, g), g) for g in range(len(self)))
+
+    def action(self, g, act: dict) -> dict:
+        """map an action made by Player.move() or Player.attack()"""
+        if "attack" in act:
+            return {"attack": {"to": self.position(g, act["attack"]["to"])}}
+        return {"move": {"ship": act["move"]["ship"],
+                         "to": self.position(g, act["move"]["to"])}}
+
+    def result(self, g, result: dict) -> dict:
+        """map the "result" part of a message from the server"""
+        if result.get("attacked"):
+            attacked = dict(result["attacked"])
+            attacked["position"] = self.position(g, attacked["position"])
+            return {"attacked": attacked}
+        if result.get("moved"):
+            moved = dict(result["moved"])
+            moved["distance"] = self.vector(g, moved["distance"])
+            return {"moved": moved}
+        return result
+
+    def unmap_action(self, g, act: dict) -> dict:
+        """map an action chosen in the canonical frame back to the original"""
+        return self.action(self.inverse[g], act)
+
+    def unmap_result(self, g, result: dict) -> dict:
+        """map a result in the canonical frame back to the original"""
+        return self.result(self.inverse[g], result)
+
+
+@functools.lru_cache(maxsize=64)
+def symmetry_of_key(key):
+    height, width, rock = key
+    return Symmetry(Field(height, width, [list(p) for p in rock]))
+
+
+def symmetry_of(field: Field) -> Symmetry:
+    """return a shared Symmetry of fields with the same layout as field"""
+    return symmetry_of_key(field.key)
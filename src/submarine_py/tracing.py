@@ -0,0 +1,137 @@
+"""Hooks to observe what the engine does during a game.
+
+A subscriber is any object defining some of the methods in EVENTS, each
+taking one event object.  Engines hold a Tracer (or None) and build events
+only ``if tracer:``, so nothing is done unless someone subscribed.
+
+>>> class Printer:
+...     def on_action(self, event):
+...         print(event.player, event.action)
+>>> tracer = Tracer()
+>>> bool(tracer)
+False
+>>> tracer.subscribe(Printer())
+>>> bool(tracer)
+True
+>>> tracer.on_action(Action(1, 0, '{"attack": {"to": [0, 0]}}'))
+0 {"attack": {"to": [0, 0]}}
+>>> tracer.on_result(Result(1, 0, ['{}', '{}']))  # no subscriber
+"""
+import collections
+import dataclasses
+import json
+import sys
+
+EVENTS = ('on_game_start', 'on_turn_start', 'on_action', 'on_result',
+          'on_game_end')
+
+
+@dataclasses.dataclass
+class GameStart:
+    names: list                 #: names of players
+    placements: list            #: initial positions of ships of each player
+    game: object                #: GameControl, live during the game
+
+
+@dataclasses.dataclass
+class TurnStart:
+    time: int                   #: 1 for the first action
+    player: int                 #: 0 or 1 to move
+
+
+@dataclasses.dataclass
+class Action:
+    time: int
+    player: int
+    action: str                 #: json message from the player
+
+
+@dataclasses.dataclass
+class Result:
+    time: int
+    player: int
+    results: list               #: json messages to the player and opponent
+
+
+@dataclasses.dataclass
+class GameEnd:
+    winner: int                 #: -1 for draw
+    time: int                   #: number of actions played
+
+
+class Tracer:
+    """Dispatch events to subscribers"""
+    def __init__(self, *subscribers):
+        self.hooks = {name: [] for name in EVENTS}
+        self.count = 0
+        for subscriber in subscribers:
+            self.subscribe(subscriber)
+
+    def subscribe(self, subscriber):
+        for name in EVENTS:
+            hook = getattr(subscriber, name, None)
+            if hook is not None:
+                self.hooks[name].append(hook)
+                self.count += 1
+
+    def __bool__(self):
+        return self.count > 0
+
+    def emit(self, name, event):
+        for hook in self.hooks[name]:
+            hook(event)
+
+    def on_game_start(self, event: GameStart):
+        self.emit('on_game_start', event)
+
+    def on_turn_start(self, event: TurnStart):
+        self.emit('on_turn_start', event)
+
+    def on_action(self, event: Action):
+        self.emit('on_action', event)
+
+    def on_result(self, event: Result):
+        self.emit('on_result', event)
+
+    def on_game_end(self, event: GameEnd):
+        self.emit('on_game_end', event)
+
+
+class Recorder:
+    """Keep events of the last n turns of the current game for post-mortems
+
+    >>> recorder = Recorder(2)
+    >>> for t in range(1, 4):
+    ...     recorder.on_turn_start(TurnStart(t, t % 2))
+    >>> [e.time for e in recorder.events()]
+    [2, 3]
+    """
+    def __init__(self, n: int = 20):
+        self.turns = collections.deque(maxlen=n)
+        self.names = None
+
+    def on_game_start(self, event: GameStart):
+        self.turns.clear()
+        self.names = event.names
+
+    def on_turn_start(self, event: TurnStart):
+        self.turns.append([event])
+
+    def on_action(self, event: Action):
+        if self.turns:
+            self.turns[-1].append(event)
+
+    def on_result(self, event: Result):
+        if self.turns:
+            self.turns[-1].append(event)
+
+    def events(self):
+        return [event for turn in self.turns for event in turn]
+
+    def dump(self, file=sys.stderr):
+        """write recorded events as json lines"""
+        print(json.dumps({'names': self.names}), file=file)
+        for event in self.events():
+            record = {'event': type(event).__name__}
+            record.update(dataclasses.asdict(event))
+            print(json.dumps(record), file=file)
@@ -0,0 +1,187 @@
+import dataclasses
+import os
+import socket
+import stat
+import struct
+import time
+
+HEADER = struct.Struct('>I')
+
+
+@dataclasses.dataclass
+class TransportStats:
+    """Counters of socket calls and bytes of a Transport
+
+    >>> a = TransportStats(sends=3, bytes_sent=40)
+    >>> b = TransportStats(sends=1, bytes_sent=10, recvs=2)
+    >>> a + b
+    TransportStats(sends=4, bytes_sent=50, recvs=2, bytes_received=0)
+    >>> (a - b).sends
+    2
+    """
+    sends: int = 0
+    bytes_sent: int = 0
+    recvs: int = 0
+    bytes_received: int = 0
+
+    def __add__(self, other):
+        return TransportStats(*[
+            getattr(self, f.name) + getattr(other, f.name)
+            for f in dataclasses.fields(self)
+        ])
+
+    def __sub__(self, other):
+        return TransportStats(*[
+            getattr(self, f.name) - getattr(other, f.name)
+            for f in dataclasses.fields(self)
+        ])
+
+    def copy(self):
+        return dataclasses.replace(self)
+
+
+class Transport:
+    """Message connection over a socket with explicit flushing.
+
+    send() only appends a message to the output buffer, and flush() writes
+    everything buffered with a single sendall().  readline() flushes pending
+    output first, so a peer never waits for a message still in our buffer.
+
+    Messages are newline terminated by default.  With ``framed=True`` each
+    message is instead preceded by its length in bytes as a 4-byte big-endian
+    integer; both peers must agree on the framing.
+
+    Nagle's algorithm is disabled on TCP sockets since batching is done here;
+    otherwise two flushes in a row would wait for a delayed ACK.
+    """
+    def __init__(self, sock, *, framed=False):
+        if sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self.framed = framed
+        self.stats = TransportStats()
+        self.wbuf = bytearray()
+        self.rbuf = bytearray()
+
+    def send(self, msg: str):
+        """append a message to the output buffer"""
+        data = msg.encode()
+        if self.framed:
+            self.wbuf += HEADER.pack(len(data))
+            self.wbuf += data
+        else:
+            self.wbuf += data
+            self.wbuf += b'\n'
+
+    def flush(self):
+        """send all buffered messages at once"""
+        if not self.wbuf:
+            return
+        self.sock.sendall(self.wbuf)
+        self.stats.sends += 1
+        self.stats.bytes_sent += len(self.wbuf)
+        self.wbuf.clear()
+
+    def _fill(self):
+        data = self.sock.recv(65536)
+        self.stats.recvs += 1
+        self.stats.bytes_received += len(data)
+        self.rbuf += data
+        return len(data) > 0
+
+    def readline(self) -> str:
+        """return the next message with a trailing newline, or '' at EOF"""
+        self.flush()
+        if self.framed:
+            while len(self.rbuf) < HEADER.size:
+                if not self._fill():
+                    return ''
+            size, = HEADER.unpack_from(self.rbuf)
+            end = HEADER.size + size
+            while len(self.rbuf) < end:
+                if not self._fill():
+                    return ''
+            msg = self.rbuf[HEADER.size:end].decode() + '\n'
+        else:
+            end = self.rbuf.find(b'\n')
+            while end < 0:
+                start = len(self.rbuf)
+                if not self._fill():
+                    return ''
+                end = self.rbuf.find(b'\n', start)
+            end += 1
+            msg = self.rbuf[:end].decode()
+        del self.rbuf[:end]
+        return msg
+
+    def close(self):
+        """flush pending messages if possible and close the socket"""
+        try:
+            self.flush()
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def listen(host: str, port):
+    """return a listening socket
+
+    A TCP socket bound to (host, port), or a Unix-domain socket bound to the
+    path host if port is None.  A stale socket file at the path is replaced,
+    but any other file there raises FileExistsError.
+    """
+    if port is not None:
+        return socket.create_server((host, port))
+    if os.path.lexists(host):
+        if not stat.S_ISSOCK(os.lstat(host).st_mode):
+            raise FileExistsError(f'{host} exists and is not a socket')
+        os.unlink(host)
+    # bound under another name and renamed once listening, so that a client
+    # that finds the path, e.g., by wait_for_path(), can connect at once
+    tmp = f'{host}.{os.getpid()}.tmp'
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.bind(tmp)
+        sock.listen()
+        os.rename(tmp, host)
+    except BaseException:
+        sock.close()
+        if os.path.lexists(tmp):
+            os.unlink(tmp)
+        raise
+    return sock
+
+
+def connect(host: str, port):
+    """return a socket connected to (host, port), or to the Unix-domain
+    socket at the path host if port is None"""
+    if port is not None:
+        return socket.create_connection((host, port))
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(host)
+    return sock
+
+
+def wait_for_path(path, timeout=10.0):
+    """wait until a server listens at the Unix-domain socket path, or
+    raise TimeoutError after timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(path):
+        if time.monotonic() > deadline:
+            raise TimeoutError(f'no server at {path}')
+        time.sleep(0.001)
+
+
+def peer_name(addr) -> str:
+    """return the host part of an address from accept()
+
+    >>> peer_name(('127.0.0.1', 40000))
+    '127.0.0.1'
+    >>> peer_name('')
+    'local'
+    >>> peer_name('house')
+    'house'
+    """
+    if isinstance(addr, tuple):
+        return addr[0]
+    return addr or 'local'
@@ -0,0 +1,122 @@
+"""Zobrist hashing of game states and a transposition table.
+
+Client keeps the xor of the keys of its ships (type, position and hp of
+each ship afloat), updated incrementally on move and on damage, and
+GameControl.hash combines both fleets with the side to move.
+"""
+from .field import Field
+from .ship import Ship
+import functools
+import random
+
+
+class ZobristKeys:
+    """random 64-bit keys of ships of each side and of the side to move"""
+    def __init__(self, field: Field, seed=0):
+        rng = random.Random(seed)
+        self.keys = {
+            (side, type, x, y, hp): rng.getrandbits(64)
+            for side in (0, 1)
+            for type, max_hp in Ship.MAX_HPS.items()
+            for x, y in field.squares
+            for hp in range(1, max_hp + 1)
+        }
+        self.side = rng.getrandbits(64)
+
+    def ship(self, side, ship: Ship) -> int:
+        x, y = ship.position
+        return self.keys[side, ship.type, x, y, ship.hp]
+
+    def fleet(self, side, ships) -> int:
+        """hash of ships from scratch"""
+        value = 0
+        for ship in ships:
+            value ^= self.ship(side, ship)
+        return value
+
+
+@functools.lru_cache(maxsize=64)
+def keys_of_key(key):
+    height, width, rock = key
+    return ZobristKeys(Field(height, width, [list(p) for p in rock]))
+
+
+def keys_of(field: Field) -> ZobristKeys:
+    """return keys shared by fields with the same layout"""
+    return keys_of_key(field.key)
+
+
+class TranspositionTable:
+    """Fixed-size table of search results indexed by a Zobrist hash
+
+    Each slot holds (key, depth, value, move, generation).  On a collision
+    the replacement policy decides whether a new entry overwrites the old:
+
+    - 'always': always
+    - 'depth': if the new entry is searched at least as deep
+    - 'age': if the old entry is from an earlier search (new_search()), or
+      otherwise as 'depth'
+
+    >>> tt = TranspositionTable(4, replacement='depth')
+    >>> tt.store(5, depth=3, value=0.5, move='m')
+    >>> tt.probe(5)
+    (3, 0.5, 'm')
+    >>> tt.store(9, depth=1, value=0.0)   # same slot, shallower
+    >>> tt.probe(9) is None, tt.probe(5)
+    (True, (3, 0.5, 'm'))
+    >>> round(tt.hit_rate, 2)
+    0.67
+    """
+    POLICIES = ('always', 'depth', 'age')
+
+    def __init__(self, size=1 << 16, *, replacement='depth'):
+        if replacement not in self.POLICIES:
+            raise ValueError(f'unknown replacement policy {replacement}')
+        self.size = 1 << max(size - 1, 1).bit_length()
+        self.mask = self.size - 1
+        self.replacement = replacement
+        self.keys = [None] * self.size
+        self.entries = [None] * self.size
+        self.generation = 0
+        self.probes = self.hits = 0
+        self.stores = self.overwrites = self.rejects = 0
+
+    def new_search(self):
+        """mark existing entries as old for the 'age' policy"""
+        self.generation += 1
+
+    def probe(self, key):
+        """return (depth, value, move) stored for key, or None"""
+        self.probes += 1
+        i = key & self.mask
+        if self.keys[i] != key:
+            return None
+        self.hits += 1
+        return self.entries[i][:3]
+
+    def store(self, key, depth, value, move=None):
+        i = key & self.mask
+        old = self.entries[i]
+        if old is not None and self.keys[i] != key:
+            if not self.replaces(old, depth):
+                self.rejects += 1
+                return
+            self.overwrites += 1
+        self.stores += 1
+        self.keys[i] = key
+        self.entries[i] = (depth, value, move, self.generation)
+
+    def replaces(self, old, depth):
+        if self.replacement == 'always':
+            return True
+        if self.replacement == 'age' and old[3] != self.generation:
+            return True
+        return depth >= old[0]
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+    def clear(self):
+        self.keys = [None] * self.size
+        self.entries = [None] * self.size
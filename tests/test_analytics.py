@@ -0,0 +1,56 @@
+from submarine_py import Field
+from submarine_py.analytics import GameLog, KINDS, scan, summary
+from submarine_py.local import house_match
+from submarine_py.tracing import Tracer
+from test_local import SimplePlayer
+import json
+
+
+def record_games(path, games, seed):
+    players = [SimplePlayer(seed), SimplePlayer(seed + 1)]
+    players[1].name = lambda: 'other-player'
+    tracer = Tracer(GameLog(str(path)))
+    return house_match(Field(), players, games=games, tracer=tracer)
+
+
+def test_game_log(tmp_path):
+    path = tmp_path / 'games.jsonl'
+    winners = record_games(path, 3, 1)
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r['winner'] for r in records] == winners
+    record = records[0]
+    assert record['names'] == ['simple-player', 'other-player']
+    assert record['field'] == {'height': 5, 'width': 5, 'rock': []}
+    for c, action, result in record['turns']:
+        assert c in (0, 1)
+        assert ('attacked' in result) == ('attack' in action)
+
+
+def test_scan(tmp_path):
+    paths = [tmp_path / 'a.jsonl', tmp_path / 'b.jsonl']
+    record_games(paths[0], 3, 1)
+    record_games(paths[1], 2, 5)
+    corpus = scan(paths)
+    assert corpus.games == 5
+    key = Field().key
+    maps = corpus.maps[key, 'simple-player']
+    assert maps.games == 5
+    assert sum(maps.placements()) == 5 * 3
+    attacks = sum(sum(grid) for grid in maps.turns['attack'])
+    expected = sum(
+        1
+        for path in paths
+        for line in path.read_text().splitlines()
+        for c, action, result in json.loads(line)['turns']
+        if c == 0 and result.get('attacked')
+    )
+    assert attacks == expected > 0
+    hits = sum(maps.total('hit'))
+    assert 0 < hits <= attacks
+    parallel = scan(paths, workers=2)
+    other = parallel.maps[key, 'simple-player']
+    for kind in KINDS:
+        assert other.total(kind) == maps.total(kind)
+    text = summary(corpus, name='other-player')
+    assert text.startswith('other-player on 5x5: 5 games')
+    assert 'simple-player' not in text
@@ -0,0 +1,100 @@
+from submarine_py import Field
+from submarine_py.batching import BatchScheduler
+from submarine_py.local import local_match
+from test_local import SimplePlayer
+import asyncio
+import concurrent.futures
+import pytest
+import threading
+
+
+def test_batches():
+    sizes = []
+
+    def double(xs):
+        sizes.append(len(xs))
+        return [x * 2 for x in xs]
+
+    with BatchScheduler(double, max_batch=8, max_latency=0.05) as scheduler:
+        futures = [scheduler.submit(i) for i in range(20)]
+        assert [f.result() for f in futures] == [i * 2 for i in range(20)]
+    assert max(sizes) == 8
+    assert scheduler.stats.requests == 20
+    assert scheduler.stats.batches == len(sizes) < 20
+    assert 0 < scheduler.stats.fill_rate <= 1
+
+
+def test_error():
+    with BatchScheduler(lambda xs: xs[1:]) as scheduler:
+        with pytest.raises(ValueError):
+            scheduler(1)
+
+
+def test_async():
+    async def main(scheduler):
+        return await asyncio.gather(
+            *[scheduler.evaluate_async(i) for i in range(10)]
+        )
+
+    with BatchScheduler(lambda xs: [-x for x in xs]) as scheduler:
+        assert asyncio.run(main(scheduler)) == [-i for i in range(10)]
+
+
+def test_cancelled():
+    async def main(scheduler):
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(scheduler.evaluate_async(1), 0.01)
+        return await asyncio.wait_for(scheduler.evaluate_async(2), 2)
+
+    with BatchScheduler(lambda xs: [-x for x in xs],
+                        max_latency=0.2) as scheduler:
+        assert asyncio.run(main(scheduler)) == -2
+        assert scheduler.thread.is_alive()
+        assert scheduler.submit(3).result(timeout=2) == -3
+    assert scheduler.stats.requests == 2
+
+
+class BatchedPlayer(SimplePlayer):
+    def __init__(self, seed, scheduler):
+        super().__init__(seed)
+        self.scheduler = scheduler
+
+    def action(self):
+        # the "model" only echoes the number of own ships
+        assert self.scheduler(len(self.ships)) == len(self.ships)
+        return super().action()
+
+
+def test_concurrent_games():
+    with BatchScheduler(lambda xs: xs, max_batch=4) as scheduler:
+        def play(seed):
+            players = [BatchedPlayer(seed, scheduler),
+                       BatchedPlayer(seed + 100, scheduler)]
+            return local_match(Field(), players)[0]
+
+        with concurrent.futures.ThreadPoolExecutor(4) as pool:
+            winners = list(pool.map(play, range(4)))
+    assert all(w in (0, 1) for w in winners)
+    assert scheduler.stats.requests > scheduler.stats.batches
+
+
+def test_base_exception():
+    started = threading.Event()
+    release = threading.Event()
+
+    def evaluate(xs):
+        started.set()
+        release.wait(10)
+        raise KeyboardInterrupt
+
+    scheduler = BatchScheduler(evaluate, max_batch=1)
+    first = scheduler.submit(1)
+    started.wait(10)
+    queued = scheduler.submit(2)
+    release.set()
+    for future in (first, queued):
+        with pytest.raises(KeyboardInterrupt):
+            future.result(timeout=10)
+    with pytest.raises(RuntimeError):
+        scheduler.submit(3)
+    scheduler.close()
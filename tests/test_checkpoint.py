@@ -0,0 +1,121 @@
+from submarine_py.checkpoint import (
+    Checkpointer, load, restore_game, snapshot_game, write_atomic
+)
+from submarine_py.results import ResultStore
+from submarine_py.tracing import Tracer
+from test_game_control import make_game, state
+from test_local import SimplePlayer, join, start_clients, start_server
+import collections
+import json
+import os
+
+
+def test_snapshot_restore():
+    game = make_game()
+    game.action(0, json.dumps({"attack": {"to": [1, 1]}}))
+    game.action(1, json.dumps({"move": {"ship": "c", "to": [3, 0]}}))
+    data = json.loads(json.dumps(snapshot_game(game)))
+    other = restore_game(data)
+    assert state(other) == state(game)
+    assert other.hash == game.hash
+    assert other.time == 2 and other.clients[1].types == ["w", "c", "s"]
+
+
+def test_write_atomic(tmp_path):
+    path = tmp_path / 'checkpoint.json'
+    write_atomic(path, {'version': 1, 'done': 3})
+    write_atomic(path, {'version': 1, 'done': 4})
+    assert load(path)['done'] == 4
+    assert os.listdir(tmp_path) == ['checkpoint.json']
+
+
+def run_server(tmp_path, games, checkpoint):
+    path = str(tmp_path / 'server.sock')
+    server = start_server(path, games, house=SimplePlayer(1),
+                          checkpoint=checkpoint, tracer=Tracer(checkpoint))
+    return server, path
+
+
+def test_resume(tmp_path):
+    path = tmp_path / 'checkpoint.json'
+    checkpoint = Checkpointer(path, interval=0)
+    server, sock = run_server(tmp_path, 2, checkpoint)
+    join(start_clients(sock, [SimplePlayer(2), SimplePlayer(3)]) + [server])
+    checkpoint.close()
+    data = load(path)
+    assert data['done'] == 2
+    assert sum(data['win_count'].values()) == 2
+    assert data['in_flight'] is None
+
+    # resume a run of 3 games: only one more is played
+    checkpoint = Checkpointer(path, resume=True)
+    assert checkpoint.done == 2
+    server, sock = run_server(tmp_path, 3, checkpoint)
+    join(start_clients(sock, [SimplePlayer(4)]) + [server])
+    checkpoint.close()
+    data = load(path)
+    assert data['done'] == 3
+    assert sum(data['win_count'].values()) == 3
+
+
+def test_store_not_ahead(tmp_path):
+    path = tmp_path / 'checkpoint.json'
+    store = ResultStore(':memory:', batch_size=1)
+    checkpoint = Checkpointer(path, interval=60, store=store)
+    win_count = collections.Counter()
+    for done in (1, 2, 3):
+        win_count['a'] += 1
+        checkpoint.finished(win_count)
+        store.add(['a', 'b'], 0)
+        # written before the transaction, not after the interval
+        assert load(path)['done'] == done
+    checkpoint.close()
+    store.close()
+
+
+def test_store_crash(tmp_path):
+    path = tmp_path / 'checkpoint.json'
+    db = str(tmp_path / 'results.db')
+    store = ResultStore(db, batch_size=64, interval=60)
+    checkpoint = Checkpointer(path, interval=0, store=store)
+    win_count = collections.Counter()
+    for _ in range(10):
+        win_count['a'] += 1
+        checkpoint.finished(win_count)
+        store.add(['a', 'b'], 0)
+
+    def saved():
+        # what a resumed run would find
+        other = ResultStore(db)
+        rows = other.leaderboard()
+        other.close()
+        done = load(path)['done'] if os.path.exists(path) else 0
+        return done, sum(games for _, games, *_ in rows) // 2
+
+    # crash: neither the store nor the checkpoint is closed, but the
+    # writer thread has had all the time it wanted
+    checkpoint.write_latest()
+    assert saved() == (0, 0)
+    store.flush()
+    assert saved() == (10, 10)
+    assert load(path)['win_count'] == {'a': 10}
+    checkpoint.close()
+    store.close()
+
+
+def test_in_flight(tmp_path):
+    path = tmp_path / 'checkpoint.json'
+    checkpoint = Checkpointer(path, interval=0)
+    game = make_game()
+
+    class Event:
+        names = ['a', 'b']
+    Event.game = game
+    checkpoint.on_game_start(Event)
+    game.action(0, json.dumps({"attack": {"to": [1, 1]}}))
+    checkpoint.on_result(None)
+    checkpoint.close()
+    data = load(path)
+    assert data['in_flight']['names'] == ['a', 'b']
+    assert state(restore_game(data['in_flight'])) == state(game)
+    assert Checkpointer(path, resume=True).interrupted['time'] == 1
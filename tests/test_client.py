@@ -98,3 +98,18 @@ def test_client_near():
     c = Client(field, {"w": [0, 0], "c": [0, 1], "s": [1, 0]})
     assert c.near([2, 2]) == []
     assert c.ships["c"], c.near([0, 2])
+
+
+def test_client_index():
+    field = Field()
+
+    c = Client(field, {"w": [0, 0], "c": [0, 1], "s": [1, 0]})
+    assert c.move("w", [0, 3])
+    assert c.overlap([0, 0]) is None
+    assert c.ships["w"] == c.overlap([0, 3])
+    assert [c.ships["w"], c.ships["c"]] == c.near([0, 2])
+    assert c.in_attack_range([1, 4])
+    assert not c.in_attack_range([3, 3])
+    c.attacked([1, 0])
+    assert c.overlap([1, 0]) is None
+    assert not c.in_attack_range([2, 0])
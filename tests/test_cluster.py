@@ -0,0 +1,98 @@
+from submarine_py import Field
+from submarine_py.cluster import Coordinator, Job, league, run_job, worker_main
+from submarine_py.transport import Transport, connect, wait_for_path
+from test_local import join
+import json
+import threading
+import time
+
+PLAYERS = ['test_local:SimplePlayer', 'test_cluster:OtherPlayer']
+
+
+class OtherPlayer:
+    pass
+
+
+def test_run_job():
+    job = Job(3, [PLAYERS[0]] * 2, Field().to_json(), 5)
+    result = run_job(job)
+    assert result['id'] == 3 and result['winner'] in (0, 1)
+    again = run_job(job)
+    assert {**again, 'duration': 0} == {**result, 'duration': 0}
+
+
+def start_coordinator(path, jobs, **kwargs):
+    coordinator = Coordinator(jobs, poll=0.05, **kwargs)
+    out = {}
+    thread = threading.Thread(
+        target=lambda: out.update(coordinator.run(path, None)), daemon=True
+    )
+    thread.start()
+    wait_for_path(path)
+    return coordinator, thread, out
+
+
+def start_workers(path, n):
+    threads = [threading.Thread(target=worker_main, args=(path, None),
+                                kwargs={'name': f'w{i}'}, daemon=True)
+               for i in range(n)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def test_league(tmp_path):
+    path = str(tmp_path / 'coordinator.sock')
+    jobs = league([PLAYERS[0]] * 3, Field(), 4)
+    finished = []
+    coordinator, thread, results = start_coordinator(
+        path, jobs, on_result=lambda job, result: finished.append(job.id))
+    join(start_workers(path, 3) + [thread])
+    assert sorted(finished) == sorted(results) == list(range(12))
+    assert not coordinator.failed
+    # same seeds, same games as in one process
+    assert [results[job.id]['winner'] for job in jobs] == [
+        run_job(job)['winner'] for job in jobs]
+
+
+def fake_worker(path, then):
+    """take a job and then 'close' the connection or 'hang'"""
+    transport = Transport(connect(path, None))
+    transport.send(json.dumps({'hello': 'fake'}))
+    job = json.loads(transport.readline())['job']
+    if then == 'close':
+        transport.close()
+    return transport, job
+
+
+def test_lost_worker(tmp_path):
+    path = str(tmp_path / 'coordinator.sock')
+    jobs = league([PLAYERS[0]] * 2, Field(), 2)
+    coordinator, thread, results = start_coordinator(path, jobs)
+    fake_worker(path, 'close')
+    join(start_workers(path, 1) + [thread])
+    assert sorted(results) == [0, 1]
+    assert sum(coordinator.attempts.values()) == 3
+
+
+def test_lease_expired(tmp_path):
+    path = str(tmp_path / 'coordinator.sock')
+    jobs = league([PLAYERS[0]] * 2, Field(), 2)
+    coordinator, thread, results = start_coordinator(path, jobs, lease=0.2)
+    transport, job = fake_worker(path, 'hang')
+    time.sleep(0.3)
+    join(start_workers(path, 1) + [thread])
+    assert sorted(results) == [0, 1]
+    # a late result is ignored
+    coordinator.complete('fake', {'id': job['id'], 'winner': 9})
+    assert results[job['id']]['winner'] != 9
+    transport.close()
+
+
+def test_failed_job(tmp_path):
+    path = str(tmp_path / 'coordinator.sock')
+    jobs = [Job(0, PLAYERS, Field().to_json(), 1)]
+    coordinator, thread, results = start_coordinator(path, jobs, retries=1)
+    join(start_workers(path, 1) + [thread])
+    assert results == {} and list(coordinator.failed) == [0]
+    assert coordinator.attempts[0] == 2
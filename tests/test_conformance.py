@@ -0,0 +1,107 @@
+from submarine_py import GameControl, Field
+from submarine_py.game import Client
+from submarine_py.conformance import (
+    Case, check, compare, explore, minimize
+)
+from submarine_py.ship import Ship
+import json
+
+
+class UnsortedClient(Client):
+    def near(self, to):
+        return sorted(super().near(to), key=lambda ship: ship.type)
+
+
+class UnsortedNear(GameControl):
+    """reports near ships by type instead of by placement order"""
+    def initialize(self, json1, json2):
+        super().initialize(json1, json2)
+        for client in self.clients:
+            client.__class__ = UnsortedClient
+
+
+class AcceptOverlap(GameControl):
+    """places ships without checking overlaps"""
+    def initialize(self, json1, json2):
+        self.clients = []
+        for side, msg in enumerate((json1, json2)):
+            client = Client(self.field, {}, side=side)
+            for type, position in json.loads(msg).items():
+                client.ships[type] = Ship(type, position)
+                client.index[tuple(position)] = client.ships[type]
+            client.types = list(client.ships)
+            client.rank = {t: i for i, t in enumerate(client.types)}
+            self.clients.append(client)
+        self.turn = self.time = 0
+        self.reason = None
+
+
+class NoReason(GameControl):
+    def action(self, c, json_msg):
+        results = super().action(c, json_msg)
+        self.reason = None
+        return results
+
+
+def test_reference_conforms():
+    assert check(GameControl, cases=300) is None
+
+
+def test_explore_is_reproducible():
+    assert str(explore(NoReason, 3)) == str(explore(NoReason, 3))
+
+
+def test_unsorted_near():
+    d = check(UnsortedNear, cases=2000)
+    assert d is not None
+    assert d.turn == len(d.case.actions) >= 1
+    assert len(d.case.actions) <= 6
+    # the minimized case still fails, and round trips through JSON
+    case = Case.from_json(d.case.to_json())
+    assert str(compare(UnsortedNear, case)) == str(d)
+    assert 'near' in str(d)
+
+
+def test_no_reason():
+    d = check(NoReason, cases=100, workers=2)
+    assert d is not None
+    assert d.expected[1] is not None and d.actual[1] is None
+    assert len(d.case.actions) == 1
+
+
+def test_initialize_errors():
+    field = Field()
+    bad = json.dumps({"w": [0, 0], "c": [0, 0]})
+    good = json.dumps({"w": [1, 1]})
+    case = Case(field, [bad, good], [])
+    # the reference rejects the overlap, and so does itself
+    assert compare(GameControl, case) is None
+    d = compare(AcceptOverlap, case)
+    assert d.turn == 0
+    assert d.expected == ('error', 'ValueError')
+    assert d.actual != d.expected
+    assert compare(AcceptOverlap, case._replace(placements=[good, good])) \
+        is None
+
+
+class Flaky(GameControl):
+    """diverges on every other game"""
+    games = 0
+
+    def initialize(self, json1, json2):
+        Flaky.games += 1
+        super().initialize(json1, json2)
+        self.flaky = Flaky.games % 2 == 1
+
+    def action(self, c, json_msg):
+        results = super().action(c, json_msg)
+        if self.flaky:
+            self.reason = 'flaky'
+        return results
+
+
+def test_minimize_nondeterministic():
+    Flaky.games = 0
+    d = explore(Flaky, 1)
+    assert d is not None
+    assert minimize(Flaky, d) is d
@@ -0,0 +1,58 @@
+from submarine_py import Field
+from submarine_py.exploit import (
+    BestResponse, Policy, estimate, exploitability
+)
+from submarine_py.game import GameControl
+from submarine_py.local import house_match
+from test_local import Shuttle, SimplePlayer
+import json
+
+
+def test_legal_actions():
+    game = GameControl(Field())
+    game.initialize(json.dumps({"w": [0, 0], "c": [0, 1], "s": [1, 0]}),
+                    json.dumps({"w": [4, 4], "c": [3, 4], "s": [1, 1]}))
+    acts = game.legal_actions()
+    assert len({json.dumps(a) for a in acts}) == len(acts)
+    for act in acts:
+        record = game.apply(act)
+        assert record[1]
+        game.undo(record)
+    assert {"move": {"ship": "w", "to": [0, 1]}} not in acts
+
+
+def test_policy():
+    game = GameControl(Field())
+    game.initialize(json.dumps({"w": [0, 0], "c": [0, 1], "s": [1, 0]}),
+                    json.dumps({"w": [4, 4], "c": [3, 4], "s": [1, 1]}))
+    policy = Policy(SimplePlayer, Field(), samples=16)
+    dist = policy.distribution(game, 0, None)
+    assert abs(sum(p for p, _ in dist) - 1) < 1e-9 and len(dist) > 1
+    assert policy.distribution(game, 0, None) is dist
+    assert (policy.misses, policy.hits) == (1, 1)
+    game.initialize(json.dumps({"w": [0, 0], "c": [0, 1], "s": [1, 0]}),
+                    json.dumps(Shuttle(0).place_ship()))
+    assert Policy(Shuttle, Field()).distribution(game, 1, None) == [
+        (1.0, {"move": {"ship": "w", "to": [1, 0]}})]
+
+
+def test_best_response():
+    # Shuttle never attacks and places its ships always at the same squares
+    policy = Policy(Shuttle, Field(), samples=4)
+    for seat in (0, 1):
+        players = [BestResponse(policy, particles=4, seed=seat),
+                   Shuttle(0)]
+        if seat:
+            players.reverse()
+        assert house_match(Field(), players) == [seat]
+        assert len(players[seat].belief) == 1
+
+
+def test_exploitability():
+    result = exploitability('test_local:Shuttle', Field(), games=4,
+                            particles=4, samples=4)
+    assert result.games == 4 and result.exploitability == 0.5
+    assert result.queries > 0 and result.cached > 0
+    result = estimate([1, 0, 0.5, 0.5])
+    assert result.exploitability == 0
+    assert result.low < 0 < result.high
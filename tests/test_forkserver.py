@@ -0,0 +1,86 @@
+from submarine_py import Field, Protocol
+from submarine_py.forkserver import ForkServer
+from submarine_py.transport import Transport, listen, wait_for_path
+from test_local import SimplePlayer, join, start_server
+import os
+import threading
+
+PARENT = os.getpid()
+
+
+class Hog(SimplePlayer):
+    """takes memory or CPU time without limit, once forked"""
+    def __init__(self, seed, what='memory'):
+        super().__init__(seed)
+        self.what = what
+
+    def place_ship(self):
+        if os.getpid() != PARENT:
+            if self.what == 'memory':
+                self.ballast = bytearray(512 << 20)
+            while True:
+                pass
+        return super().place_ship()
+
+
+def vm_size():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmSize:'):
+                return int(line.split()[1]) * 1024
+
+
+def test_fork_games(tmp_path):
+    path = str(tmp_path / 'server.sock')
+    server = start_server(path, 2)
+    forks = ForkServer(SimplePlayer(1), path, timeout=60)
+    children = forks.run(4, parallel=2)
+    join([server])
+    assert [c.status for c in children] == ['ok'] * 4
+    assert len({c.pid for c in children}) == 4
+    assert sorted(c.seed for c in children) == [1, 2, 3, 4]
+    assert all(c.outcome in (True, False) for c in children)
+    assert all(c.maxrss > 0 for c in children)
+
+
+def stall(path, n):
+    """a server that greets n clients and sends them the field"""
+    transports = []
+
+    def run():
+        with listen(path, None) as s:
+            for _ in range(n):
+                transport = Transport(s.accept()[0])
+                transport.send(Protocol.greeting)
+                transport.readline()
+                transport.send(Field().to_json())
+                transport.flush()
+                transports.append(transport)
+        os.unlink(path)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    wait_for_path(path)
+    return thread, transports
+
+
+def test_limits(tmp_path):
+    path = str(tmp_path / 'stall.sock')
+    thread, transports = stall(path, 2)
+    forks = ForkServer(Hog(1), path, memory=vm_size() + (256 << 20))
+    assert forks.run(1)[0].status == 'failed'
+    forks = ForkServer(Hog(1, 'cpu'), path, cpu=1, timeout=30)
+    assert forks.run(1)[0].status == 'killed by SIGXCPU'
+    join([thread])
+    for transport in transports:
+        transport.close()
+
+
+def test_timeout(tmp_path):
+    path = str(tmp_path / 'stall.sock')
+    thread, transports = stall(path, 1)
+    forks = ForkServer(Hog(1, 'cpu'), path, timeout=0.2)
+    child, = forks.run(1)
+    assert child.status == 'timeout' and 0.2 < child.seconds < 10
+    join([thread])
+    transports[0].close()
@@ -0,0 +1,120 @@
+from submarine_py import GameControl, Field
+import json
+import random
+
+
+def make_game():
+    game = GameControl(Field())
+    game.initialize(
+        json.dumps({"w": [0, 0], "c": [0, 1], "s": [1, 0]}),
+        json.dumps({"w": [4, 4], "c": [3, 4], "s": [1, 1]}),
+    )
+    return game
+
+
+def state(game):
+    return [game.turn] + [
+        [(s.type, s.position, s.hp) for s in client.ships.values()]
+        for client in game.clients
+    ]
+
+
+def test_apply_undo_move():
+    game = make_game()
+    before = state(game)
+    record = game.apply({"move": {"ship": "w", "to": [0, 3]}})
+    assert record[1]
+    assert game.turn == 1
+    assert game.clients[0].ships["w"].position == [0, 3]
+    game.undo(record)
+    assert state(game) == before
+
+
+def test_apply_undo_sink():
+    game = make_game()
+    before = state(game)
+    record = game.apply({"attack": {"to": [1, 1]}})
+    assert record[1] and record[2].type == "s"
+    assert "s" not in game.clients[1].ships
+    game.undo(record)
+    assert state(game) == before
+    assert list(game.clients[1].ships) == ["w", "c", "s"]
+
+
+def test_apply_illegal():
+    game = make_game()
+    before = state(game)
+    record = game.apply({"attack": {"to": [4, 4]}})
+    assert not record[1]
+    record2 = game.apply({"move": {"ship": "w", "to": [3, 4]}})
+    assert not record2[1]
+    game.undo(record2)
+    game.undo(record)
+    assert state(game) == before
+
+
+def test_random_sequence_undo():
+    rng = random.Random(1)
+    game = make_game()
+    before = state(game)
+    records = []
+    for _ in range(200):
+        to = rng.choice(game.field.squares)
+        if rng.random() < 0.5:
+            ships = list(game.clients[game.turn].ships)
+            if not ships:
+                break
+            act = {"move": {"ship": rng.choice(ships), "to": to}}
+        else:
+            act = {"attack": {"to": to}}
+        records.append(game.apply(act))
+    for record in reversed(records):
+        game.undo(record)
+    assert state(game) == before
+
+
+def test_clone():
+    game = make_game()
+    other = game.clone()
+    other.apply({"attack": {"to": [1, 1]}})
+    assert "s" in game.clients[1].ships
+    assert game.turn == 0 and other.turn == 1
+
+
+def test_delta():
+    game = GameControl(Field(), snapshot=3)
+    game.initialize(
+        json.dumps({"w": [0, 0], "c": [0, 1], "s": [1, 0]}),
+        json.dumps({"w": [4, 4], "c": [3, 4], "s": [1, 1]}),
+    )
+    # time 1: full observation
+    results = game.action(0, json.dumps({"attack": {"to": [1, 1]}}))
+    assert "observation" in json.loads(results[0])
+    # time 2: nothing changed by a miss
+    results = game.action(1, json.dumps({"attack": {"to": [4, 3]}}))
+    assert [json.loads(r)["delta"] for r in results] == [
+        {"me": {}, "opponent": {}}, {"me": {}, "opponent": {}}
+    ]
+    # time 3: moved ship of the active player only
+    results = game.action(0, json.dumps({"move": {"ship": "c",
+                                                  "to": [3, 1]}}))
+    assert json.loads(results[0])["delta"] == {
+        "me": {"c": {"hp": 2, "position": [3, 1]}}, "opponent": {}
+    }
+    assert json.loads(results[1])["delta"] == {"me": {}, "opponent": {}}
+    # time 4: full observation again
+    results = game.action(1, json.dumps({"attack": {"to": [3, 3]}}))
+    assert "observation" in json.loads(results[1])
+
+
+def test_delta_sunk():
+    game = make_game()
+    game.snapshot = 10
+    game.time = 1
+    results = game.action(0, json.dumps({"attack": {"to": [1, 1]}}))
+    assert json.loads(results[0])["delta"] == {
+        "me": {}, "opponent": {"s": {"hp": 0}}
+    }
+    assert json.loads(results[1])["delta"] == {
+        "me": {"s": {"hp": 0}}, "opponent": {}
+    }
@@ -0,0 +1,251 @@
+from submarine_py import Field, play_game, server_main
+from submarine_py.local import local_match, house_match
+from submarine_py.house import HouseSeat
+from submarine_py.server import Adjudication, Progress, greet
+from submarine_py import server
+from submarine_py.random_player import RandomPlayer
+from submarine_py.transport import wait_for_path
+from test_game_control import make_game
+import json
+import os
+import pytest
+import socket
+import threading
+import time
+
+
+class SimplePlayer(RandomPlayer):
+    """RandomPlayer under the name expected by the tests"""
+    def name(self):
+        return 'simple-player'
+
+
+def start_server(path, games, **kwargs):
+    """run server_main in a daemon thread and wait for its socket"""
+    server = threading.Thread(
+        target=server_main, args=(path, None, games, Field()),
+        kwargs={'quiet': True, **kwargs}, daemon=True,
+    )
+    server.start()
+    wait_for_path(path)
+    return server
+
+
+def start_clients(path, players):
+    threads = [threading.Thread(target=play_game, args=(path, None, p),
+                                daemon=True)
+               for p in players]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def join(threads, timeout=60):
+    for thread in threads:
+        thread.join(timeout)
+        assert not thread.is_alive(), 'thread did not finish'
+
+
+def test_local_match():
+    players = [SimplePlayer(1), SimplePlayer(2)]
+    winners = local_match(Field(), players, games=3)
+    assert len(winners) == 3
+    assert all(w in (0, 1) for w in winners)
+
+
+def test_local_match_framed():
+    players = [SimplePlayer(3), SimplePlayer(4)]
+    winners = local_match(Field(), players, framed=True)
+    assert winners[0] in (0, 1)
+
+
+def test_unix_socket(tmp_path, capsys):
+    path = str(tmp_path / 'server.sock')
+    server = start_server(path, 1)
+    threads = start_clients(path, [SimplePlayer(5), SimplePlayer(6)])
+    join(threads + [server])
+    assert not (tmp_path / 'server.sock').exists()
+
+
+def test_unix_socket_not_replaced(tmp_path):
+    path = tmp_path / 'server.sock'
+    path.write_text('not a socket')
+    with pytest.raises(FileExistsError):
+        server_main(str(path), None, 1, Field(), quiet=True)
+    assert path.read_text() == 'not a socket'
+
+
+class BrokenPlayer(SimplePlayer):
+    def name(self):
+        raise RuntimeError('broken player')
+
+
+def test_unix_socket_removed_on_error(tmp_path):
+    path = str(tmp_path / 'server.sock')
+
+    def connect():
+        while True:
+            try:
+                with socket.socket(socket.AF_UNIX) as sock:
+                    sock.connect(path)
+                return
+            except (FileNotFoundError, ConnectionRefusedError):
+                time.sleep(0.001)
+    thread = threading.Thread(target=connect, daemon=True)
+    thread.start()
+    with pytest.raises(RuntimeError):
+        server_main(path, None, 1, Field(), quiet=True,
+                    house=BrokenPlayer(0))
+    join([thread])
+    assert not os.path.exists(path)
+
+
+def test_bad_client_skipped(tmp_path, capsys):
+    path = str(tmp_path / 'server.sock')
+    server = start_server(path, 3, house=SimplePlayer(12))
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.connect(path)
+        # name and overlapping ships, with the house player moving second
+        sock.sendall(b'bad\n{"w": [0, 0], "c": [0, 0], "s": [1, 1]}\n')
+        while sock.recv(1024):
+            pass                # until the server closes the connection
+    for seed in (13, 14):
+        join(start_clients(path, [SimplePlayer(seed)]))
+    join([server])
+    out = capsys.readouterr().out
+    wins = [line for line in out.splitlines() if ' win ' in line]
+    assert sum(int(line.split()[2]) for line in wins) == 2
+
+
+def test_server_workers(tmp_path, capsys):
+    path = str(tmp_path / 'server.sock')
+    server = start_server(path, 4, workers=2)
+    threads = start_clients(path, [SimplePlayer(i) for i in range(8)])
+    join(threads + [server])
+    out = capsys.readouterr().out
+    wins = [line for line in out.splitlines() if ' win ' in line]
+    assert sum(int(line.split()[2]) for line in wins) == 4
+
+
+def test_house_workers(tmp_path):
+    path = str(tmp_path / 'server.sock')
+    with pytest.raises(ValueError):
+        server_main(path, None, 2, Field(), quiet=True, workers=2,
+                    house=SimplePlayer(1))
+    assert not os.path.exists(path)
+
+
+def test_house_match():
+    players = [SimplePlayer(7), SimplePlayer(8)]
+    winners = house_match(Field(), players, games=3)
+    assert len(winners) == 3
+    assert all(w in (0, 1) for w in winners)
+    # same seeds, same games as over sockets
+    players = [SimplePlayer(7), SimplePlayer(8)]
+    assert local_match(Field(), players, games=3) == winners
+
+
+def test_house_seat(tmp_path, capsys):
+    path = str(tmp_path / 'server.sock')
+    server = start_server(path, 2, house=SimplePlayer(9))
+    for seed in (10, 11):
+        join(start_clients(path, [SimplePlayer(seed)]))
+    join([server])
+    out = capsys.readouterr().out
+    assert 'simple-player@' in out
+
+
+class RecordingPlayer(SimplePlayer):
+    def __init__(self, seed):
+        super().__init__(seed)
+        self.states = []
+
+    def update(self, json_, info):
+        super().update(json_, info)
+        self.states.append((
+            {t: (s.hp, list(s.position)) for t, s in self.ships.items()},
+            dict(self.opponent),
+        ))
+
+
+def test_house_match_delta():
+    full = [RecordingPlayer(12), RecordingPlayer(13)]
+    winners = house_match(Field(), full, games=2)
+    delta = [RecordingPlayer(12), RecordingPlayer(13)]
+    assert house_match(Field(), delta, games=2, snapshot=4) == winners
+    for a, b in zip(full, delta):
+        assert len(a.states) > 10
+        assert a.states == b.states
+
+
+def test_house_match_delta_report(capsys):
+    players = [SimplePlayer(14), SimplePlayer(15)]
+    house_match(Field(), players, quiet=False)
+    full = capsys.readouterr().out
+    players = [SimplePlayer(14), SimplePlayer(15)]
+    house_match(Field(), players, quiet=False, snapshot=4)
+    assert capsys.readouterr().out == full
+
+
+class Shuttle(SimplePlayer):
+    """moves a ship back and forth without attacking"""
+    def place_ship(self):
+        return {'w': [0, 0], 'c': [0, 2], 's': [0, 4]}
+
+    def action(self):
+        ship = next(iter(self.ships.values()))
+        x, y = ship.position
+        return json.dumps(self.move(ship.type, [1 - x, y]))
+
+
+def shuttle_game(adjudication):
+    clients = [greet(HouseSeat(Shuttle(seed))) for seed in (16, 17)]
+    return server.play_game(Field(), clients, quiet=True,
+                            adjudication=adjudication)
+
+
+def test_adjudication():
+    result = shuttle_game(Adjudication(repetition=3))
+    # the initial position recurs every 4 turns
+    assert (result.winner, result.reason, result.time) == (
+        -1, 'repetition', 8)
+    assert result.saved == 10000 - 8 and result.saved_seconds > 0
+    result = shuttle_game(Adjudication(no_progress=50))
+    assert (result.reason, result.time, result.saved) == (
+        'no progress', 50, 9950)
+    result = shuttle_game(Adjudication(limit=100))
+    assert (result.reason, result.time, result.saved) == (
+        'turn limit', 100, 0)
+
+
+def test_progress():
+    acts = [{"move": {"ship": "c", "to": [0, 2]}},
+            {"attack": {"to": [1, 0]}},         # sinks s of player 0
+            {"move": {"ship": "c", "to": [0, 1]}},
+            {"move": {"ship": "s", "to": [1, 2]}},
+            {"move": {"ship": "c", "to": [0, 2]}},
+            {"move": {"ship": "s", "to": [1, 1]}}]  # as after the attack
+    for rule, last in ((Adjudication(repetition=2, no_progress=4),
+                        'repetition'),
+                       (Adjudication(no_progress=4), 'no progress')):
+        game = make_game()
+        progress = Progress(rule, game)
+        draws = []
+        for act in acts:
+            assert game.apply(act)[1]
+            draws.append(progress.draw(game))
+        assert draws == [None] * 5 + [last]
+
+
+def test_game_aborted():
+    placement = json.dumps({'w': [0, 0], 'c': [1, 1], 's': [2, 2]})
+    for messages in (['bad', placement.replace('[1, 1]', '[0, 0]')],
+                     ['gone', placement]):
+        server_end, client_end = socket.socketpair()
+        client_end.sendall(''.join(m + '\n' for m in messages).encode())
+        client_end.shutdown(socket.SHUT_WR)
+        clients = [greet(server_end), greet(HouseSeat(SimplePlayer(0)))]
+        with pytest.raises(server.GameAborted):
+            server.play_game(Field(), clients, quiet=True)
+        clients[0].close()
+        client_end.close()
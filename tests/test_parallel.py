@@ -0,0 +1,63 @@
+from submarine_py import Field, GameControl
+from submarine_py.parallel import ParallelSearch, publish, read
+import json
+import pytest
+import time
+
+
+def damage(game, seat, act, belief):
+    """HP the opponent loses by act, plus a bonus given in belief"""
+    before = sum(s.hp for s in game.clients[1 - seat].ships.values())
+    game.apply(act)
+    after = sum(s.hp for s in game.clients[1 - seat].ships.values())
+    return before - after + belief.get(json.dumps(act), 0)
+
+
+def slow(game, seat, act, belief):
+    time.sleep(0.05)
+    return 0
+
+
+def make_game():
+    game = GameControl(Field())
+    game.initialize(json.dumps({"w": [0, 0], "c": [0, 1], "s": [1, 0]}),
+                    json.dumps({"w": [1, 1], "c": [3, 4], "s": [4, 4]}))
+    return game
+
+
+def test_search():
+    game = make_game()
+    acts = game.legal_actions()
+    bonus = {"move": {"ship": "s", "to": [2, 0]}}
+    with ParallelSearch(damage, workers=2) as search:
+        result = search.search(game, 0, belief={}, deadline=30)
+        assert result.action == {"attack": {"to": [1, 1]}}
+        assert result.value == 1
+        assert None not in result.values
+        assert sum(s.evaluated for s in result.workers.values()) == len(acts)
+        # the next turn is published over the last one
+        result = search.search(game, 0, acts, deadline=30,
+                               belief={json.dumps(bonus): 2})
+        assert result.action == bonus and result.value == 2
+        assert sum(s.stale for s in result.workers.values()) == 0
+    assert game.clients[1].ships['w'].hp == 3
+
+
+def test_deadline():
+    game = make_game()
+    with ParallelSearch(slow, workers=2, chunk=1) as search:
+        start = time.monotonic()
+        result = search.search(game, 0, belief={}, deadline=0.3)
+        assert time.monotonic() - start < 5
+    assert result.values.count(None) > 0
+    assert result.action in game.legal_actions()
+
+
+def test_publish():
+    buf = bytearray(64)
+    publish(buf, 3, b'{"a": 1}')
+    assert read(buf, 3) == b'{"a": 1}'
+    assert read(buf, 2) is None
+    with pytest.raises(ValueError):
+        publish(buf, 4, b'x' * 64)
+    assert read(buf, 3) == b'{"a": 1}'
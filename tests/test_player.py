@@ -1,4 +1,6 @@
-from submarine_py import Player, Field
+from submarine_py import Player, Field, play_session
+from submarine_py.local import house_match
+from test_local import SimplePlayer, join, start_server
 import json
 
 
@@ -100,3 +102,44 @@ def test_overlap():
 
     assert p.overlap([1, 1]) is None
     assert p.ships["w"] == p.overlap([0, 0])
+
+
+class SessionPlayer(SimplePlayer):
+    def __init__(self, seed):
+        super().__init__(seed)
+        self.events = []
+
+    def on_session_start(self):
+        self.events.append('session')
+
+    def on_game_start(self, field):
+        self.cache['games'] = self.cache.get('games', 0) + 1
+        self.events.append(('start', field.width))
+
+    def on_game_end(self, outcome):
+        self.events.append(('end', outcome))
+
+
+def test_session_hooks():
+    players = [SessionPlayer(1), SessionPlayer(2)]
+    winners = house_match(Field(), players, games=3)
+    house_match(Field(3, 4), players)
+    for c, player in enumerate(players):
+        outcomes = [w == c if w >= 0 else None for w in winners]
+        assert player.events[:7] == ['session'] + [
+            e for o in outcomes for e in (('start', 5), ('end', o))
+        ]
+        assert player.events[7:9] == ['session', ('start', 4)]
+        assert player.caches == {Field().key: {'games': 3},
+                                 Field(3, 4).key: {'games': 1}}
+
+
+def test_session_local(tmp_path):
+    path = str(tmp_path / 'server.sock')
+    server = start_server(path, 2, house=SimplePlayer(3))
+    player = SessionPlayer(4)
+    outcomes = play_session(path, None, player, 2)
+    join([server])
+    assert player.events == ['session', ('start', 5), ('end', outcomes[0]),
+                             ('start', 5), ('end', outcomes[1])]
+    assert player.cache == {'games': 2}
@@ -0,0 +1,61 @@
+from submarine_py import Field
+from submarine_py.analytics import GameLog
+from submarine_py.local import house_match
+from submarine_py.profiling import Profiler, play, replay
+from submarine_py.tracing import Tracer
+from test_local import SimplePlayer
+import json
+import tracemalloc
+
+
+def test_play():
+    profiler = Profiler(opening=3, keep=2)
+    play(profiler, SimplePlayer(1), SimplePlayer(2), Field(), 4)
+    assert profiler.games == 4
+    calls = sum(map(len, profiler.latencies.values()))
+    assert calls == profiler.calls > 0
+    assert len(profiler.latencies['opening']) <= 3 * 4
+    assert len(profiler.slowest) == 2
+    assert profiler.over(0) == calls
+    report = profiler.report()
+    assert 'p99' in report and '\nall ' in report
+
+
+class TwoShips(SimplePlayer):
+    def place_ship(self):
+        ps = self.rng.sample(self.field.squares, 2)
+        return {'w': ps[0], 'c': ps[1]}
+
+
+def test_small_fleets():
+    profiler = Profiler(opening=3)
+    play(profiler, TwoShips(1), TwoShips(2), Field(), 3)
+    phases = {phase: len(values)
+              for phase, values in profiler.latencies.items()}
+    assert phases['opening'] > 0
+    assert phases['middle'] > 0
+
+
+def test_replay(tmp_path):
+    path = tmp_path / 'games.jsonl'
+    house_match(Field(), [SimplePlayer(3), SimplePlayer(4)], games=2,
+                tracer=Tracer(GameLog(path)))
+    records = [json.loads(line) for line in open(path)]
+    profiler = Profiler()
+    replay(profiler, SimplePlayer(5), [path])
+    assert profiler.games == 4
+    assert profiler.calls == sum(len(r['turns']) for r in records)
+    profiler = Profiler()
+    replay(profiler, SimplePlayer(5), [path], names=['nobody'])
+    assert profiler.games == 0
+
+
+def test_profile():
+    profiler = Profiler(keep=1, cprofile=True, memory=True)
+    try:
+        play(profiler, SimplePlayer(6), SimplePlayer(7), Field(), 1)
+    finally:
+        tracemalloc.stop()
+    (_, _, call), = profiler.slowest
+    assert call.profile is not None and call.memory is not None
+    assert 'action' in profiler.report()
@@ -0,0 +1,49 @@
+from submarine_py.results import ResultStore
+from submarine_py.server import GameResult
+from test_local import SimplePlayer, start_server, start_clients, join
+import time
+
+
+def test_batches(tmp_path):
+    path = str(tmp_path / 'results.db')
+    store = ResultStore(path, batch_size=3, interval=1000)
+    store.add(['a', 'b'], 0)
+    store.add(['b', 'a'], 0)
+    assert len(store.pending) == 2
+    store.add(['a', 'c'], 1)
+    assert not store.pending
+    store.add(['c', 'b'], -1)
+    store.close()
+
+    store = ResultStore(path)
+    assert store.leaderboard() == [
+        ('a', 3, 1, 2, 0), ('b', 3, 1, 1, 1), ('c', 2, 1, 0, 1),
+    ]
+    assert store.head_to_head('a', 'b') == (1, 1, 0)
+    assert store.head_to_head('c', 'a') == (1, 0, 0)
+    assert store.head_to_head('a', 'x') == (0, 0, 0)
+    assert len(store.games('a', 'b')) == 2
+    store.close()
+
+
+def test_server_store(tmp_path, capsys):
+    path = str(tmp_path / 'server.sock')
+    store = ResultStore(':memory:')
+    server = start_server(path, 2, store=store)
+    for i in range(2):
+        join(start_clients(path, [SimplePlayer(i + j) for j in (10, 20)]))
+    join([server])
+    (row,) = store.leaderboard()
+    assert row[0] == 'simple-player@local' and row[1] == 4
+    (game, _) = store.games('simple-player@local', 'simple-player@local')
+    assert game[8] in ('all sunk', 'illegal action', 'turn limit')
+    store.close()
+
+
+def test_started(tmp_path):
+    store = ResultStore(':memory:')
+    result = GameResult(0, ['a', 'b'], 10, 100.0, 'all sunk')
+    store.record(['a', 'b'], result)
+    (game,) = store.games('a', 'b')
+    assert abs(game[1] - (time.time() - 100.0)) < 5
+    store.close()
@@ -0,0 +1,42 @@
+from submarine_py import Field
+from submarine_py.soak import Monitor, Thresholds, open_fds, rss, soak
+import os
+
+
+class Leak:
+    """keeps a file open after each game"""
+    def __init__(self):
+        self.files = []
+
+    def on_game_end(self, event):
+        self.files.append(open(os.devnull))
+
+
+def test_soak():
+    monitor = Monitor(every=2, warmup=1)
+    assert soak(Field(), monitor, games=5, round=2) == 5
+    assert [s.games for s in monitor.samples] == [1, 3, 5]
+    assert all(s.latency > 0 for s in monitor.samples)
+    assert monitor.check(Thresholds(rss=1 << 30, traced=1 << 30,
+                                    drift=100)) == []
+    assert 'top allocations' in monitor.report()
+    monitor.close()
+
+
+def test_leak():
+    leak = Leak()
+    monitor = Monitor(every=1, warmup=1, top=0)
+    soak(Field(), monitor, games=3, round=3, subscribers=[leak])
+    failures = monitor.check(Thresholds(rss=1 << 30, traced=1 << 30,
+                                        drift=100))
+    monitor.close()
+    assert failures == ['fds grew by 2 (> 0)']
+    for f in leak.files:
+        f.close()
+
+
+def test_measures():
+    fds = open_fds()
+    with open(os.devnull):
+        assert open_fds() == fds + 1
+    assert rss() > 0
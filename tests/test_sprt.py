@@ -0,0 +1,52 @@
+from submarine_py import Field, Player
+from submarine_py.sprt import SPRT, evaluate
+import json
+import random
+
+
+class MovingPlayer(Player):
+    """never attacks, so never wins"""
+    def __init__(self, seed=0):
+        super().__init__()
+        self.rng = random.Random(seed)
+
+    def name(self):
+        return 'moving-player'
+
+    def place_ship(self):
+        ps = self.rng.sample(self.field.squares, 3)
+        return {'w': ps[0], 'c': ps[1], 's': ps[2]}
+
+    def action(self):
+        while True:
+            ship = self.rng.choice(list(self.ships.values()))
+            to = self.rng.choice(self.field.squares)
+            if ship.is_reachable(to) and not self.overlap(to):
+                return json.dumps(self.move(ship.type, to))
+
+
+def test_sprt_decides():
+    test = SPRT(0, 20)
+    while test.status() is None:
+        test.update(0)
+    assert test.status() == 'H0'
+    assert test.games < 100
+    elo, margin = test.elo()
+    assert elo < 0
+
+
+def test_sprt_undecided():
+    test = SPRT(0, 20)
+    for _ in range(10):
+        test.update(1)
+        test.update(0)
+    assert test.status() is None
+    assert test.elo()[0] == 0
+
+
+def test_evaluate():
+    test = SPRT(0, 50)
+    status = evaluate('test_local:SimplePlayer', 'test_sprt:MovingPlayer',
+                      Field(), test=test, max_games=200)
+    assert status == 'H1'
+    assert test.games < 200
@@ -0,0 +1,27 @@
+import subprocess
+import sys
+
+
+def imported_after(code):
+    script = code + '\nimport sys\nprint(" ".join(sys.modules))'
+    out = subprocess.run([sys.executable, '-c', script],
+                         capture_output=True, text=True, check=True)
+    return set(out.stdout.split())
+
+
+def test_core_is_light():
+    modules = imported_after(
+        'import submarine_py\n'
+        'submarine_py.GameControl, submarine_py.Player, submarine_py.Client'
+    )
+    assert 'tabulate' not in modules
+    assert 'socket' not in modules
+    assert 'submarine_py.server' not in modules
+
+
+def test_lazy_server():
+    modules = imported_after(
+        'import submarine_py\n'
+        'assert callable(submarine_py.server_main)'
+    )
+    assert 'submarine_py.server' in modules
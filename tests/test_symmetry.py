@@ -0,0 +1,53 @@
+from submarine_py import Field, GameControl
+from submarine_py.symmetry import Symmetry, symmetry_of
+import json
+
+
+def test_group():
+    assert len(Symmetry(Field(3, 3, [[0, 0]]))) == 2
+    assert len(Symmetry(Field(3, 3, [[0, 0], [2, 2], [0, 2]]))) == 2
+    assert len(Symmetry(Field(3, 4, [[0, 0]]))) == 1
+    sym = Symmetry(Field())
+    for g, perm in enumerate(sym.perms):
+        assert sorted(perm) == list(range(25))
+        inverse = sym.perms[sym.inverse[g]]
+        assert [inverse[i] for i in perm] == list(range(25))
+    assert symmetry_of(Field()) is symmetry_of(Field())
+
+
+def test_canonical_placement():
+    sym = Symmetry(Field())
+    placement = {"w": [0, 1], "c": [3, 3], "s": [4, 0]}
+    canonical, g = sym.canonical_placement(placement)
+    for h in range(len(sym)):
+        other, _ = sym.canonical_placement(sym.placement(h, placement))
+        assert other == canonical
+    assert sym.placement(g, placement) == canonical
+
+
+def test_canonical_state():
+    sym = Symmetry(Field())
+    placements = [{"w": [0, 1], "c": [3, 3], "s": [4, 0]},
+                  {"w": [2, 2], "c": [1, 3], "s": [0, 4]}]
+    keys = set()
+    for g in range(len(sym)):
+        game = GameControl(Field())
+        game.initialize(*[json.dumps(sym.placement(g, p))
+                          for p in placements])
+        game.apply(sym.action(g, {"move": {"ship": "w", "to": [0, 4]}}))
+        keys.add(sym.canonical_state(game)[0])
+    assert len(keys) == 1
+
+
+def test_action_result():
+    sym = Symmetry(Field())
+    act = {"move": {"ship": "c", "to": [1, 4]}}
+    for g in range(len(sym)):
+        assert sym.unmap_action(g, sym.action(g, act)) == act
+    result = {"moved": {"ship": "c", "distance": [0, -2]}}
+    assert sym.result(1, result)["moved"]["distance"] == [0, -2]
+    assert sym.result(6, result)["moved"]["distance"] == [2, 0]
+    assert sym.unmap_result(6, sym.result(6, result)) == result
+    attacked = {"attacked": {"position": [1, 2], "near": ["w"]}}
+    assert sym.result(3, attacked)["attacked"] == {
+        "position": [3, 2], "near": ["w"]}
@@ -0,0 +1,39 @@
+from submarine_py import Field
+from submarine_py.local import local_match
+from submarine_py.tracing import Tracer, Recorder
+from test_local import SimplePlayer
+import io
+import json
+
+
+class Counter:
+    def __init__(self):
+        self.counts = {}
+
+    def count(self, event):
+        name = type(event).__name__
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    on_game_start = on_turn_start = on_action = on_result = on_game_end = count
+
+
+def test_events():
+    counter = Counter()
+    players = [SimplePlayer(1), SimplePlayer(2)]
+    local_match(Field(), players, tracer=Tracer(counter))
+    counts = counter.counts
+    assert counts['GameStart'] == 1 and counts['GameEnd'] == 1
+    assert counts['TurnStart'] == counts['Action'] == counts['Result']
+
+
+def test_recorder():
+    recorder = Recorder(3)
+    players = [SimplePlayer(3), SimplePlayer(4)]
+    local_match(Field(), players, tracer=Tracer(recorder))
+    events = recorder.events()
+    assert len(events) == 9
+    out = io.StringIO()
+    recorder.dump(out)
+    lines = out.getvalue().splitlines()
+    assert json.loads(lines[0])['names'] == ['simple-player'] * 2
+    assert json.loads(lines[-1])['event'] == 'Result'
@@ -0,0 +1,48 @@
+from submarine_py.transport import Transport, connect, listen
+import os
+import socket
+import pytest
+
+
+@pytest.mark.parametrize('framed', [False, True])
+def test_roundtrip(framed):
+    a, b = socket.socketpair()
+    left, right = Transport(a, framed=framed), Transport(b, framed=framed)
+    left.send('your turn')
+    left.send('{"observation": "日本語"}')
+    assert left.stats.sends == 0
+    left.flush()
+    assert left.stats.sends == 1
+    assert right.readline() == 'your turn\n'
+    assert right.readline() == '{"observation": "日本語"}\n'
+    assert right.stats.recvs == 1
+    assert right.stats.bytes_received == left.stats.bytes_sent
+    left.close()
+    assert right.readline() == ''
+    right.close()
+
+
+def test_readline_flushes():
+    a, b = socket.socketpair()
+    left, right = Transport(a), Transport(b)
+    right.send('hello')
+    right.flush()
+    left.send('name')
+    assert left.readline() == 'hello\n'
+    assert left.stats.sends == 1
+    assert right.readline() == 'name\n'
+    left.close()
+    right.close()
+
+
+def test_listen_path(tmp_path):
+    path = str(tmp_path / 'sock')
+    server = listen(path, None)
+    # the path appears only once the socket listens
+    assert os.listdir(tmp_path) == ['sock']
+    with connect(path, None) as client:
+        peer, _ = server.accept()
+        client.sendall(b'ok')
+        assert peer.recv(2) == b'ok'
+        peer.close()
+    server.close()
@@ -0,0 +1,73 @@
+from submarine_py import Field, GameControl
+from submarine_py.zobrist import TranspositionTable
+import json
+import random
+import pytest
+
+
+def make_game():
+    game = GameControl(Field())
+    game.initialize(
+        json.dumps({"w": [0, 0], "c": [0, 1], "s": [1, 0]}),
+        json.dumps({"w": [4, 4], "c": [3, 4], "s": [1, 1]}),
+    )
+    return game
+
+
+def scratch(game):
+    value = 0
+    for client in game.clients:
+        value ^= client.keys.fleet(client.side, client.ships.values())
+    return value ^ (game.clients[0].keys.side if game.turn else 0)
+
+
+def test_incremental():
+    rng = random.Random(2)
+    game = make_game()
+    start = game.hash
+    seen = {start}
+    records = []
+    for _ in range(300):
+        to = rng.choice(game.field.squares)
+        ships = list(game.clients[game.turn].ships)
+        if rng.random() < 0.5 and ships:
+            act = {"move": {"ship": rng.choice(ships), "to": to}}
+        else:
+            act = {"attack": {"to": to}}
+        records.append(game.apply(act))
+        assert game.hash == scratch(game)
+        seen.add(game.hash)
+    assert len(seen) > 10
+    for record in reversed(records):
+        game.undo(record)
+    assert game.hash == start
+
+
+def test_side_to_move():
+    game = make_game()
+    before = game.hash
+    game.turn = 1
+    assert game.hash != before
+    other = make_game()
+    other.apply({"move": {"ship": "w", "to": [0, 2]}})
+    other.apply({"move": {"ship": "w", "to": [4, 3]}})
+    other.apply({"move": {"ship": "w", "to": [0, 0]}})
+    other.apply({"move": {"ship": "w", "to": [4, 4]}})
+    assert other.hash == before
+
+
+def test_replacement():
+    with pytest.raises(ValueError):
+        TranspositionTable(replacement='random')
+    tt = TranspositionTable(2, replacement='always')
+    tt.store(2, 5, 1.0)
+    tt.store(4, 0, 0.0)
+    assert tt.probe(2) is None and tt.probe(4) == (0, 0.0, None)
+    tt = TranspositionTable(2, replacement='age')
+    tt.store(2, 5, 1.0)
+    tt.store(4, 0, 0.0)
+    assert tt.probe(4) is None and tt.rejects == 1
+    tt.new_search()
+    tt.store(4, 0, 0.0)
+    assert tt.probe(4) == (0, 0.0, None) and tt.overwrites == 1
+    assert tt.hit_rate == 0.5